@@ -91,15 +91,163 @@ def generate(ctx: Context, output_directory: str) -> None:
     help="Path to the Tor binary.",
     required=False,
 )
+@option(
+    "--upscaler",
+    type=Choice(["bigjpg", "local"], case_sensitive=False),
+    default="bigjpg",
+    show_default=True,
+    help="The upscaler backend: bigjpg.com via Tor or local CPU upscaling.",
+)
+@option(
+    "--driver-pool-size",
+    type=click.IntRange(min=1),
+    default=2,
+    show_default=True,
+    help="The number of warm headless Chrome instances used by the bigjpg upscaler.",
+)
+@option(
+    "--driver-max-jobs",
+    type=click.IntRange(min=1),
+    default=10,
+    show_default=True,
+    help="The number of images after which a bigjpg Chrome instance is recycled.",
+)
+@option(
+    "--upscaler-limits",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, readable=True),
+    help="A JSON file with the input limits of the upscaler backends. Images"
+    " exceeding the limits of bigjpg are upscaled locally.",
+    required=False,
+)
+@option(
+    "--upload-timeout",
+    type=click.FloatRange(min=0),
+    default=30,
+    show_default=True,
+    help="The maximum time in seconds to wait for the file upload of ChatGPT.",
+)
+@option(
+    "--response-timeout",
+    type=click.FloatRange(min=0),
+    default=120,
+    show_default=True,
+    help="The maximum time in seconds to wait for a text response of ChatGPT.",
+)
+@option(
+    "--image-timeout",
+    type=click.FloatRange(min=0),
+    default=300,
+    show_default=True,
+    help="The maximum time in seconds to wait for the image generated by ChatGPT.",
+)
+@option(
+    "--quality-thresholds",
+    type=click.Path(exists=True, file_okay=True, dir_okay=False, readable=True),
+    help="A JSON file with the thresholds of the quality gate checking the"
+    " generated images before upscaling.",
+    required=False,
+)
+@option(
+    "--reject-directory",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+    help="The directory for images failing the quality gate."
+    " Defaults to <output-directory>_rejected.",
+    required=False,
+)
+@option(
+    "--scratch-directory",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+    help="The directory for intermediate files, e.g. a tmpfs mount such as /dev/shm."
+    " Defaults to the system's temporary directory.",
+    required=False,
+)
+@option(
+    "--queue-size",
+    type=click.IntRange(min=1),
+    default=2,
+    show_default=True,
+    help="The number of designs waiting in front of each stage of the pipeline"
+    " (scrape, generate, upscale, write).",
+)
+@option(
+    "--source-directory",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+    help="The directory of the queue of prefetched Vexels images, which may be"
+    " shared by several workers. Defaults to <output-directory>_sources.",
+    required=False,
+)
+@option(
+    "--hash-index",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+    help="The directory of the perceptual-hash indexes used to skip near-duplicate"
+    " source images and designs. Defaults to <output-directory>_index.",
+    required=False,
+)
+@option(
+    "--metadata-prompt",
+    type=Choice(["separate", "json"], case_sensitive=False),
+    default="separate",
+    show_default=True,
+    help="Request the title, description and tags in one turn each or as a single"
+    " JSON object that is validated against the shop limits.",
+)
+@option(
+    "--chatgpt-profile",
+    "chatgpt_profiles",
+    type=STRING,
+    multiple=True,
+    default=("ChatGPT",),
+    show_default=True,
+    help="A Chrome profile logged in to a ChatGPT account; repeat it to rotate"
+    " between accounts when one reaches its usage limit.",
+)
+@option(
+    "--session-designs",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The number of designs generated in the same ChatGPT browser, each in"
+    " a new conversation. The browser is recycled earlier after an error.",
+)
+@option(
+    "--checkpoint-journal",
+    type=click.Path(file_okay=False, dir_okay=True, writable=True),
+    help="The directory of the journal recording the results of the stages of each"
+    " design, so an interrupted design resumes at the failed stage."
+    " Defaults to <output-directory>_journal.",
+    required=False,
+)
+@option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=1,
+    show_default=True,
+    help="The number of parallel generation workers, each with its own browser.",
+)
 @pass_context
-def generategpt(ctx: Context, tor_binary_path: str | click.Path) -> None:
+def generategpt(
+    ctx: Context,
+    tor_binary_path: str | click.Path,
+    upscaler: str,
+    workers: int,
+    **kwargs: Any,
+) -> None:
     """Use GPT to generate images via Selenium."""
     from genai_pod.generators.generate_gpt import (
         AbortScriptError,
         generate_image_selenium_gpt,
     )
+    from genai_pod.utilitys.journal import exit_on_sigterm
+
+    ctx.obj |= {"tor_binary_path": tor_binary_path, "upscaler": upscaler.lower()} | kwargs
+    # Unwinds on SIGTERM, so the supervisor terminates its workers and the
+    # journals are closed
+    exit_on_sigterm()
+    if workers > 1:
+        from genai_pod.generators.gpt_workers import supervise_workers
 
-    ctx.obj |= {"tor_binary_path": tor_binary_path}
+        supervise_workers(workers, ctx.obj)
+        return
     while True:
         try:
             generate_image_selenium_gpt(**ctx.obj)
@@ -140,6 +288,70 @@ def redbubble(ctx: Context, **kwargs: Any) -> None:
     upload_redbubble(**ctx.obj)
 
 
+@cli.command()
+@option(
+    "-o",
+    "--output-directory",
+    type=STRING,
+    help="The directory containing the generated designs to finish.",
+    required=True,
+)
+@option(
+    "--workers",
+    type=click.IntRange(min=1),
+    help="The number of worker processes. Defaults to the number of CPUs.",
+    required=False,
+)
+@option(
+    "--trim-cm",
+    type=click.FloatRange(min=0),
+    default=0.1,
+    show_default=True,
+    help="The amount of trimming of the design edges in centimeters.",
+)
+@option(
+    "--force",
+    is_flag=True,
+    help="Finish designs again even if a finished image already exists.",
+)
+@option(
+    "--tile-rows",
+    type=click.IntRange(min=1),
+    help="Finish each design in horizontal strips of this many rows to bound the"
+    " memory of each worker. Defaults to untiled.",
+    required=False,
+)
+@option(
+    "--blend",
+    type=Choice(["float", "fixed"], case_sensitive=False),
+    default="float",
+    show_default=True,
+    help="The blending implementation: floating point or integer arithmetic.",
+)
+def process(
+    output_directory: str,
+    workers: int | None,
+    trim_cm: float,
+    force: bool,
+    tile_rows: int | None,
+    blend: str,
+) -> None:
+    """Finish all generated designs of a directory in parallel."""
+    from genai_pod.utilitys.post_processing import finish_designs
+
+    summary = finish_designs(
+        output_directory,
+        workers=workers,
+        trim_cm=trim_cm,
+        force=force,
+        tile_rows=tile_rows,
+        blend=blend.lower(),
+    )
+    click.echo(summary)
+    if summary.failed:
+        sys.exit(1)
+
+
 @cli.command()
 @argument(
     "profile_name",
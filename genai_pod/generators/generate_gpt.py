@@ -14,20 +14,24 @@ creation, customization, and enhancement of images for print-on-demand platforms
 from __future__ import annotations
 
 import logging
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from functools import partial
 from hashlib import sha256
 from io import BytesIO
 from pathlib import Path
 from re import sub
-from secrets import choice, randbelow
-from tempfile import NamedTemporaryFile
-from time import sleep
+from secrets import randbelow
+from threading import Event
+from time import perf_counter
+from typing import TYPE_CHECKING, Any
 
 import undetected_chromedriver as uc
 from PIL import Image
 from pytz import timezone
-from requests import get
 from selenium.common.exceptions import (
+    JavascriptException,
     NoSuchElementException,
     TimeoutException,
     WebDriverException,
@@ -36,15 +40,345 @@ from selenium.webdriver.chrome.webdriver import WebDriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support import expected_conditions as ec
 from selenium.webdriver.support.ui import WebDriverWait
-from tqdm import tqdm
 
-from genai_pod.utilitys.bigjpg_upscaler import upscale
-from genai_pod.utils import clean_string, pilling_image, start_chrome, write_metadata
+from genai_pod.utilitys.account_pool import AccountPool
+from genai_pod.utilitys.derivatives import render_derivatives
+from genai_pod.utilitys.http_client import get_http_client
+from genai_pod.utilitys.journal import Checkpoint, DesignJournal
+from genai_pod.utilitys.metadata import (
+    METADATA_PROMPT,
+    parse_metadata,
+    repair_metadata,
+)
+from genai_pod.utilitys.phash_index import HashIndex, perceptual_hash
+from genai_pod.utilitys.pipeline import Pipeline, PipelineStats, Stage
+from genai_pod.utilitys.preflight import load_limits
+from genai_pod.utilitys.quality_gate import (
+    QualityGate,
+    QualityThresholds,
+    load_thresholds,
+)
+from genai_pod.utilitys.source_queue import SourceImage, SourceQueue
+from genai_pod.utilitys.upscalers import Upscaler, create_upscaler
+from genai_pod.utilitys.workspace import Workspace
+from genai_pod.utils import (
+    clean_string,
+    finish_image,
+    save_finished_image,
+    start_chrome,
+    write_metadata,
+)
+
+if TYPE_CHECKING:
+    from genai_pod.generators.gpt_workers import GenerationWorker
 
 active_drivers: list[WebDriver] = []
 
 logger = logging.getLogger(__name__)
 
+CHATGPT_URL = "https://chatgpt.com/?model=gpt-4o"
+CHATGPT_PROFILE = "ChatGPT"
+ASSISTANT_TURN_SELECTOR = "[data-message-author-role='assistant']"
+STOP_BUTTON_SELECTOR = "[data-testid='stop-button']"
+IMAGE_CONTAINER_SELECTOR = "div.absolute.left-0.right-0.top-0"
+# The user data directory of the scraping browser, below the Chrome profiles
+SCRAPER_DIRECTORY = "scraper"
+# The number of pages of the Vexels niche the source images are taken from
+VEXELS_PAGES = 30
+
+# Collects the title and thumbnail of every asset on a Vexels page
+_HARVEST_SCRIPT = """
+return Array.from(document.querySelectorAll(".vx-grid-asset")).map((asset) => {
+    const title = asset.querySelector(".title-container h3.text");
+    const image = asset.querySelector(".vx-grid-figure img.vx-grid-thumb");
+    return [title ? title.textContent.trim() : "", image ? image.src : ""];
+});
+"""
+
+# Resolves with the text of the newest answer once it stopped streaming.
+# Arguments: the number of answers before the prompt and the quiet period in ms.
+_RESPONSE_SCRIPT = f"""
+const [before, quiet] = arguments;
+const done = arguments[arguments.length - 1];
+const answer = () => {{
+    const answers = document.querySelectorAll("{ASSISTANT_TURN_SELECTOR}");
+    if (answers.length <= before) return "";
+    const markdown = answers[answers.length - 1].querySelector(".markdown");
+    return markdown ? markdown.innerText.trim() : "";
+}};
+let timer = null;
+const observer = new MutationObserver(() => check());
+const check = () => {{
+    clearTimeout(timer);
+    if (document.querySelector("{STOP_BUTTON_SELECTOR}") || !answer()) return;
+    timer = setTimeout(() => {{
+        const text = answer();
+        if (text && !document.querySelector("{STOP_BUTTON_SELECTOR}")) {{
+            observer.disconnect();
+            done(text);
+        }}
+    }}, quiet);
+}};
+observer.observe(document.body, {{
+    childList: true, subtree: true, characterData: true, attributes: true
+}});
+check();
+"""
+
+# Resolves once the generated image has a http(s) source and is fully loaded
+_IMAGE_READY_SCRIPT = f"""
+const image = document.querySelector("{IMAGE_CONTAINER_SELECTOR} img");
+return Boolean(
+    image && image.src.startsWith("http") && image.complete && image.naturalWidth > 0
+    && !document.querySelector("{STOP_BUTTON_SELECTOR}")
+);
+"""
+
+
+@dataclass
+class ReadinessTimeouts:
+    """The maximum time in seconds to wait for ChatGPT to become ready.
+
+    :ivar upload: The ceiling for the file input to become enabled.
+    :vartype upload: float
+    :ivar response: The ceiling for a text response to finish streaming.
+    :vartype response: float
+    :ivar image: The ceiling for the generated image to be loaded.
+    :vartype image: float
+    """
+
+    upload: float = 30
+    response: float = 120
+    image: float = 300
+
+
+@dataclass
+class DesignJob:
+    """A design passing through the stages of the generation pipeline.
+
+    :ivar workspace: The workspace for the intermediate files of the design.
+    :vartype workspace: Workspace
+    :ivar source_path: The path of the image scraped from Vexels.
+    :vartype source_path: str | None
+    :ivar image_url: The URL of the image generated by ChatGPT.
+    :vartype image_url: str | None
+    :ivar title: The title of the design.
+    :vartype title: str
+    :ivar description: The description of the design.
+    :vartype description: str
+    :ivar tags: The comma-separated tags of the design.
+    :vartype tags: str
+    :ivar image: The upscaled design.
+    :vartype image: PIL.Image.Image | None
+    :ivar image_hash: The perceptual hash of the generated image.
+    :vartype image_hash: int | None
+    :ivar image_path: The downloaded generated image, kept in the journal.
+    :vartype image_path: str | None
+    :ivar upscaled_path: The upscaled image, kept in the journal.
+    :vartype upscaled_path: str | None
+    :ivar journal: The journal the stages of the design are recorded in.
+    :vartype journal: DesignJournal | None
+    :ivar checkpoint: The ID of the design in the journal.
+    :vartype checkpoint: str | None
+    """
+
+    workspace: Workspace
+    source_path: str | None = None
+    image_url: str | None = None
+    title: str = ""
+    description: str = ""
+    tags: str = ""
+    image: Image.Image | None = None
+    image_hash: int | None = None
+    image_path: str | None = None
+    upscaled_path: str | None = None
+    journal: DesignJournal | None = None
+    checkpoint: str | None = None
+
+    @classmethod
+    def resume(
+        cls,
+        workspace: Workspace,
+        journal: DesignJournal,
+        checkpoint: Checkpoint,
+    ) -> DesignJob:
+        """Create a design from its checkpoint in the journal.
+
+        :param workspace: The workspace for the intermediate files of the design.
+        :type workspace: Workspace
+        :param journal: The journal of the design.
+        :type journal: DesignJournal
+        :param checkpoint: The recorded state of the design.
+        :type checkpoint: Checkpoint
+        :return: The design, whose completed stages are skipped.
+        :rtype: DesignJob
+        """
+        return cls(
+            workspace,
+            source_path=checkpoint.source_path,
+            image_url=checkpoint.image_url,
+            title=checkpoint.title or "",
+            description=checkpoint.description or "",
+            tags=checkpoint.tags or "",
+            image_hash=int(checkpoint.image_hash, 16) if checkpoint.image_hash else None,
+            image_path=checkpoint.image_path,
+            upscaled_path=checkpoint.upscaled_path,
+            journal=journal,
+            checkpoint=checkpoint.id,
+        )
+
+    @property
+    def design_name(self) -> str:
+        """The name of the design directory, derived from the title."""
+        sanitized_title = sub(r"\W", "_", self.title)[:10]
+        title_hash = sha256(self.title.encode()).hexdigest()[:8]
+        return f"{sanitized_title}_{title_hash}"
+
+    def keep(self, name: str) -> Path | None:
+        """Returns the path of a file of the design kept in the journal.
+
+        :param name: The name of the file.
+        :type name: str
+        :return: The path or None if the design is not journaled.
+        :rtype: pathlib.Path | None
+        """
+        if self.journal is None or self.checkpoint is None:
+            return None
+        return self.journal.design_directory(self.checkpoint) / name
+
+    def record(self, stage: str, **values: str | None) -> None:
+        """Records the completion of a stage in the journal, if any."""
+        if self.journal is not None and self.checkpoint is not None:
+            self.journal.record(self.checkpoint, stage, **values)
+
+    def finish(self, stage: str = "done") -> None:
+        """Marks the design as complete in the journal, if any."""
+        if self.journal is not None and self.checkpoint is not None:
+            self.journal.finish(self.checkpoint, stage)
+
+    def close(self) -> None:
+        """Removes the intermediate files of the design.
+
+        An incomplete design is released in the journal, so it is resumed later.
+        """
+        self.workspace.close()
+        if self.journal is not None and self.checkpoint is not None:
+            self.journal.release(self.checkpoint)
+
+
+def _wait_until_ready(
+    driver: uc.Chrome,
+    condition: Callable[[uc.Chrome], Any],
+    timeout: float,
+    fixed_wait: float,
+    description: str,
+) -> float:
+    """Wait until a readiness condition holds instead of sleeping for a fixed time.
+
+    Continues without raising if the condition does not hold within the timeout,
+    so the following step can handle the error as before.
+
+    :param driver: The Selenium WebDriver instance.
+    :type driver: uc.Chrome
+    :param condition: The condition to wait for, as used by ``WebDriverWait``.
+    :type condition: Callable[[uc.Chrome], Any]
+    :param timeout: The maximum time to wait in seconds.
+    :type timeout: float
+    :param fixed_wait: The fixed time in seconds that was slept before.
+    :type fixed_wait: float
+    :param description: The description of the condition used for logging.
+    :type description: str
+    :return: The time saved compared to the fixed wait in seconds.
+    :rtype: float
+    """
+    start = perf_counter()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.25).until(condition)
+    except TimeoutException:
+        logger.warning("%s not detected within %.0fs.", description, timeout)
+    waited = perf_counter() - start
+    logger.debug("%s after %.1fs (fixed wait: %.0fs).", description, waited, fixed_wait)
+    return fixed_wait - waited
+
+
+def _file_input_enabled(driver: uc.Chrome) -> bool:
+    """Check whether the file input of ChatGPT accepts uploads.
+
+    :param driver: The Selenium WebDriver instance.
+    :type driver: uc.Chrome
+    :return: True if the file input is present and enabled.
+    :rtype: bool
+    """
+    file_input = driver.find_element(By.XPATH, "//input[@type='file']")
+    return file_input.is_enabled() and file_input.get_attribute("disabled") is None
+
+
+class ResponseTracker:
+    """Waits for the next ChatGPT answer to finish streaming and reads it.
+
+    The tracker counts the answers before a prompt is sent and then waits in
+    a single asynchronous script for a new answer. A MutationObserver
+    re-checks the answer on every change of the page, and the answer is
+    returned once the stop button disappeared and the text did not change for
+    :attr:`quiet_period` seconds, so no answer is read while it is streaming.
+
+    :param driver: The Selenium WebDriver instance.
+    :type driver: uc.Chrome
+    :param quiet_period: The time in seconds the answer must not change.
+        Defaults to 1.
+    :type quiet_period: float
+    """
+
+    def __init__(self, driver: uc.Chrome, quiet_period: float = 1) -> None:
+        self.driver = driver
+        self.quiet_period = quiet_period
+        self.answers = 0
+
+    def mark(self) -> None:
+        """Counts the answers on the page, call it before sending a prompt."""
+        self.answers = len(self.driver.find_elements(By.CSS_SELECTOR, ASSISTANT_TURN_SELECTOR))
+
+    def wait(
+        self,
+        timeout: float,
+        fixed_wait: float,
+        description: str,
+        required: bool = True,
+    ) -> tuple[str, float]:
+        """Waits for the answer to the prompt sent after :meth:`mark`.
+
+        :param timeout: The maximum time in seconds to wait.
+        :type timeout: float
+        :param fixed_wait: The fixed time in seconds that was slept before.
+        :type fixed_wait: float
+        :param description: The description of the answer used for logging.
+        :type description: str
+        :param required: Whether a missing answer aborts the design. Defaults to True.
+        :type required: bool
+        :return: The text of the answer, empty if it is not required and
+            missing, and the time saved compared to the fixed wait.
+        :rtype: tuple[str, float]
+        :raises AbortScriptError: If a required answer is not complete within the timeout.
+        """
+        start = perf_counter()
+        self.driver.set_script_timeout(timeout)
+        try:
+            text = self.driver.execute_async_script(
+                _RESPONSE_SCRIPT,
+                self.answers,
+                int(self.quiet_period * 1000),
+            )
+        except (TimeoutException, JavascriptException) as err:
+            if required:
+                raise AbortScriptError(
+                    f"{description} not received within {timeout:.0f}s.",
+                ) from err
+            logger.warning("%s not detected within %.0fs.", description, timeout)
+            text = ""
+        waited = perf_counter() - start
+        logger.debug("%s after %.1fs (fixed wait: %.0fs).", description, waited, fixed_wait)
+        return text if isinstance(text, str) else "", fixed_wait - waited
+
 
 # The login logic is based on code from the project
 # "ChatGPT-unofficial-api-selenium" by Priyanshu-hawk
@@ -52,18 +386,25 @@ logger = logging.getLogger(__name__)
 # https://github.com/Priyanshu-hawk/ChatGPT-unofficial-api-selenium/
 # tree/5a258b9db844ae13da633591568790460d82524b
 # MIT License (c) 2022 Nat Friedman
-def _start_chat_gpt() -> uc.Chrome:
+def _start_chat_gpt(
+    worker: GenerationWorker | None = None,
+    profile: str = CHATGPT_PROFILE,
+) -> uc.Chrome:
     """Start a ChatGPT session by logging in.
 
+    :param worker: The generation worker whose Chrome profile copy and
+        debugging port are used. Defaults to None (the shared profile).
+    :type worker: GenerationWorker | None
+    :param profile: The Chrome profile logged in to the ChatGPT account.
+        Defaults to "ChatGPT".
+    :type profile: str
     :return: The uc.Chrome instance.
     :rtype: uc.Chrome
     """
-    driver = start_chrome("ChatGPT", None)
+    driver = start_chrome(profile, None, **_chrome_arguments(worker))
     active_drivers.append(driver)
 
-    driver.get(
-        "https://chatgpt.com/?model=gpt-4o",
-    )
+    driver.get(CHATGPT_URL)
     logger.debug("Waiting for login page to load.")
 
     if _is_element_present(
@@ -77,6 +418,43 @@ def _start_chat_gpt() -> uc.Chrome:
     return driver
 
 
+def _chrome_arguments(worker: GenerationWorker | None) -> dict[str, Any]:
+    """Get the arguments of :func:`~genai_pod.utils.start_chrome` for a worker.
+
+    :param worker: The generation worker or None.
+    :type worker: GenerationWorker | None
+    :return: The user data directory and debugging port of the worker, if any.
+    :rtype: dict[str, Any]
+    """
+    if worker is None:
+        return {}
+    return {"user_data_dir": worker.user_data_dir, "debugging_port": worker.debugging_port}
+
+
+def _publish_design(design_directory: Path, output_directory: Path) -> None:
+    """Move a complete design from a staging directory to the output directory.
+
+    :param design_directory: The directory of the design in the staging directory.
+    :type design_directory: Path
+    :param output_directory: The output directory.
+    :type output_directory: Path
+    """
+    from shutil import move
+
+    target = output_directory / design_directory.name
+    if target.exists():
+        logger.warning(
+            "Design %s already exists in %s, keeping it in %s.",
+            design_directory.name,
+            output_directory,
+            design_directory.parent,
+        )
+        return
+    output_directory.mkdir(parents=True, exist_ok=True)
+    move(str(design_directory), target)
+    logger.info("Published design %s.", target)
+
+
 def _is_element_present(driver: uc.Chrome, xpath: str) -> bool:
     """Check if an element is present on the page.
 
@@ -113,17 +491,18 @@ def _wait_for_element(driver: uc.Chrome, xpath: str, timeout: int = 4) -> None:
         logger.error("Element '%s' is not present within the timeout period.", xpath)
 
 
-def _get_image_src(driver: uc.Chrome) -> str:
+def _get_image_src(driver: uc.Chrome, timeout: float = 300) -> tuple[str, float]:
     """Get the source URL of the image element with specific characteristics on the page.
 
     :param driver: The Selenium WebDriver instance.
     :type driver: uc.Chrome
-    :return: The image source URL.
-    :rtype: str
+    :param timeout: The maximum time in seconds to wait for the generated image
+        to be loaded after the generation started. Defaults to 300.
+    :type timeout: float
+    :return: The image source URL and the time saved compared to the fixed wait.
+    :rtype: tuple[str, float]
     :raises AbortScriptError: If no valid image source is found.
     """
-    from selenium.webdriver.remote.webelement import WebElement
-
     WebDriverWait(driver, 60).until(
         ec.presence_of_element_located(
             (By.XPATH, "//button[contains(., 'Bilderstellung wird gestartet')]")
@@ -135,97 +514,22 @@ def _get_image_src(driver: uc.Chrome) -> str:
             (By.XPATH, "//button[contains(., 'Bilderstellung wird gestartet')]")
         )
     )
-    sleep(120)
-
-    image_div: WebElement = WebDriverWait(driver, 150).until(
-        lambda d: d.find_element(By.CSS_SELECTOR, "div.absolute.left-0.right-0.top-0")
+    saved = _wait_until_ready(
+        driver,
+        lambda d: d.execute_script(_IMAGE_READY_SCRIPT),
+        timeout,
+        120,
+        "Generated image loaded",
     )
-    image_element = image_div.find_element(By.TAG_NAME, "img")
-    image_src = image_element.get_attribute("src")
+
+    image_elements = driver.find_elements(By.CSS_SELECTOR, f"{IMAGE_CONTAINER_SELECTOR} img")
+    image_src = image_elements[0].get_attribute("src") if image_elements else None
     if isinstance(image_src, str) and image_src.startswith("http"):
-        return image_src
+        return image_src, saved
 
     raise AbortScriptError("No valid image source found.")
 
 
-def _get_text_from_element(
-    driver: uc.Chrome,
-    class_index: int,
-    retries: int = 10,
-) -> str:
-    """Attempts to retrieve the generated text from ChatGPT's
-    response within a specified DOM structure.
-
-    :param driver: The Selenium WebDriver instance.
-    :type driver: uc.Chrome
-    :param class_index: The 0-based index of the target element in the DOM.
-    :type class_index: int
-    :param retries: The maximum number of retry attempts. Defaults to 10.
-    :type retries: int, optional
-    :return: The generated text from ChatGPT.
-    :rtype: str
-    :raises AbortScriptError: If the text cannot be retrieved after
-                               all retries or a bad gateway error occurs.
-    """
-    class_xpath = (
-        f"(//div[contains(@class, 'group/conversation-turn')])[{class_index + 1}]"
-    )
-
-    for attempt in range(retries):
-        try:
-            _wait_for_element(driver, class_xpath, 60)
-
-            script = f"""
-                var container = document.evaluate(
-                    "{class_xpath}", document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
-                ).singleNodeValue;
-                if (container) {{
-                    var markdown_div = container.querySelector('.markdown');
-                    if (markdown_div) {{
-                        var p_elements = markdown_div.querySelectorAll('p');
-                        var full_text = '';
-                        p_elements.forEach(function(p) {{
-                            full_text += p.innerText + '\\n';
-                        }});
-                        return full_text.trim();
-                    }} else {{
-                        console.log("Markdown div not found within the container.");
-                    }}
-                }} else {{
-                    console.log("Container not found for the given XPath.");
-                }}
-                return '';  // Fallback if no <p> elements are found
-            """
-            last_p_text = driver.execute_script(script)
-
-            # If text is successfully retrieved, return it
-            if isinstance(last_p_text, str) and last_p_text.strip():
-                return last_p_text.strip()
-
-        except (NoSuchElementException, TimeoutException) as e:
-            logger.warning(
-                "Attempt %d/%d: Failed to find elements, retrying... Exception: %s",
-                attempt + 1,
-                retries,
-                str(e),
-            )
-            if _bad_gateway(driver):
-                logger.error("Bad Gateway encountered. Aborting script.")
-                raise AbortScriptError(
-                    "Bad Gateway encountered during the process.",
-                ) from e
-
-        if attempt < retries - 1:
-            logger.info("Retrying in 5 seconds...")
-            sleep(5)
-        else:
-            logger.error("Failed after %d attempts.", retries)
-            raise AbortScriptError("Failed to find the desired text after all retries.")
-
-    logger.error("Nothing is found after retries.")
-    raise AbortScriptError("Nothing is found after retries.")
-
-
 def _gpt_send_prompt(driver: uc.Chrome) -> None:
     """Send the GPT prompt by clicking the send button.
 
@@ -291,60 +595,119 @@ def _gpt_type_text(driver: uc.Chrome, text: str) -> None:
     textarea.send_keys(text)
 
 
-def _process_image(
-    image_url: str,
+def _upscale_design(
+    job: DesignJob,
+    upscaler: Upscaler,
+    quality_gate: QualityGate | None = None,
+    design_index: HashIndex | None = None,
+) -> DesignJob | None:
+    """Download the image generated by ChatGPT, check and upscale it.
+
+    The image is passed between the stages in memory. Near-duplicates of
+    published designs are skipped and designs failing the quality gate are
+    moved to its reject directory, both without being upscaled. The downloaded
+    and the upscaled image are kept in the journal, so a resumed design skips
+    the steps that were completed.
+
+    :param job: The design with the URL of the generated image.
+    :type job: DesignJob
+    :param upscaler: The upscaler backend to use.
+    :type upscaler: Upscaler
+    :param quality_gate: The quality gate checking the image before upscaling.
+        Defaults to None (no checks).
+    :type quality_gate: QualityGate | None
+    :param design_index: The index of the published designs. Defaults to None
+        (no duplicate check).
+    :type design_index: HashIndex | None
+    :return: The design with the upscaled image or None if it was rejected.
+    :rtype: DesignJob | None
+    """
+    if job.upscaled_path is not None:
+        logger.info("Resuming the upscaled image of %s.", job.design_name)
+        with Image.open(job.upscaled_path) as image:
+            job.image = image.copy()
+        return job
+
+    if job.image_path is not None:
+        with Path(job.image_path).open("rb") as file:
+            content = file.read()
+    else:
+        if job.image_url is None:
+            raise AbortScriptError("No generated image to upscale.")
+        logger.info("Saving image from GPT...")
+        image_response = get_http_client().get(job.image_url, timeout=60)
+        image_response.raise_for_status()
+        content = image_response.content
+        if (path := job.keep("generated.png")) is not None:
+            path.write_bytes(content)
+            job.image_path = str(path)
+            job.record("downloaded", image_path=job.image_path)
+
+    # No more background removal from external here, because ChatGPT does it
+    with Image.open(BytesIO(content)) as image:
+        # The hash does not depend on the size, so it is computed before upscaling
+        job.image_hash = perceptual_hash(image)
+        if design_index is not None and design_index.is_duplicate(
+            job.image_hash,
+            job.design_name,
+        ):
+            job.finish("discarded")
+            return None
+        if quality_gate is not None and not quality_gate.inspect(image, job.design_name):
+            job.finish("discarded")
+            return None
+        logger.info("Upscaling for 2k image...")
+        job.image = upscaler.upscale_image(image, job.workspace)
+    if (path := job.keep("upscaled.png")) is not None:
+        # Fast compression, the file is only kept until the design is written
+        job.image.save(path, compress_level=1)
+        job.upscaled_path = str(path)
+        job.record("upscaled", upscaled_path=job.upscaled_path, image_hash=f"{job.image_hash:016x}")
+    return job
+
+
+def _write_design(
+    job: DesignJob,
     image_dir: str,
-    title: str,
-    tor_binary_path: str | None,
+    publish_directory: str | None = None,
+    design_index: HashIndex | None = None,
 ) -> Path:
-    """Process and save an image from a given URL, remove its background, and then upscale it.
+    """Finish an upscaled design and write it with its metadata.
 
-    :param image_url: The URL of the image to process.
-    :type image_url: str
-    :param image_dir: The directory to save the processed images.
+    :param job: The design with the upscaled image.
+    :type job: DesignJob
+    :param image_dir: The directory to save the design to.
     :type image_dir: str
-    :param title: The title of the image.
-    :type title: str
-    :return: The output directory where images are saved.
+    :param publish_directory: If set, ``image_dir`` is a staging directory and
+        the complete design is moved to this directory. Defaults to None.
+    :type publish_directory: str | None
+    :param design_index: The index of the published designs the design is
+        added to. Defaults to None.
+    :type design_index: HashIndex | None
+    :return: The directory of the design.
     :rtype: pathlib.Path
-    :raises AbortScriptError: If background removal fails.
     """
-    import os
-
-    logger.info("Saving image from GPT...")
-
-    image_response = get(image_url, timeout=60)
-    image_response.raise_for_status()
-    with Image.open(BytesIO(image_response.content)) as image:
-        upscaled_image_path = None
-        try:
-            sanitized_title = sub(r"\W", "_", title)[:10]
-            title_hash = sha256(title.encode()).hexdigest()[:8]
-            output_directory = Path(image_dir) / f"{sanitized_title}_{title_hash}"
-
-            output_directory.mkdir(parents=True, exist_ok=True)
-
-            raw_image_path = output_directory / f"{title}-bg.png"
-            image.save(raw_image_path)
-
-            # No more background removal from external here, because ChatGPT does it
-
-            logger.info("Upscaling for 2k image...")
-            upscaled_image_path = upscale(
-                str(raw_image_path),
-                Path(output_directory),
-                tor_binary_path,
-            )
-
-            if upscaled_image_path:
-                logger.info("Pilling image...")
-                pilling_image(str(upscaled_image_path))
-        except:  # pylint: disable=try-except-raise # noqa: disable=bare-except
-            raise
-        finally:
-            for file_ in (upscaled_image_path, raw_image_path):
-                os.remove(str(file_))
-
+    if job.image is None:
+        raise AbortScriptError("No upscaled image to write.")
+    output_directory = Path(image_dir) / job.design_name
+    output_directory.mkdir(parents=True, exist_ok=True)
+    logger.info("Pilling image...")
+    finished = finish_image(job.image)
+    save_finished_image(finished, output_directory / f"{job.title}-bg_upscaled_pil.png")
+    render_derivatives(finished, output_directory)
+    write_metadata(
+        title=job.title,
+        tags=job.tags,
+        description=job.description,
+        directory=output_directory,
+    )
+    if design_index is not None and job.image_hash is not None:
+        design_index.add(job.image_hash, job.design_name)
+    if publish_directory is not None:
+        _publish_design(output_directory, Path(publish_directory))
+    job.finish()
+    job.close()
+    logger.info("Image generation completed successfully.")
     return output_directory
 
 
@@ -391,7 +754,8 @@ def _handle_usage_limit(driver: uc.Chrome) -> None:
 
     :param driver: The Selenium WebDriver instance.
     :type driver: uc.Chrome
-    :raises AbortScriptError: After waiting for the usage limit to reset.
+    :raises UsageLimitError: With the time the usage limit resets.
+    :raises AbortScriptError: If the reset time could not be parsed.
     """
     error_text = driver.find_element(
         By.CSS_SELECTOR,
@@ -403,10 +767,11 @@ def _handle_usage_limit(driver: uc.Chrome) -> None:
                 error_text.split("after")[1].split()[0],
                 error_text,
             )
-            _wait_until_time(target_time)
         except ValueError as e:
             logger.exception("Error parsing time: %s", e)
             _handle_network_error(driver)
+        else:
+            raise UsageLimitError(target_time)
     else:
         logger.warning("Unexpected usage limit error text.")
         _handle_network_error(driver)
@@ -450,31 +815,6 @@ def _calculate_target_time(time_part: str, error_text: str) -> datetime:
     return target_time
 
 
-def _wait_until_time(target_time: datetime) -> None:
-    """Wait until the specified target time.
-
-    :param target_time: The target time to wait until.
-    :type target_time: datetime
-    :raises AbortScriptError: After the waiting time elapses.
-    """
-    logger.info(
-        "Current Time (Euro Zone): %s",
-        datetime.now(timezone("Europe/Berlin")).strftime("%H:%M:%S"),
-    )
-    logger.info("Waiting until: %s", target_time.strftime("%H:%M:%S"))
-
-    total_wait_seconds = (
-        target_time - datetime.now(timezone("Europe/Berlin"))
-    ).total_seconds()
-    if total_wait_seconds > 0:
-        with tqdm(total=int(total_wait_seconds), desc="Waiting Time", unit="s") as pbar:
-            for _ in range(int(total_wait_seconds)):
-                sleep(1)
-                pbar.update(1)
-
-    raise AbortScriptError("Usage limit reached and waiting time elapsed.")
-
-
 class AbortScriptError(Exception):
     """Custom exception class for aborting the script.
 
@@ -502,130 +842,196 @@ class AbortScriptError(Exception):
         active_drivers = []
 
 
-def _scrape_vexels_image(driver: uc.Chrome) -> str | None:
-    """Scrape an image from vexels.com on a random page and save it temporarily.
+class UsageLimitError(AbortScriptError):
+    """Raised when a ChatGPT account reached its usage limit.
 
-    :param driver: The Selenium WebDriver instance.
-    :type driver: uc.Chrome
-    :return: The path to the temporary image file or None if failed.
-    :rtype: str | None
-    :raises AbortScriptError: If scraping fails.
+    :ivar reset_time: The time the usage limit resets.
+    :vartype reset_time: datetime
+    """
+
+    def __init__(self, reset_time: datetime):
+        super().__init__(f"Usage limit reached until {reset_time:%H:%M}.")
+        self.reset_time = reset_time
+
+
+def _harvest_vexels(worker: GenerationWorker | None = None) -> list[SourceImage]:
+    """Harvest the titles and thumbnails of all assets on a random Vexels niche page.
+
+    :param worker: The generation worker or None.
+    :type worker: GenerationWorker | None
+    :return: The source images found on the page.
+    :rtype: list[SourceImage]
+    :raises AbortScriptError: If the page could not be loaded.
     """
+    page = randbelow(VEXELS_PAGES) + 1
+    logger.info("Starting Chrome and harvesting Vexels page %d.", page)
+    driver = start_chrome("Default", None, **_scraper_chrome_arguments(worker))
+    active_drivers.append(driver)
     try:
         driver.set_page_load_timeout(60)
-        driver.get(f"https://de.vexels.com/nischen/lustig/{randbelow(30) + 1}/")
-        active_drivers.append(driver)
-
+        driver.get(f"https://de.vexels.com/nischen/lustig/{page}/")
         WebDriverWait(driver, 60).until(
             ec.presence_of_all_elements_located((By.CLASS_NAME, "vx-grid-asset")),
         )
+        assets = driver.execute_script(_HARVEST_SCRIPT)
+    except WebDriverException as e:
+        raise AbortScriptError(f"Error harvesting vexels.com: {e}") from e
+    finally:
+        _forget_driver(driver)
 
-        for attempt in range(10):
-            asset = choice(driver.find_elements(By.CLASS_NAME, "vx-grid-asset"))
-
-            try:
-                container = asset.find_element(
-                    By.CSS_SELECTOR,
-                    ".vx-grid-asset-container.d-block.h-100",
-                )
-
-                img_title_element = container.find_element(
-                    By.CSS_SELECTOR,
-                    ".title-container h3.text",
-                )
-                img_title = driver.execute_script(
-                    "return arguments[0].textContent;",
-                    img_title_element,
-                ).strip()
-                logger.info("Found image title: %s", img_title)
-
-                if not img_title:
-                    logger.warning("Image title is empty")
-                    continue
-
-                img_element = container.find_element(
-                    By.CSS_SELECTOR,
-                    ".vx-grid-figure img.vx-grid-thumb",
-                )
-                img_src = img_element.get_attribute("src")
-
-                if not img_src:
-                    logger.warning("No src found for image, retrying...")
-                    continue
-
-                # Saving image
-                response = get(img_src, timeout=10)
-                response.raise_for_status()
-                logger.info("Image downloaded successfully.")
-
-                # saving image in tempfile
-                with NamedTemporaryFile(delete=False, suffix=".png") as temp_file:
-                    Image.open(BytesIO(response.content)).save(temp_file, format="PNG")
-                    return temp_file.name
-
-            except WebDriverException as e:
-                if "disconnected" in str(e):
-                    logger.warning("WebDriver disconnected. Restarting driver...")
-                    driver.quit()
-                    driver = uc.Chrome()
-                    continue
-                logger.warning(
-                    "Error processing asset on attempt %d: %s",
-                    attempt + 1,
-                    str(e),
-                )
-                continue
-
-        logger.error("No suitable image found after filtering.")
-        return None
+    sources = [
+        SourceImage(title=title, url=src)
+        for title, src in assets or []
+        if title and src and src.startswith("http")
+    ]
+    logger.info("Found %d images on Vexels page %d.", len(sources), page)
+    return sources
 
-    except Exception as e:
-        logger.exception("Error in _scrape_vexels_image: %s", str(e))
-        return None
 
-    finally:
-        if driver:
-            driver.quit()
+def _request_metadata_separately(
+    driver: uc.Chrome,
+    job: DesignJob,
+    timeouts: ReadinessTimeouts,
+) -> float:
+    """Ask ChatGPT for the title, description and tags in one turn each.
 
+    :param driver: The Selenium WebDriver instance.
+    :type driver: uc.Chrome
+    :param job: The design the metadata is stored in.
+    :type job: DesignJob
+    :param timeouts: The ceilings of the readiness conditions.
+    :type timeouts: ReadinessTimeouts
+    :return: The time saved compared to the fixed waits.
+    :rtype: float
+    :raises AbortScriptError: If any answer is missing.
+    """
+    tracker = ResponseTracker(driver)
+    tracker.mark()
+    _gpt_type_text(
+        driver,
+        "Provide a concise title for Spreadshirt, for the first image max 40 characters.",
+    )
+    _gpt_send_prompt(driver)
+    title, saved = tracker.wait(timeouts.response, 10, "Title")
+    job.title = clean_string(title)
+
+    tracker.mark()
+    _gpt_type_text(
+        driver,
+        "Provide a concise description for Spreadshirt, min 200,"
+        "max 240 characters, based on the image.",
+    )
+    _gpt_send_prompt(driver)
+    job.description, description_saved = tracker.wait(timeouts.response, 20, "Description")
+    saved += description_saved
 
-def _start_generating(
+    tracker.mark()
+    _gpt_type_text(
+        driver,
+        "Provide concise tags for Spreadshirt, min 20 words and max 25 words,"
+        "separated by commas, based on the image.",
+    )
+    _gpt_send_prompt(driver)
+    job.tags, tags_saved = tracker.wait(timeouts.response, 20, "Tags")
+    saved += tags_saved
+    return saved
+
+
+def _request_metadata_json(
     driver: uc.Chrome,
-    image_dir: str,
-    image_file_path: str,
-    tor_binary_path: str | None,
-) -> None:
-    """Start generating an image using GPT and save it to a specified directory.
+    job: DesignJob,
+    timeouts: ReadinessTimeouts,
+) -> float:
+    """Ask ChatGPT for the title, description and tags as one JSON object.
+
+    The answer is validated against the limits of the shops and repaired
+    locally if needed, so it needs a single conversation turn.
 
     :param driver: The Selenium WebDriver instance.
     :type driver: uc.Chrome
-    :param image_dir: The directory to save the generated image.
-    :type image_dir: str
-    :param image_file_path: The path to the image file to upload.
-    :type image_file_path: str
-    :raises AbortScriptError: If any step in the generation process fails.
+    :param job: The design the metadata is stored in.
+    :type job: DesignJob
+    :param timeouts: The ceilings of the readiness conditions.
+    :type timeouts: ReadinessTimeouts
+    :return: The time saved compared to the fixed waits of the separate turns.
+    :rtype: float
+    :raises AbortScriptError: If the answer contains no valid metadata.
     """
-    import time
+    tracker = ResponseTracker(driver)
+    tracker.mark()
+    _gpt_type_text(driver, METADATA_PROMPT)
+    _gpt_send_prompt(driver)
+    answer, saved = tracker.wait(timeouts.response, 50, "Metadata")
+    try:
+        metadata = parse_metadata(answer)
+    except ValueError as e:
+        raise AbortScriptError(f"No valid metadata found: {e}") from e
+    metadata.title = clean_string(metadata.title)
+    metadata = repair_metadata(metadata)
+    job.title = metadata.title
+    job.description = metadata.description
+    job.tags = metadata.tags_string
+    return saved
+
+
+def _converse(
+    driver: uc.Chrome,
+    job: DesignJob,
+    timeouts: ReadinessTimeouts | None = None,
+    metadata_prompt: str = "separate",
+) -> DesignJob:
+    """Generate an image and its metadata in a ChatGPT conversation.
+
+    Instead of sleeping for fixed times, each step waits until ChatGPT is ready,
+    e.g. until a response finished streaming. The time saved is logged.
 
+    :param driver: The Selenium WebDriver instance.
+    :type driver: uc.Chrome
+    :param job: The design with the path of the image to upload.
+    :type job: DesignJob
+    :param timeouts: The ceilings of the readiness conditions. Defaults to None
+        (the default ceilings).
+    :type timeouts: ReadinessTimeouts | None
+    :param metadata_prompt: "json" to request the title, description and tags
+        as one JSON object, "separate" to request them in one turn each.
+        Defaults to "separate".
+    :type metadata_prompt: str
+    :return: The design with the URL of the generated image, its title,
+        description and tags.
+    :rtype: DesignJob
+    :raises AbortScriptError: If any step in the generation process fails.
+    """
+    timeouts = timeouts or ReadinessTimeouts()
     driver.set_page_load_timeout(30)
-    # time.sleep(10) waits for JavaScript to decide if the GPT model allows file uploads.
-    # Without this wait, the image might be sent too early before uploads are allowed.
-    time.sleep(10)
+    # JavaScript decides if the GPT model allows file uploads. Without this wait,
+    # the image might be sent too early before uploads are allowed.
+    saved = _wait_until_ready(
+        driver,
+        _file_input_enabled,
+        timeouts.upload,
+        10,
+        "File upload enabled",
+    )
 
     # Uploading image
+    if job.source_path is None:
+        raise AbortScriptError("No source image to upload.")
     try:
         WebDriverWait(driver, 60).until(
             ec.presence_of_element_located((By.XPATH, "//input[@type='file']")),
-        ).send_keys(image_file_path)
+        ).send_keys(job.source_path)
     except Exception as e:
         logger.error("Error uploading the image:")
         raise AbortScriptError("Could not upload the image.") from e
+    tracker = ResponseTracker(driver)
+    tracker.mark()
     _gpt_type_text(
         driver,
         "Always follow the following Prompt Guidelines."
         "Analyse the image and Only describe the pod design",
     )
     _gpt_send_prompt(driver)
-    sleep(10)
+    saved += tracker.wait(timeouts.response, 10, "Design description", required=False)[1]
 
     _gpt_type_text(
         driver,
@@ -641,39 +1047,14 @@ def _start_generating(
         "6. improve the original design",
     )
     _gpt_send_prompt(driver)
-    image_url = _get_image_src(driver)
-
-    _gpt_type_text(
-        driver,
-        "Provide a concise title for Spreadshirt, for the first image max 40 characters.",
-    )
-    _gpt_send_prompt(driver)
-    sleep(10)
-    title = clean_string(_get_text_from_element(driver, class_index=5))
-    if title is None:
-        raise AbortScriptError("No title found!")
+    job.image_url, image_saved = _get_image_src(driver, timeouts.image)
+    saved += image_saved
 
-    _gpt_type_text(
-        driver,
-        "Provide a concise description for Spreadshirt, min 200,"
-        "max 240 characters, based on the image.",
-    )
-    _gpt_send_prompt(driver)
-    sleep(20)
-    description = _get_text_from_element(driver, class_index=7)
-    if description is None:
-        raise AbortScriptError("No description found!")
-
-    _gpt_type_text(
-        driver,
-        "Provide concise tags for Spreadshirt, min 20 words and max 25 words,"
-        "separated by commas, based on the image.",
-    )
-    _gpt_send_prompt(driver)
-    sleep(20)
-    tags = _get_text_from_element(driver, class_index=9)
-    if tags is None:
-        raise AbortScriptError("No description found!")
+    if metadata_prompt == "json":
+        saved += _request_metadata_json(driver, job, timeouts)
+    else:
+        saved += _request_metadata_separately(driver, job, timeouts)
+    logger.info("Readiness detection saved %.0fs of fixed waits.", saved)
 
     _gpt_type_text(
         driver,
@@ -689,81 +1070,440 @@ def _start_generating(
     except (TimeoutException, NoSuchElementException) as err:
         raise AbortScriptError("Sending Button not found!") from err
     _handle_errors(driver)
+    return job
+
+
+def _forget_driver(driver: uc.Chrome) -> None:
+    """Quit a driver and remove it from the active drivers.
 
+    :param driver: The Selenium WebDriver instance.
+    :type driver: uc.Chrome
+    """
     driver.quit()
-    result = _process_image(image_url, image_dir, title, tor_binary_path)
-    write_metadata(
-        title=title,
-        tags=tags,
-        description=description,
-        directory=result,
-    )
+    if driver in active_drivers:
+        active_drivers.remove(driver)
 
-    try:
-        Path(image_file_path).unlink()
-    except Exception:
-        logger.error("Error deleting temporary image file")
 
+def _scraper_chrome_arguments(worker: GenerationWorker | None) -> dict[str, Any]:
+    """Get the arguments of :func:`~genai_pod.utils.start_chrome` for scraping.
 
-def generate_image_selenium_gpt(
-    output_directory: str,
-    tor_binary_path: str | None,
-) -> None:
-    """Main function to start the GPT generating process."""
-    import time
+    The scraping browser runs at the same time as the ChatGPT browser, so it
+    needs its own user data directory and a free debugging port.
 
-    max_retries = 5
-    retries = 0
+    :param worker: The generation worker or None.
+    :type worker: GenerationWorker | None
+    :return: The user data directory of the scraping browser.
+    :rtype: dict[str, Any]
+    """
+    base = worker.user_data_dir if worker is not None else Path("chromedata").resolve()
+    return {"user_data_dir": base / SCRAPER_DIRECTORY}
+
+
+def _scrape_stage(
+    _: None,
+    sources: SourceQueue,
+    source_index: HashIndex | None = None,
+    scratch_directory: str | None = None,
+    journal: DesignJournal | None = None,
+) -> DesignJob | None:
+    """Take a prefetched source image into the workspace of a new design.
+
+    Incomplete designs in the journal are resumed before new designs are started.
+
+    :param sources: The queue of prefetched Vexels images.
+    :type sources: SourceQueue
+    :param source_index: The index of the source images used before. Defaults
+        to None (no duplicate check).
+    :type source_index: HashIndex | None
+    :param scratch_directory: The directory for intermediate files. Defaults to None.
+    :type scratch_directory: str | None
+    :param journal: The checkpoint journal of the designs. Defaults to None
+        (designs are not resumed).
+    :type journal: DesignJournal | None
+    :return: The new design or None if the source image was used before.
+    :rtype: DesignJob | None
+    :raises AbortScriptError: If no source image is available.
+    """
+    if journal is not None and (checkpoint := journal.claim()) is not None:
+        logger.info(
+            "Resuming design %s after the %s stage (attempt %d).",
+            checkpoint.id,
+            checkpoint.stage,
+            checkpoint.attempts,
+        )
+        return DesignJob.resume(Workspace(scratch_directory), journal, checkpoint)
+    job = DesignJob(Workspace(scratch_directory))
+    try:
+        taken = sources.take(job.workspace)
+        if taken is None:
+            raise AbortScriptError("Error scraping the image from vexels.com")
+        path, source = taken
+        if source_index is not None:
+            with Image.open(path) as image:
+                source_hash = perceptual_hash(image)
+            if source_index.is_duplicate(source_hash, source.title):
+                job.close()
+                return None
+            source_index.add(source_hash, source.title)
+        job.source_path = str(path)
+        if journal is not None:
+            checkpoint = journal.create(path)
+            job.journal, job.checkpoint = journal, checkpoint.id
+            job.source_path = checkpoint.source_path
+    except BaseException:
+        job.close()
+        raise
+    return job
+
+
+class ChatSession:
+    """A ChatGPT browser that is kept open across designs.
+
+    Every design starts a new conversation in the same logged-in tab instead
+    of launching a new browser. The browser is recycled after an error and
+    after a given number of designs. When the account reaches its usage
+    limit, the browser is switched to the next account of the pool.
+
+    :param worker: The generation worker whose Chrome profile copy and
+        debugging port are used. Defaults to None (the shared profile).
+    :type worker: GenerationWorker | None
+    :param max_designs: The number of designs after which the browser is
+        recycled. Defaults to 1 (a new browser for every design).
+    :type max_designs: int
+    :param accounts: The ChatGPT accounts to rotate between. Defaults to None
+        (the ``ChatGPT`` profile only).
+    :type accounts: AccountPool | None
+    """
 
-    while retries < max_retries:
+    def __init__(
+        self,
+        worker: GenerationWorker | None = None,
+        max_designs: int = 1,
+        accounts: AccountPool | None = None,
+    ) -> None:
+        self.worker = worker
+        self.max_designs = max_designs
+        self.accounts = accounts or AccountPool([CHATGPT_PROFILE])
+        # Set when the pipeline stops, to interrupt waiting for an account
+        self.stop = Event()
+        self.driver: uc.Chrome | None = None
+        self.profile: str | None = None
+        self.designs = 0
+        self.launches = 0
+
+    def _acquire_account(self) -> str:
+        """Wait until an account is not cooling down.
+
+        :return: The name of the Chrome profile of the account.
+        :rtype: str
+        :raises AbortScriptError: If the pipeline stopped while waiting.
+        """
+        while (profile := self.accounts.acquire()) is None:
+            until = self.accounts.next_available()
+            logger.warning("All ChatGPT accounts are cooling down, waiting until %s.", until)
+            remaining = (until - datetime.now(until.tzinfo)).total_seconds() if until else 1
+            if self.stop.wait(min(max(remaining, 1), 60)):
+                raise AbortScriptError("Stopped while waiting for a ChatGPT account.")
+        return profile
+
+    def open_conversation(self) -> uc.Chrome:
+        """Get the browser on a new, empty conversation.
+
+        :return: The Selenium WebDriver instance.
+        :rtype: uc.Chrome
+        :raises AbortScriptError: If the new conversation does not load.
+        """
+        if self.driver is None:
+            self.profile = self._acquire_account()
+            logger.info("Starting ChatGPT session with profile %s.", self.profile)
+            self.driver = _start_chat_gpt(self.worker, self.profile)
+            self.launches += 1
+            self.designs = 0
+            return self.driver
+
+        logger.info(
+            "Starting a new conversation in the ChatGPT session (design %d/%d).",
+            self.designs + 1,
+            self.max_designs,
+        )
         try:
-            logger.info("Starting Chrome and scraping image from Vexels.")
-            driver = start_chrome("Default", None)
-            active_drivers.append(driver)
-            image_file_path = _scrape_vexels_image(driver)
-            if image_file_path is None:
-                raise AbortScriptError("Error scraping the image from vexels.com")
-            if driver:
-                driver.quit()
-                active_drivers.remove(driver)
-
-            logger.info("Starting ChatGPT session and generating image.")
-            chatgpt_driver = _start_chat_gpt()
-            active_drivers.append(chatgpt_driver)
-            _start_generating(
-                chatgpt_driver,
-                output_directory,
-                image_file_path,
-                tor_binary_path,
+            self.driver.get(CHATGPT_URL)
+            WebDriverWait(self.driver, 60).until(
+                ec.element_to_be_clickable((By.ID, "prompt-textarea")),
             )
-            active_drivers.remove(chatgpt_driver)
-
-            logger.info("Image generation completed successfully.")
-            break
-
-        except AbortScriptError as err:
-            logger.error("An error occurred: %s", err)
-            err.close_all_drivers()
-            retries += 1
-            logger.info(
-                "Restarting the process due to an unexpected error... (%d/%d)",
-                retries,
-                max_retries,
-            )
-            time.sleep(5)
-
-        except Exception as err:
-            logger.error("An unexpected error occurred: %s", err)
-            for driver in active_drivers:
-                driver.quit()
-            active_drivers.clear()
-            retries += 1
-            logger.warning(
-                "Restarting the process due to an unexpected error... (%d/%d)",
-                retries,
-                max_retries,
-            )
-            time.sleep(5)
+        except (TimeoutException, WebDriverException) as err:
+            self.recycle()
+            raise AbortScriptError("Could not start a new conversation.") from err
+        return self.driver
+
+    def finish_conversation(self) -> None:
+        """Count a completed design and recycle the browser if it is used up."""
+        self.designs += 1
+        if self.designs >= self.max_designs:
+            self.recycle()
+
+    def limit_reached(self, reset_time: datetime) -> None:
+        """Cool down the current account and close its browser.
+
+        :param reset_time: The time the usage limit of the account resets.
+        :type reset_time: datetime
+        """
+        if self.profile is not None:
+            self.accounts.cool_down(self.profile, reset_time)
+        self.recycle()
+
+    def recycle(self) -> None:
+        """Close the browser, the next conversation launches a new one."""
+        if self.driver is not None:
+            _forget_driver(self.driver)
+            self.driver = None
+
+
+def _generate_stage(
+    job: DesignJob,
+    session: ChatSession,
+    timeouts: ReadinessTimeouts | None = None,
+    metadata_prompt: str = "separate",
+) -> DesignJob:
+    """Generate the image and metadata of a design with ChatGPT.
+
+    The conversation is finished before the design is upscaled, so the next
+    conversation starts while the design is being upscaled. If the account
+    reaches its usage limit, the design is started over with the next account.
+
+    :param job: The design with the scraped source image.
+    :type job: DesignJob
+    :param session: The ChatGPT session.
+    :type session: ChatSession
+    :param timeouts: The ceilings of the readiness conditions. Defaults to None.
+    :type timeouts: ReadinessTimeouts | None
+    :param metadata_prompt: How the metadata is requested, see :func:`_converse`.
+    :type metadata_prompt: str
+    :return: The design with the URL of the generated image and its metadata.
+    :rtype: DesignJob
+    """
+    if job.image_url is not None:
+        # Resumed from the journal after the image was generated
+        return job
+    while True:
+        driver = session.open_conversation()
+        try:
+            _converse(driver, job, timeouts, metadata_prompt)
+        except UsageLimitError as err:
+            # Start the design over with the next account
+            session.limit_reached(err.reset_time)
+            continue
+        except BaseException:
+            session.recycle()
+            raise
+        session.finish_conversation()
+        job.record(
+            "generated",
+            image_url=job.image_url,
+            title=job.title,
+            description=job.description,
+            tags=job.tags,
+        )
+        return job
 
-    else:
-        logger.error("Max retries reached. Exiting the process.")
+
+def generate_image_selenium_gpt(
+    output_directory: str,
+    tor_binary_path: str | None,
+    upscaler: str = "bigjpg",
+    driver_pool_size: int = 2,
+    driver_max_jobs: int = 10,
+    upscaler_limits: str | None = None,
+    upload_timeout: float = 30,
+    response_timeout: float = 120,
+    image_timeout: float = 300,
+    scratch_directory: str | None = None,
+    quality_thresholds: str | None = None,
+    reject_directory: str | None = None,
+    queue_size: int = 2,
+    session_designs: int = 1,
+    source_directory: str | None = None,
+    hash_index: str | None = None,
+    metadata_prompt: str = "separate",
+    chatgpt_profiles: Sequence[str] = (CHATGPT_PROFILE,),
+    checkpoint_journal: str | None = None,
+    designs: int | None = None,
+    worker: GenerationWorker | None = None,
+) -> PipelineStats:
+    """Main function to start the GPT generating process.
+
+    The designs pass through the stages scrape, generate (the ChatGPT
+    conversation), upscale and write, which are connected by bounded queues
+    and run in their own threads. So the next design is generated while the
+    previous one is being upscaled. The depths of the queues are logged
+    periodically. The results of the stages are recorded in a checkpoint
+    journal, which is closed on Ctrl+C or SIGTERM (see
+    :func:`~genai_pod.utilitys.journal.exit_on_sigterm`).
+
+    :param output_directory: The directory to save the images and metadata to.
+    :type output_directory: str
+    :param tor_binary_path: The path to the Tor binary used by the bigjpg upscaler.
+    :type tor_binary_path: str | None
+    :param upscaler: The name of the upscaler backend. Defaults to "bigjpg".
+    :type upscaler: str
+    :param driver_pool_size: The number of warm Chrome instances of the bigjpg
+        upscaler. Defaults to 2.
+    :type driver_pool_size: int
+    :param driver_max_jobs: The number of images after which a Chrome instance of
+        the bigjpg upscaler is recycled. Defaults to 10.
+    :type driver_max_jobs: int
+    :param upscaler_limits: The path to a JSON file with the input limits of the
+        upscaler backends. Defaults to None (the bundled limits).
+    :type upscaler_limits: str | None
+    :param upload_timeout: The maximum time in seconds to wait for the file
+        upload of ChatGPT to become enabled. Defaults to 30.
+    :type upload_timeout: float
+    :param response_timeout: The maximum time in seconds to wait for a text
+        response of ChatGPT. Defaults to 120.
+    :type response_timeout: float
+    :param image_timeout: The maximum time in seconds to wait for the generated
+        image after its generation started. Defaults to 300.
+    :type image_timeout: float
+    :param scratch_directory: The directory for intermediate files, e.g. a tmpfs
+        mount. Defaults to None (the system's temporary directory).
+    :type scratch_directory: str | None
+    :param quality_thresholds: The path to a JSON file with the thresholds of the
+        quality gate. Defaults to None (the default thresholds).
+    :type quality_thresholds: str | None
+    :param reject_directory: The directory designs failing the quality gate are
+        saved to. Defaults to None (``<output_directory>_rejected``).
+    :type reject_directory: str | None
+    :param queue_size: The number of designs waiting in front of each stage.
+        Defaults to 2.
+    :type queue_size: int
+    :param session_designs: The number of designs generated in the same ChatGPT
+        browser, each in a new conversation. The browser is recycled earlier
+        after an error. Defaults to 1 (a new browser for every design).
+    :type session_designs: int
+    :param source_directory: The directory of the queue of prefetched Vexels
+        images, which may be shared by several workers. Defaults to None
+        (``<output_directory>_sources``).
+    :type source_directory: str | None
+    :param hash_index: The directory of the perceptual-hash indexes of the
+        used source images and the published designs, which are used to skip
+        near-duplicates. Defaults to None (``<output_directory>_index``).
+    :type hash_index: str | None
+    :param metadata_prompt: "json" to request the title, description and tags
+        as one JSON object that is validated against the shop limits, which
+        saves two conversation turns per design. Defaults to "separate" (one
+        turn each).
+    :type metadata_prompt: str
+    :param chatgpt_profiles: The Chrome profiles logged in to the ChatGPT
+        accounts to rotate between. An account that reached its usage limit
+        cools down until the limit resets. Defaults to ``("ChatGPT",)``.
+    :type chatgpt_profiles: Sequence[str]
+    :param checkpoint_journal: The directory of the journal recording the
+        results of the stages of each design. Designs that did not complete,
+        e.g. after a crash, are resumed at the first incomplete stage. Defaults
+        to None (``<output_directory>_journal``).
+    :type checkpoint_journal: str | None
+    :param designs: The number of designs after which the process stops.
+        Defaults to None (run until a stage failed 5 times in a row).
+    :type designs: int | None
+    :param worker: The generation worker running this process, see
+        :mod:`genai_pod.generators.gpt_workers`. Designs are generated in its
+        staging directory and moved to ``output_directory`` once complete.
+        Defaults to None (generate directly in ``output_directory``).
+    :type worker: GenerationWorker | None
+    :return: The final counters of the stages.
+    :rtype: PipelineStats
+    """
+    upscaler_options = (
+        {
+            "tor_binary_path": tor_binary_path,
+            "driver_pool_size": driver_pool_size,
+            "driver_max_jobs": driver_max_jobs,
+            "limits": (
+                load_limits(upscaler_limits).get(upscaler)
+                if upscaler_limits is not None
+                else None
+            ),
+        }
+        if upscaler == "bigjpg"
+        else {}
+    )
+    upscaler_backend = create_upscaler(upscaler, **upscaler_options)
+    quality_gate = QualityGate(
+        Path(reject_directory or f"{Path(output_directory)}_rejected"),
+        (
+            load_thresholds(quality_thresholds)
+            if quality_thresholds is not None
+            else QualityThresholds()
+        ),
+    )
+    timeouts = ReadinessTimeouts(upload_timeout, response_timeout, image_timeout)
+    session = ChatSession(worker, session_designs, AccountPool(list(chatgpt_profiles)))
+    sources = SourceQueue(
+        source_directory or f"{Path(output_directory)}_sources",
+        partial(_harvest_vexels, worker),
+    )
+    index_directory = Path(hash_index or f"{Path(output_directory)}_index")
+    source_index = HashIndex(index_directory / "sources.phash")
+    design_index = HashIndex(index_directory / "designs.phash")
+    journal = DesignJournal(checkpoint_journal or f"{Path(output_directory)}_journal")
+
+    pipeline = Pipeline(
+        [
+            Stage(
+                "scrape",
+                partial(
+                    _scrape_stage,
+                    sources=sources,
+                    source_index=source_index,
+                    scratch_directory=scratch_directory,
+                    journal=journal,
+                ),
+            ),
+            Stage(
+                "generate",
+                partial(
+                    _generate_stage,
+                    session=session,
+                    timeouts=timeouts,
+                    metadata_prompt=metadata_prompt,
+                ),
+            ),
+            Stage(
+                "upscale",
+                partial(
+                    _upscale_design,
+                    upscaler=upscaler_backend,
+                    quality_gate=quality_gate,
+                    design_index=design_index,
+                ),
+            ),
+            Stage(
+                "write",
+                partial(
+                    _write_design,
+                    image_dir=(
+                        str(worker.staging_directory)
+                        if worker is not None
+                        else output_directory
+                    ),
+                    publish_directory=output_directory if worker is not None else None,
+                    design_index=design_index,
+                ),
+            ),
+        ],
+        queue_size=queue_size,
+        cleanup=DesignJob.close,
+    )
+    session.stop = pipeline.stopped
+    try:
+        return pipeline.run(designs)
+    finally:
+        journal.close()
+        sources.stop()
+        # Each call creates a new upscaler, so its warm browsers must not outlive it
+        upscaler_backend.close()
+        session.recycle()
+        logger.info("Launched %d ChatGPT browsers.", session.launches)
+        get_http_client().log_stats()
+        for driver in list(active_drivers):
+            _forget_driver(driver)
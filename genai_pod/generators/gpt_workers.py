@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module runs several independent GPT generation workers in parallel.
+
+Features:
+- Each worker runs in its own process with its own copy of the Chrome
+  profiles, its own remote debugging port and its own staging directory, so
+  the browsers of different workers do not interfere with each other.
+- Designs are generated in the staging directory of the worker and moved to
+  the output directory once they are complete, so the uploaders never see a
+  partially written design.
+- A supervisor restarts workers that crashed.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from multiprocessing import Process
+from multiprocessing.connection import wait
+from pathlib import Path
+from shutil import copy2, copytree, ignore_patterns
+from time import sleep
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEBUGGING_PORT_BASE = 9222
+WORKERS_DIRECTORY = "workers"
+
+# Locks, caches and sessions of a profile that must not be copied
+_PROFILE_IGNORE = ignore_patterns(
+    "Singleton*",
+    "*Cache*",
+    "lockfile",
+    "Current Session",
+    "Current Tabs",
+    "Last Session",
+    "Last Tabs",
+)
+
+
+@dataclass
+class GenerationWorker:
+    """The resources of a single generation worker.
+
+    :ivar index: The 0-based index of the worker.
+    :vartype index: int
+    :ivar user_data_dir: The Chrome user data directory of the worker.
+    :vartype user_data_dir: Path
+    :ivar debugging_port: The remote debugging port of the worker's Chrome.
+    :vartype debugging_port: int
+    :ivar staging_directory: The directory designs are generated in before
+        they are moved to the output directory.
+    :vartype staging_directory: Path
+    """
+
+    index: int
+    user_data_dir: Path
+    debugging_port: int
+    staging_directory: Path
+
+    @classmethod
+    def prepare(
+        cls,
+        index: int,
+        output_directory: str | Path,
+        chromedata: str | Path = "chromedata",
+    ) -> GenerationWorker:
+        """Creates the profile copy and the staging directory of a worker.
+
+        The Chrome profiles are copied only once, so a worker keeps its own
+        session across restarts.
+
+        :param index: The 0-based index of the worker.
+        :type index: int
+        :param output_directory: The output directory of the generated designs.
+        :type output_directory: str | Path
+        :param chromedata: The directory containing the Chrome profiles to copy.
+        :type chromedata: str | Path
+        :return: The worker.
+        :rtype: GenerationWorker
+        """
+        base = Path(chromedata).resolve()
+        user_data_dir = base / WORKERS_DIRECTORY / f"worker-{index}"
+        if not user_data_dir.exists():
+            logger.info("Copying the Chrome profiles for worker %d.", index)
+            user_data_dir.mkdir(parents=True)
+            for entry in base.iterdir() if base.is_dir() else ():
+                if entry.name == WORKERS_DIRECTORY:
+                    continue
+                if entry.is_dir():
+                    copytree(entry, user_data_dir / entry.name, ignore=_PROFILE_IGNORE)
+                else:
+                    copy2(entry, user_data_dir / entry.name)
+
+        staging_directory = Path(f"{Path(output_directory)}_staging") / f"worker-{index}"
+        staging_directory.mkdir(parents=True, exist_ok=True)
+        return cls(
+            index=index,
+            user_data_dir=user_data_dir,
+            debugging_port=DEBUGGING_PORT_BASE + 1 + index,
+            staging_directory=staging_directory,
+        )
+
+
+def _run_worker(index: int, options: dict[str, Any]) -> None:
+    """Generates designs until the process is terminated, executed in a worker process.
+
+    :param index: The 0-based index of the worker.
+    :type index: int
+    :param options: The keyword arguments of
+        :func:`~genai_pod.generators.generate_gpt.generate_image_selenium_gpt`.
+    :type options: dict[str, Any]
+    """
+    from genai_pod.generators.generate_gpt import (
+        AbortScriptError,
+        generate_image_selenium_gpt,
+    )
+    from genai_pod.utilitys.journal import exit_on_sigterm
+
+    # The supervisor terminates the workers, which closes their journals
+    exit_on_sigterm()
+    worker = GenerationWorker.prepare(index, options["output_directory"])
+    logger.info("Worker %d started (debugging port %d).", index, worker.debugging_port)
+    while True:
+        try:
+            generate_image_selenium_gpt(**options, worker=worker)
+        except AbortScriptError:
+            continue
+
+
+def supervise_workers(
+    workers: int,
+    options: dict[str, Any],
+    restart_delay: float = 10,
+    max_restarts: int | None = None,
+    target: Callable[[int, dict[str, Any]], None] = _run_worker,
+) -> None:
+    """Runs generation workers in parallel and restarts crashed workers.
+
+    :param workers: The number of workers.
+    :type workers: int
+    :param options: The keyword arguments of
+        :func:`~genai_pod.generators.generate_gpt.generate_image_selenium_gpt`.
+    :type options: dict[str, Any]
+    :param restart_delay: The time in seconds to wait before restarting a worker.
+    :type restart_delay: float
+    :param max_restarts: The number of restarts after which the supervisor stops.
+        Defaults to None (never stop).
+    :type max_restarts: int | None
+    :param target: The function executed by each worker process.
+    :type target: Callable[[int, dict[str, Any]], None]
+    """
+    processes: dict[int, Process] = {}
+
+    def start(index: int) -> None:
+        process = Process(
+            target=target,
+            args=(index, options),
+            name=f"generation-worker-{index}",
+        )
+        process.start()
+        processes[index] = process
+
+    for index in range(workers):
+        start(index)
+    logger.info("Started %d generation workers.", workers)
+
+    restarts = 0
+    try:
+        while True:
+            ready = wait([process.sentinel for process in processes.values()])
+            exited = [index for index, process in processes.items() if process.sentinel in ready]
+            for index in exited:
+                processes[index].join()
+                logger.warning(
+                    "Worker %d exited with code %s.",
+                    index,
+                    processes[index].exitcode,
+                )
+            if max_restarts is not None and restarts + len(exited) > max_restarts:
+                logger.error("Workers restarted too often, stopping.")
+                return
+            sleep(restart_delay)
+            for index in exited:
+                restarts += 1
+                logger.info("Restarting worker %d (restarts: %d).", index, restarts)
+                start(index)
+    finally:
+        for process in processes.values():
+            if process.is_alive():
+                process.terminate()
+            process.join()
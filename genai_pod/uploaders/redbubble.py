@@ -14,6 +14,8 @@ Features:
 - Validate and read required files (e.g., images, titles, tags, descriptions)
   from local directories.
 - Scale and adjust design sizes for various products based on predefined configurations.
+- Upload the Redbubble derivative of a design and take its size tier from the
+  derivative sidecar, if one was rendered.
 - Log and manage errors, including missing files, upload failures,
   and browser interaction issues.
 
@@ -44,6 +46,7 @@ from selenium.webdriver.common.keys import Keys
 from seleniumbase import SB
 from tqdm import tqdm
 
+from genai_pod.utilitys.derivatives import read_derivative, redbubble_tier
 from genai_pod.utils import chromedata
 
 logger = logging.getLogger(__name__)
@@ -248,30 +251,25 @@ def adjust_product(sb: SB, data_type: str, action: str, final_scaling: int) -> N
         logger.warning("Failed to adjust product '%s': %s", data_type, e)
 
 
-def _adjust_and_publish(sb: SB, image_path: str) -> None:
+def _adjust_and_publish(sb: SB, image_path: str, tier: str | None = None) -> None:
     """Adjust product settings based on image size and publish the design.
 
     :param sb: The SeleniumBase instance.
     :type sb: SB
     :param image_path: The file path to the uploaded image.
     :type image_path: str
+    :param tier: The size tier of the design from its derivative sidecar. If
+        None, the tier is selected based on the image width.
+    :type tier: str | None
     """
-    # Get image size
-    with Image.open(image_path) as img:
-        width = img.size[0]
-
-    # Select the design size based on image width
-    if width > 7000:
-        _setup_clothes(sb, "8000x8000")
-    elif width > 4000:
-        _setup_clothes(sb, "4096x4096")
-    elif width > 2000:
-        _setup_clothes(sb, "2048x2048")
-    elif width > 1000:
-        _setup_clothes(sb, "1024x1024")
-    else:
+    if tier is None:
+        with Image.open(image_path) as img:
+            tier = redbubble_tier(img.size[0])
+
+    if tier is None:
         logger.error("Design size too small.")
         raise Exception
+    _setup_clothes(sb, tier)
 
     # Wait for the page to be ready
     sb.wait_for_ready_state_complete(timeout=30)
@@ -488,6 +486,7 @@ def _upload_with_selenium(
     tag: str,
     title: str,
     image_path: str,
+    tier: str | None = None,
 ) -> None:
     """Perform the upload process to Redbubble using SeleniumBase.
 
@@ -501,6 +500,8 @@ def _upload_with_selenium(
     :type title: str
     :param image_path: The file path to the image to be uploaded.
     :type image_path: str
+    :param tier: The size tier of the design. Defaults to None (read from the image).
+    :type tier: str | None
     """
     logger.info("Starting upload with image: %s", image_path)
     tags_list = tag.strip().split(",")
@@ -549,7 +550,7 @@ def _upload_with_selenium(
     logger.info("Set description.")
 
     # Proceed with adjusting product settings and publishing
-    _adjust_and_publish(sb, image_path)
+    _adjust_and_publish(sb, image_path, tier)
 
 
 def iterate_and_upload(
@@ -624,10 +625,19 @@ def process_subdir(
     try:
         logger.debug("Starting to process subdir: %s", subdir)
 
-        # Searching for an image file in the subdirectory
-        image_file = next(
-            (file for ext in ["*.png", "*.jpg", "*.jpeg"] for file in subdir.glob(ext)),
-            None,
+        # Using the derivative for Redbubble or searching for an image file
+        derivative = read_derivative(subdir, "redbubble")
+        image_file = (
+            subdir / derivative.file
+            if derivative is not None
+            else next(
+                (
+                    file
+                    for ext in ["*.png", "*.jpg", "*.jpeg"]
+                    for file in subdir.glob(ext)
+                ),
+                None,
+            )
         )
         if image_file:
             logger.debug("Found image file: %s", image_file)
@@ -653,6 +663,7 @@ def process_subdir(
             tag=contents["tags"],
             title=contents["title"],
             image_path=str(image_file),
+            tier=derivative.tier if derivative is not None else None,
         )
 
         logger.info("Successfully uploaded %s. Moving to %s.", subdir, folder)
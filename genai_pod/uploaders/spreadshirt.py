@@ -58,6 +58,7 @@ def upload_spreadshirt(upload_path: str) -> None:
         used_folder_name="used_spreadshirt",
         error_folder_name="error_spreadshirt",
         exclude_folders=["used_redbubble", "error_spreadshirt", "used_spreadshirt"],
+        shop="spreadshirt",
     )
 
     iterate_and_upload(
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module rotates between several ChatGPT accounts.
+
+Features:
+- Each account is a Chrome profile in the ``chromedata`` directory that is
+  logged in to its own ChatGPT account.
+- An account that reached its usage limit cools down until the reset time
+  reported by ChatGPT, and the next available account is used meanwhile.
+- The cooldowns are stored in a JSON file, so they survive restarts and are
+  shared by all generation workers.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+COOLDOWNS_FILE = "account_cooldowns.json"
+
+
+@dataclass
+class AccountPool:
+    """A pool of ChatGPT accounts with persistent cooldowns.
+
+    :ivar profiles: The names of the Chrome profiles, in the order of preference.
+    :vartype profiles: list[str]
+    :ivar state_file: The JSON file the cooldowns are stored in.
+    :vartype state_file: Path
+    """
+
+    profiles: list[str]
+    state_file: Path = field(default_factory=lambda: Path("chromedata").resolve() / COOLDOWNS_FILE)
+
+    def __post_init__(self) -> None:
+        if not self.profiles:
+            raise ValueError("The account pool needs at least one profile.")
+        self.state_file = Path(self.state_file)
+        self._lock = Lock()
+
+    def _load(self) -> dict[str, datetime]:
+        try:
+            with self.state_file.open(encoding="utf-8") as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable account cooldowns %s: %s", self.state_file, e)
+            return {}
+        return {profile: datetime.fromisoformat(until) for profile, until in data.items()}
+
+    def cooldowns(self, now: datetime | None = None) -> dict[str, datetime]:
+        """Returns the accounts that are cooling down.
+
+        :param now: The current time. Defaults to None (now).
+        :type now: datetime | None
+        :return: The end of the cooldown of each cooling account.
+        :rtype: dict[str, datetime]
+        """
+        now = now or datetime.now(UTC)
+        with self._lock:
+            return {p: until for p, until in self._load().items() if until > now}
+
+    def acquire(self, now: datetime | None = None) -> str | None:
+        """Selects the first account that is not cooling down.
+
+        :param now: The current time. Defaults to None (now).
+        :type now: datetime | None
+        :return: The name of the profile or None if all accounts are cooling down.
+        :rtype: str | None
+        """
+        cooling = self.cooldowns(now)
+        return next((p for p in self.profiles if p not in cooling), None)
+
+    def next_available(self, now: datetime | None = None) -> datetime | None:
+        """Returns the time at which the first cooling account becomes available.
+
+        :param now: The current time. Defaults to None (now).
+        :type now: datetime | None
+        :return: The earliest end of a cooldown or None if no account is cooling down.
+        :rtype: datetime | None
+        """
+        cooling = self.cooldowns(now)
+        return min((cooling[p] for p in self.profiles if p in cooling), default=None)
+
+    def cool_down(self, profile: str, until: datetime) -> None:
+        """Marks an account as cooling down and stores the cooldown.
+
+        :param profile: The name of the profile.
+        :type profile: str
+        :param until: The time the usage limit of the account resets.
+        :type until: datetime
+        """
+        with self._lock:
+            state = self._load()
+            state[profile] = until
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            temporary = self.state_file.with_suffix(f".{os.getpid()}.tmp")
+            with temporary.open("w", encoding="utf-8") as file:
+                json.dump({p: u.isoformat() for p, u in state.items()}, file, indent=2)
+            os.replace(temporary, self.state_file)
+        logger.warning("ChatGPT account %s is cooling down until %s.", profile, until)
@@ -23,25 +23,49 @@ from __future__ import annotations
 import logging
 import subprocess
 from base64 import b64decode
-from io import BytesIO
 from pathlib import Path
+from queue import Empty
 from shutil import which
 from time import sleep, time
+from typing import TYPE_CHECKING
 
 from PIL import Image
-from requests import RequestException, exceptions, get
+from requests import RequestException, exceptions
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.common.by import By
 from tqdm import tqdm
 
+from genai_pod.utilitys.http_client import get_http_client
+from genai_pod.utilitys.tor_manager import get_tor_manager
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from genai_pod.utilitys.driver_pool import DriverPool
+    from genai_pod.utilitys.upscale_cache import UpscaleCache
+
 logger = logging.getLogger(__name__)
 
+#: The upscaling settings chosen on bigjpg.com, also part of the cache key.
+BIGJPG_SETTINGS = {"service": "bigjpg", "scale": 2, "noise": 3}
+
+
+class BigjpgWarningError(Exception):
+    """Raised if bigjpg.com shows its warning modal, usually due to the Tor exit node."""
 
-def start_tor(tor_binary_path: str | None) -> subprocess.Popen[bytes]:
+
+def start_tor(
+    tor_binary_path: str | None,
+    tor_arguments: list[str] | None = None,
+) -> subprocess.Popen[bytes]:
     """Starts the Tor service by calling the Tor executable.
 
+    :param tor_binary_path: The path to the Tor binary, or None to use the one in PATH.
+    :type tor_binary_path: str | None
+    :param tor_arguments: Additional command-line arguments for Tor. Defaults to None.
+    :type tor_arguments: list[str] | None
     :return: The process object representing the running Tor service.
     :rtype: subprocess.Popen
     """
@@ -69,45 +93,12 @@ def start_tor(tor_binary_path: str | None) -> subprocess.Popen[bytes]:
         sys.exit(1)
 
     return subprocess.Popen(  # noqa: S603
-        [tor_binary_path],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
+        [tor_binary_path, *(tor_arguments or [])],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
     )
 
 
-def wait_for_tor(timeout: int = 60) -> None:
-    """Test the session with get request with SOCKS5-Proxy on https://check.torproject.org.
-    :param timeout: the time till timeout
-    :type timeout: int
-    """
-    import requests
-
-    logger.info("Waiting till connected...")
-
-    start_time = time()
-    session = requests.Session()
-    session.proxies = {
-        "http": "socks5h://127.0.0.1:9050",
-        "https": "socks5h://127.0.0.1:9050",
-    }
-    while True:
-        try:
-            r = session.get("https://check.torproject.org", timeout=timeout)
-            if r.status_code == 200:
-                logger.info("Tor is now available!")
-                return
-        except requests.exceptions.HTTPError as http_err:
-            logger.exception("HTTP error occurred: %s", http_err)
-        except Exception as e:
-            logger.exception("Error while waiting for Tor: %s", e)
-
-        if time() - start_time > timeout:
-            raise TimeoutError("Tor not connected (Timeout).")
-
-        # Checks every 2 seconds
-        sleep(2)
-
-
 def stop_tor(tor_process: subprocess.Popen[bytes]) -> None:
     """Stop the Tor service by terminating the process.
 
@@ -148,6 +139,124 @@ def setup_driver() -> webdriver.Chrome:
     return driver
 
 
+def reset_driver(driver: webdriver.Chrome) -> None:
+    """Clears the state of a previous job and opens a fresh Bigjpg page.
+
+    Used to warm up pooled drivers, so the next job starts on a loaded page.
+
+    :param driver: The Selenium WebDriver instance.
+    :type driver: webdriver.Chrome
+    """
+    if driver.current_url.startswith("http"):
+        driver.delete_all_cookies()
+        driver.execute_script(  # type: ignore[no-untyped-call]
+            "window.localStorage.clear(); window.sessionStorage.clear();",
+        )
+    navigate_to_bigjpg(driver)
+
+
+def create_driver_pool(size: int = 2, max_jobs: int = 10) -> DriverPool:
+    """Creates a pool of Tor-proxied headless drivers that are already on Bigjpg.
+
+    :param size: The number of drivers kept in the pool. Defaults to 2.
+    :type size: int
+    :param max_jobs: The number of jobs after which a driver is recycled. Defaults to 10.
+    :type max_jobs: int
+    :return: The driver pool, which launches its drivers on first use.
+    :rtype: DriverPool
+    """
+    from genai_pod.utilitys.driver_pool import DriverPool
+
+    return DriverPool(setup_driver, reset_driver, size=size, max_jobs=max_jobs)
+
+
+#: Leading bytes identifying the image formats Bigjpg may return.
+IMAGE_SIGNATURES = {
+    b"\x89PNG\r\n\x1a\n": "PNG",
+    b"\xff\xd8\xff": "JPEG",
+    b"GIF87a": "GIF",
+    b"GIF89a": "GIF",
+}
+
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+#: The maximum time in seconds an upscale attempt waits for a pooled driver.
+DRIVER_ACQUIRE_TIMEOUT = 300
+
+
+def _detect_image_format(header: bytes) -> str | None:
+    """Detects the image format from the leading bytes of a file.
+
+    :param header: The first bytes of the file.
+    :type header: bytes
+    :return: The format name as used by PIL, or None if unknown.
+    :rtype: str | None
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "WEBP"
+    return next(
+        (fmt for signature, fmt in IMAGE_SIGNATURES.items() if header.startswith(signature)),
+        None,
+    )
+
+
+def _stream_download(image_url: str, destination: Path, max_resumes: int = 5) -> None:
+    """Streams a URL to a file, resuming interrupted transfers with Range requests.
+
+    :param image_url: The URL to download.
+    :type image_url: str
+    :param destination: The file to write to.
+    :type destination: Path
+    :param max_resumes: The maximum number of resumed transfers. Defaults to 5.
+    :type max_resumes: int
+    :raises RequestException: If the download fails or cannot be resumed.
+    """
+    destination.unlink(missing_ok=True)
+    for attempt in range(max_resumes + 1):
+        offset = destination.stat().st_size if destination.exists() else 0
+        headers = {"Range": f"bytes={offset}-"} if offset else {}
+        try:
+            with get_http_client().stream(image_url, headers=headers, timeout=20) as response:
+                if offset and response.status_code == 416:
+                    return  # The previous transfer was already complete
+                response.raise_for_status()
+                mode = "ab" if offset and response.status_code == 206 else "wb"
+                with destination.open(mode) as file:
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        file.write(chunk)
+            return
+        except (
+            exceptions.ChunkedEncodingError,
+            exceptions.ConnectionError,
+            exceptions.Timeout,
+        ) as e:
+            if attempt == max_resumes:
+                raise
+            logger.warning(
+                "Download interrupted after %d bytes, resuming: %s",
+                destination.stat().st_size if destination.exists() else 0,
+                e,
+            )
+
+
+def _decode_data_url(image_url: str, destination: Path) -> None:
+    """Decodes the base64 payload of a data URL to a file in chunks.
+
+    :param image_url: The data URL.
+    :type image_url: str
+    :param destination: The file to write to.
+    :type destination: Path
+    :raises ValueError: If the payload is not valid base64.
+    """
+    # Line breaks and other whitespace are valid in data URLs but would shift
+    # the chunk boundaries, so they are removed before chunking
+    payload = "".join(image_url.split(",", 1)[1].split())
+    step = DOWNLOAD_CHUNK_SIZE // 3 * 4  # Multiple of 4 characters decodes independently
+    with destination.open("wb") as file:
+        for start in range(0, len(payload), step):
+            file.write(b64decode(payload[start : start + step], validate=True))
+
+
 def _download_and_process_image(
     image_url: str,
     title: str,
@@ -155,7 +264,8 @@ def _download_and_process_image(
 ) -> Path:
     """Download an image from a URL and save it to the output directory.
 
-    Handles both data URLs and standard URLs.
+    Handles both data URLs and standard URLs. The image is written to disk in
+    chunks and only decoded and re-encoded if it is not already a PNG.
 
     :param image_url: The URL of the image to download.
     :type image_url: str
@@ -167,21 +277,31 @@ def _download_and_process_image(
     :rtype: Path
     :raises Exception: If the image cannot be downloaded or processed.
     """
+    raw_image = Path(output_directory) / f"{title}.png"
+    partial = raw_image.with_name(f"{raw_image.name}.part")
     try:
         if image_url.startswith("data:image"):
-            image_data = b64decode(image_url.split(",", 1)[1])
+            _decode_data_url(image_url, partial)
+        else:
+            _stream_download(image_url, partial)
+
+        with partial.open("rb") as file:
+            image_format = _detect_image_format(file.read(16))
+        if image_format is None:
+            raise ValueError("The downloaded file is not a supported image.")
+        if image_format == "PNG":
+            partial.replace(raw_image)
         else:
-            response = get(image_url, timeout=20)
-            response.raise_for_status()
-            image_data = response.content
-        image = Image.open(BytesIO(image_data))
-        raw_image = Path(output_directory) / f"{title}.png"
-        image.save(raw_image)
+            logger.debug("Transcoding %s to PNG.", image_format)
+            with Image.open(partial) as image:
+                image.save(raw_image)
         logger.info("Image saved successfully to %s", raw_image)
         return raw_image
     except (OSError, RequestException, ValueError) as e:
         logger.exception("Failed to download the image: %s", e)
         raise
+    finally:
+        partial.unlink(missing_ok=True)
 
 
 def check_warning_modal(driver: webdriver.Chrome) -> str:
@@ -243,6 +363,8 @@ def initiate_upscaling(driver: webdriver.Chrome) -> None:
     """
     driver.execute_script(  # type: ignore[no-untyped-call]
         """
+        const scale = arguments[0];
+        const noise = arguments[1];
         const checkStartButtonOrDownload = setInterval(() => {
             const startButton = document.querySelector(
                 'button.btn.btn-sm.btn-primary.big_begin'
@@ -255,8 +377,8 @@ def initiate_upscaling(driver: webdriver.Chrome) -> None:
                     const modal = document.getElementById('modal_big');
                     if (modal && modal.style.display === 'block') {
                         clearInterval(waitForModal);
-                        document.querySelector('input[name="x2"][value="2"]').click();
-                        document.querySelector('input[name="noise"][value="3"]').click();
+                        document.querySelector(`input[name="x2"][value="${scale}"]`).click();
+                        document.querySelector(`input[name="noise"][value="${noise}"]`).click();
                         setTimeout(() => {
                             document.getElementById('big_ok').click();
                         }, 2000);
@@ -265,13 +387,87 @@ def initiate_upscaling(driver: webdriver.Chrome) -> None:
             }
         }, 1000);
     """,
+        BIGJPG_SETTINGS["scale"],
+        BIGJPG_SETTINGS["noise"],
     )
 
 
+#: Installs a MutationObserver that queues progress changes, the warning modal
+#: and the "too big" mask into ``window.__genaiEvents``.
+_PROGRESS_OBSERVER_SCRIPT = """
+if (!window.__genaiEvents) {
+    window.__genaiEvents = [];
+    window.__genaiWaiter = null;
+    const state = {percent: null, warning: false, tooBig: false};
+    const push = (event) => {
+        window.__genaiEvents.push(event);
+        if (window.__genaiWaiter) {
+            window.__genaiWaiter();
+        }
+    };
+    const check = () => {
+        const bar = document.querySelector('.progress-bar-primary');
+        const percent = bar && bar.style.width ? parseInt(bar.style.width, 10) || 0 : 0;
+        if (percent !== state.percent) {
+            state.percent = percent;
+            push({type: 'progress', percent: percent});
+        }
+        const title = document.querySelector('#modal_alert .modal-title');
+        const warning = !!title && title.offsetParent !== null
+            && title.innerText.trim() === 'Warnung';
+        if (warning && !state.warning) {
+            push({type: 'warning'});
+        }
+        state.warning = warning;
+        const tooBig = !!document.querySelector('div.pic_mask.danger[style="display: block;"]');
+        if (tooBig && !state.tooBig) {
+            push({type: 'image_too_big'});
+        }
+        state.tooBig = tooBig;
+    };
+    new MutationObserver(check).observe(document.body, {
+        subtree: true,
+        childList: true,
+        attributes: true,
+        attributeFilter: ['style', 'class'],
+    });
+    check();
+}
+"""
+
+#: Resolves with the queued events as soon as there are any, or with an empty
+#: list after ``arguments[0]`` milliseconds. Resolves with null if the
+#: observer is gone, e.g. because the page was reloaded.
+_WAIT_FOR_EVENTS_SCRIPT = """
+const done = arguments[arguments.length - 1];
+if (!window.__genaiEvents) {
+    done(null);
+    return;
+}
+if (window.__genaiEvents.length) {
+    done(window.__genaiEvents.splice(0));
+    return;
+}
+let timer = null;
+const finish = () => {
+    clearTimeout(timer);
+    window.__genaiWaiter = null;
+    done(window.__genaiEvents.splice(0));
+};
+timer = setTimeout(finish, arguments[0]);
+window.__genaiWaiter = finish;
+"""
+
+#: The maximum time in seconds a single wait for progress events may block.
+PROGRESS_EVENT_TIMEOUT = 5
+
+
 def monitor_progress(driver: webdriver.Chrome) -> str | None:
     """Monitor the progress of the upscaling process.
 
-    Displays a progress bar and checks for any warnings during the process.
+    A MutationObserver in the page pushes progress changes and warnings into a
+    queue. Python waits on that queue with a single asynchronous script call,
+    so completion is noticed immediately without polling every second.
 
     :param driver: The Selenium WebDriver instance.
     :type driver: webdriver.Chrome
@@ -285,6 +481,10 @@ def monitor_progress(driver: webdriver.Chrome) -> str | None:
     """
     zero_start: float | None = None
     below_start: float | None = None
+    percent = 0
+    events: list[dict[str, int | str]] | None
+    driver.set_script_timeout(PROGRESS_EVENT_TIMEOUT + 10)
+    driver.execute_script(_PROGRESS_OBSERVER_SCRIPT)  # type: ignore[no-untyped-call]
     with tqdm(
         total=100,
         desc="Progress",
@@ -292,10 +492,23 @@ def monitor_progress(driver: webdriver.Chrome) -> str | None:
         dynamic_ncols=True,
     ) as pbar:
         while True:
-            width: str = driver.execute_script(  # type: ignore[no-untyped-call]
-                'return document.querySelector(".progress-bar-primary")?.style.width;',
+            events = driver.execute_async_script(  # type: ignore[no-untyped-call]
+                _WAIT_FOR_EVENTS_SCRIPT,
+                PROGRESS_EVENT_TIMEOUT * 1000,
             )
-            percent = int(width.strip("%")) if width else 0
+            if events is None:
+                logger.debug("Progress observer lost, installing it again.")
+                driver.execute_script(_PROGRESS_OBSERVER_SCRIPT)  # type: ignore[no-untyped-call]
+                events = []
+
+            for event in events:
+                if event["type"] == "warning":
+                    logger.warning("Warning modal detected!")
+                    return "warning"
+                if event["type"] == "image_too_big":
+                    logger.error("Image is too big!")
+                    return "image_too_big"
+                percent = int(event["percent"])
             pbar.update(percent - pbar.n)
 
             if percent >= 100:
@@ -312,23 +525,12 @@ def monitor_progress(driver: webdriver.Chrome) -> str | None:
             else:
                 zero_start = None
 
-            if percent < 100:
-                if below_start is None:
-                    below_start = time()
-                elif time() - below_start >= 360:
-                    raise Exception(
-                        "Stuck for 6 minutes under 100%.",
-                    )
-            else:
-                below_start = None
-
-            status = check_warning_modal(driver)
-            if status == "warning":
-                return "warning"
-            if status == "image_too_big":
-                return "image_too_big"
-
-            sleep(1)
+            if below_start is None:
+                below_start = time()
+            elif time() - below_start >= 360:
+                raise Exception(
+                    "Stuck for 6 minutes under 100%.",
+                )
 
 
 def get_download_url(driver: webdriver.Chrome) -> str | None:
@@ -349,13 +551,24 @@ def get_download_url(driver: webdriver.Chrome) -> str | None:
     )
 
 
-def upscale_bigjpg(image_path: str, out_dir: Path) -> str | None:
+def upscale_bigjpg(
+    image_path: str,
+    out_dir: Path,
+    on_warning: Callable[[], None] | None = None,
+    pool: DriverPool | None = None,
+) -> str | None:
     """Upscale an image using Bigjpg through Selenium automation.
 
     :param image_path: string path to the image
     :type image_path: str
     :param out_dir: destination output folder
     :type out_dir: Path
+    :param on_warning: Called before retrying after bigjpg showed its warning
+        modal, e.g. to request a new Tor circuit. Defaults to None.
+    :type on_warning: Callable[[], None] | None
+    :param pool: The pool of warmed-up drivers on Bigjpg. If None, a new driver
+        is launched for every attempt. Defaults to None.
+    :type pool: DriverPool | None
     :return: str | None
     """
     logger.info("*** Start upscaling ***")
@@ -363,9 +576,16 @@ def upscale_bigjpg(image_path: str, out_dir: Path) -> str | None:
     result = None
 
     for retry in range(retry_limit):
-        driver = setup_driver()
+        driver = None
+        failed = True
         try:
-            navigate_to_bigjpg(driver)
+            driver = (
+                pool.acquire(timeout=DRIVER_ACQUIRE_TIMEOUT)
+                if pool is not None
+                else setup_driver()
+            )
+            if pool is None:
+                navigate_to_bigjpg(driver)
             if handle_initial_status(driver):
                 return image_path
 
@@ -390,21 +610,34 @@ def upscale_bigjpg(image_path: str, out_dir: Path) -> str | None:
                             out_dir,
                         ),
                     )
+                    # Only a completed download returns the driver to the pool
+                    failed = False
                     break
                 logger.error("Download URL not found.")
             elif status == "warning":
-                logger.warning("Warning detected during progress, restarting...")
-                raise Exception("Warning detected during progress.")
+                raise BigjpgWarningError("Warning detected during progress.")
             elif status == "image_too_big":
                 logger.error("Image is too big during progress. Aborting upscaling.")
                 return image_path
 
+        except BigjpgWarningError as e:
+            logger.warning("%s Restarting...", e)
+            if on_warning is not None:
+                on_warning()
         except RuntimeError:
             logger.error("UpscaleError encountered")
+        except Empty:
+            logger.error(
+                "No bigjpg driver became available within %ds.",
+                DRIVER_ACQUIRE_TIMEOUT,
+            )
         except Exception:
             logger.error("Unexpected Error while upscaling")
         finally:
-            driver.quit()
+            if pool is not None and driver is not None:
+                pool.release(driver, failed=failed)
+            elif driver is not None:
+                driver.quit()
 
         if retry < retry_limit - 1:
             logger.info("Retrying...")
@@ -429,7 +662,7 @@ def handle_initial_status(driver: webdriver.Chrome) -> bool:
         logger.error("Image is too big. Aborting upscaling.")
         return True
     if status_initial == "warning":
-        raise Exception("Warning detected. Restarting the process.")
+        raise BigjpgWarningError("Warning detected.")
     return False
 
 
@@ -445,7 +678,7 @@ def handle_post_upload_status(driver: webdriver.Chrome) -> bool:
         logger.error("Image is too big after upload. Aborting upscaling.")
         return True
     if status_after_upload == "warning":
-        raise Exception("Warning detected after upload. Restarting the process.")
+        raise BigjpgWarningError("Warning detected after upload.")
     return False
 
 
@@ -469,36 +702,57 @@ def upscale(
     image_path: str,
     output_directory: Path,
     tor_binary_path: str | None,
+    cache: UpscaleCache | None = None,
+    pool: DriverPool | None = None,
 ) -> str | None:
     """Main function to upscale an image using the Bigjpg service.
 
-    Starts the Tor service, handles retries and orchestrates the upscaling process.
+    Uses the Tor service of this process, which is started on first use and
+    kept running, handles retries and orchestrates the upscaling process.
+    If a cache is given, it is consulted before Tor or Chrome are started and
+    successfully upscaled images are stored in it.
 
     :param image_path: The path to the image to upscale.
     :type image_path: str
     :param output_directory: The directory where the upscaled image will be saved.
     :type output_directory: Path
+    :param tor_binary_path: The path to the Tor binary, or None to use the one in PATH.
+    :type tor_binary_path: str | None
+    :param cache: The cache of already upscaled images. Defaults to None.
+    :type cache: UpscaleCache | None
+    :param pool: The pool of warmed-up drivers, started once Tor is running.
+        If None, a new driver is launched for every attempt. Defaults to None.
+    :type pool: DriverPool | None
     :return: The path to the upscaled image or the original image_path if aborted.
     """
-    tor_process = None
-    try:
-        while True:
-            tor_process = start_tor(tor_binary_path)
-            sleep(20)
-            wait_for_tor(timeout=60)
-            result = upscale_bigjpg(str(image_path), output_directory)
-            stop_tor(tor_process)
-            tor_process = None
-
-            if result and result != image_path:
-                return result
-            if result == image_path:
-                logger.error(
-                    "Upscaling aborted due to oversized image or repeated warnings.",
-                )
-                return result
+    cache_key = None
+    if cache is not None:
+        cache_key = cache.key(image_path, BIGJPG_SETTINGS)
+        cached = cache.get(
+            cache_key,
+            Path(output_directory) / f"{Path(image_path).stem}_upscaled.png",
+        )
+        if cached is not None:
+            return str(cached)
+
+    tor = get_tor_manager(tor_binary_path)
+    while True:
+        tor.start()
+        if pool is not None:
+            pool.start()
+        result = upscale_bigjpg(str(image_path), output_directory, tor.new_circuit, pool)
+        if pool is not None:
+            logger.info("Driver pool: %s", pool.stats)
+
+        if result and result != image_path:
+            if cache is not None and cache_key is not None:
+                cache.put(cache_key, Path(result))
+            return result
+        if result == image_path:
+            logger.error(
+                "Upscaling aborted due to oversized image or repeated warnings.",
+            )
+            return result
 
-            logger.info("Restarting the whole process...")
-    finally:
-        if tor_process:
-            stop_tor(tor_process)
+        logger.info("Requesting a new Tor circuit and restarting the whole process...")
+        tor.new_circuit()
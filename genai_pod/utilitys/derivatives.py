@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module renders upload-optimized derivatives of finished designs.
+
+Features:
+- Renders one file per target shop from a single decoded image: Spreadshirt
+  gets the design fitted to its maximum size and Redbubble gets the design
+  fitted to its size tier (see ``resources/scaling_adjustments.json``).
+  Shops sharing the same dimensions share one file.
+- Encodes the derivatives as optimized PNGs concurrently in a thread pool.
+- Records the files, dimensions and the Redbubble tier in a sidecar JSON
+  file, so the uploaders neither search for nor decode the image.
+
+The derivatives are stored in the ``derivatives`` subdirectory of a design,
+so they are not mistaken for the design itself.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+DERIVATIVES_DIRECTORY = "derivatives"
+SIDECAR_FILE = "derivatives.json"
+
+# The maximum edge length of the uploaded design per shop. None means the
+# size is determined by the shop's size tiers.
+SHOP_MAX_SIZES: dict[str, int | None] = {"spreadshirt": 4000, "redbubble": None}
+
+# The Redbubble size tiers, selected by the minimum width of the design
+REDBUBBLE_TIERS = (
+    (7000, "8000x8000"),
+    (4000, "4096x4096"),
+    (2000, "2048x2048"),
+    (1000, "1024x1024"),
+)
+
+
+def redbubble_tier(width: int) -> str | None:
+    """Selects the Redbubble size tier of a design.
+
+    :param width: The width of the design in pixels.
+    :type width: int
+    :return: The tier, e.g. "2048x2048", or None if the design is too small.
+    :rtype: str | None
+    """
+    for min_width, tier in REDBUBBLE_TIERS:
+        if width > min_width:
+            return tier
+    return None
+
+
+@dataclass
+class Derivative:
+    """An upload-optimized file of a design for a shop.
+
+    :ivar file: The path of the file relative to the design directory.
+    :vartype file: str
+    :ivar width: The width in pixels.
+    :vartype width: int
+    :ivar height: The height in pixels.
+    :vartype height: int
+    :ivar size: The file size in bytes.
+    :vartype size: int
+    :ivar tier: The Redbubble size tier, if the derivative is for Redbubble.
+    :vartype tier: str | None
+    """
+
+    file: str
+    width: int
+    height: int
+    size: int
+    tier: str | None = None
+
+
+def _target_size(size: tuple[int, int], max_size: int) -> tuple[int, int]:
+    """Fits a size into a square of ``max_size`` without enlarging it.
+
+    :param size: The width and height.
+    :type size: tuple[int, int]
+    :param max_size: The maximum edge length.
+    :type max_size: int
+    :return: The fitted width and height.
+    :rtype: tuple[int, int]
+    """
+    width, height = size
+    scale = min(1.0, max_size / max(width, height))
+    return max(1, round(width * scale)), max(1, round(height * scale))
+
+
+def _encode(image: Image.Image, size: tuple[int, int], path: Path) -> int:
+    """Resizes an image if needed and saves it as an optimized PNG.
+
+    :param image: The design.
+    :type image: PIL.Image.Image
+    :param size: The size of the derivative.
+    :type size: tuple[int, int]
+    :param path: The path of the derivative.
+    :type path: Path
+    :return: The file size in bytes.
+    :rtype: int
+    """
+    from PIL import Image
+
+    from genai_pod.utils import PILLING_DPI
+
+    resized = image if image.size == size else image.resize(size, Image.Resampling.LANCZOS)
+    resized.save(path, optimize=True, dpi=(PILLING_DPI, PILLING_DPI))
+    return path.stat().st_size
+
+
+def render_derivatives(
+    image: Image.Image,
+    design_directory: Path,
+    workers: int | None = None,
+) -> dict[str, Derivative]:
+    """Renders the derivatives of a design for all shops and writes the sidecar.
+
+    :param image: The finished design.
+    :type image: PIL.Image.Image
+    :param design_directory: The directory of the design.
+    :type design_directory: Path
+    :param workers: The number of threads encoding derivatives concurrently.
+        Defaults to one per derivative.
+    :type workers: int | None
+    :return: The derivative of each shop, shops without a suitable size are omitted.
+    :rtype: dict[str, Derivative]
+    """
+    tiers: dict[str, str | None] = {}
+    sizes: dict[str, tuple[int, int]] = {}
+    for shop, max_size in SHOP_MAX_SIZES.items():
+        if max_size is None:
+            if (tier := redbubble_tier(image.width)) is None:
+                logger.warning("Design is too small for %s, no derivative rendered.", shop)
+                continue
+            tiers[shop] = tier
+            max_size = int(tier.split("x", maxsplit=1)[0])
+        sizes[shop] = _target_size(image.size, max_size)
+
+    directory = Path(design_directory) / DERIVATIVES_DIRECTORY
+    directory.mkdir(parents=True, exist_ok=True)
+    unique_sizes = sorted(set(sizes.values()))
+    paths = {size: directory / f"{size[0]}x{size[1]}.png" for size in unique_sizes}
+    with ThreadPoolExecutor(max_workers=workers or max(1, len(unique_sizes))) as executor:
+        file_sizes = dict(
+            zip(
+                unique_sizes,
+                executor.map(lambda size: _encode(image, size, paths[size]), unique_sizes),
+                strict=True,
+            ),
+        )
+
+    derivatives = {
+        shop: Derivative(
+            file=paths[size].relative_to(design_directory).as_posix(),
+            width=size[0],
+            height=size[1],
+            size=file_sizes[size],
+            tier=tiers.get(shop),
+        )
+        for shop, size in sizes.items()
+    }
+    with (Path(design_directory) / SIDECAR_FILE).open("w", encoding="utf-8") as file:
+        json.dump(
+            {
+                "width": image.width,
+                "height": image.height,
+                "derivatives": {shop: asdict(d) for shop, d in derivatives.items()},
+            },
+            file,
+            indent=2,
+        )
+    logger.info(
+        "Rendered %d derivatives (%s) for %s.",
+        len(unique_sizes),
+        ", ".join(f"{shop}: {d.width}x{d.height}" for shop, d in derivatives.items()),
+        design_directory,
+    )
+    return derivatives
+
+
+def read_derivative(design_directory: Path, shop: str) -> Derivative | None:
+    """Reads the derivative of a shop from the sidecar of a design.
+
+    :param design_directory: The directory of the design.
+    :type design_directory: Path
+    :param shop: The name of the shop, e.g. "spreadshirt".
+    :type shop: str
+    :return: The derivative or None if no sidecar or derivative for the shop exists.
+    :rtype: Derivative | None
+    """
+    sidecar = Path(design_directory) / SIDECAR_FILE
+    if not sidecar.is_file():
+        return None
+    with sidecar.open(encoding="utf-8") as file:
+        entry = json.load(file).get("derivatives", {}).get(shop)
+    if entry is None:
+        return None
+    derivative = Derivative(**entry)
+    if not (Path(design_directory) / derivative.file).is_file():
+        logger.warning("Derivative %s listed in %s is missing.", derivative.file, sidecar)
+        return None
+    return derivative
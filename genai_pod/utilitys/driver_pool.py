@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module provides a pool of pre-launched, warmed-up WebDriver instances.
+
+Features:
+- Launches a fixed number of drivers up front and prepares them (e.g. opens
+  the target page), so a job does not pay for a browser launch and page load.
+- Returns drivers to the pool after a successful job and recycles them after
+  a configurable number of jobs or when a job failed.
+- Replacement drivers are launched and warmed up in the background.
+- Records the time each job waited to acquire a driver.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable
+from dataclasses import dataclass
+from queue import Queue
+from threading import Lock, Thread
+from time import perf_counter, sleep
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DriverPoolStats:
+    """Metrics of a driver pool.
+
+    :ivar launched: The number of drivers launched.
+    :vartype launched: int
+    :ivar recycled: The number of drivers quit because of errors or their job limit.
+    :vartype recycled: int
+    :ivar jobs: The number of drivers acquired.
+    :vartype jobs: int
+    :ivar acquire_time: The total time in seconds jobs waited for a driver.
+    :vartype acquire_time: float
+    :ivar max_acquire_time: The longest time in seconds a job waited for a driver.
+    :vartype max_acquire_time: float
+    """
+
+    launched: int = 0
+    recycled: int = 0
+    jobs: int = 0
+    acquire_time: float = 0
+    max_acquire_time: float = 0
+
+    def record_acquire(self, latency: float) -> None:
+        """Adds the time a job waited for a driver to the running totals."""
+        self.jobs += 1
+        self.acquire_time += latency
+        self.max_acquire_time = max(self.max_acquire_time, latency)
+
+    def __str__(self) -> str:
+        mean = self.acquire_time / self.jobs if self.jobs else 0.0
+        return (
+            f"{self.jobs} jobs, {self.launched} drivers launched, "
+            f"{self.recycled} recycled, acquire latency mean {mean:.2f}s "
+            f"max {self.max_acquire_time:.2f}s"
+        )
+
+
+@dataclass
+class _PooledDriver:
+    driver: Any
+    jobs: int = 0
+
+
+class DriverPool:
+    """A pool of warmed-up WebDriver instances.
+
+    :param factory: Creates a new driver.
+    :type factory: Callable[[], Any]
+    :param warmup: Prepares a driver for the next job, e.g. by navigating to the
+        target page. Called for new drivers and for drivers returned to the pool.
+    :type warmup: Callable[[Any], None]
+    :param size: The number of drivers kept in the pool. Defaults to 2.
+    :type size: int
+    :param max_jobs: The number of jobs after which a driver is recycled. Defaults to 10.
+    :type max_jobs: int
+    :param launch_attempts: The number of attempts to launch a driver before the
+        pool gives up and shrinks. Missing drivers are launched again on the
+        next :meth:`acquire`. Defaults to 3.
+    :type launch_attempts: int
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], Any],
+        warmup: Callable[[Any], None],
+        size: int = 2,
+        max_jobs: int = 10,
+        launch_attempts: int = 3,
+    ) -> None:
+        if size < 1 or max_jobs < 1:
+            raise ValueError("The pool size and the job limit must be positive.")
+        self.factory = factory
+        self.warmup = warmup
+        self.size = size
+        self.max_jobs = max_jobs
+        self.launch_attempts = launch_attempts
+        self.stats = DriverPoolStats()
+        self._idle: Queue[_PooledDriver] = Queue()
+        self._leased: dict[int, _PooledDriver] = {}
+        self._lock = Lock()
+        self._started = False
+        self._closed = False
+        self._missing = 0
+
+    def start(self) -> None:
+        """Launches and warms up the drivers of the pool in the background."""
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for _ in range(self.size):
+            self._replenish()
+
+    def _launch(self) -> None:
+        """Launches a new driver, warms it up and adds it to the pool.
+
+        After :attr:`launch_attempts` failed attempts, the pool shrinks until
+        the next :meth:`acquire`, e.g. while Chrome or the network is down.
+        """
+        for attempt in range(1, self.launch_attempts + 1):
+            if self._closed:
+                return
+            driver = None
+            try:
+                driver = self.factory()
+                with self._lock:
+                    self.stats.launched += 1
+                self.warmup(driver)
+                self._put(_PooledDriver(driver))
+                return
+            except Exception as e:
+                logger.error(
+                    "Failed to launch a pooled driver (attempt %d/%d): %s",
+                    attempt,
+                    self.launch_attempts,
+                    e,
+                )
+                if driver is not None:
+                    self._quit(driver)
+                if attempt < self.launch_attempts:
+                    sleep(5)
+        logger.error("Giving up launching a pooled driver, the pool shrinks.")
+        with self._lock:
+            self._missing += 1
+
+    def _put(self, pooled: _PooledDriver) -> None:
+        if self._closed:
+            self._quit(pooled.driver)
+        else:
+            self._idle.put(pooled)
+
+    def _replenish(self) -> None:
+        if not self._closed:
+            Thread(target=self._launch, daemon=True).start()
+
+    def _rewarm(self, pooled: _PooledDriver) -> None:
+        """Warms up a returned driver and puts it back, recycling it on errors."""
+        try:
+            self.warmup(pooled.driver)
+            self._put(pooled)
+        except Exception as e:
+            logger.warning("Failed to reuse a pooled driver, recycling it: %s", e)
+            self._recycle(pooled)
+
+    def _recycle(self, pooled: _PooledDriver) -> None:
+        self._quit(pooled.driver)
+        with self._lock:
+            self.stats.recycled += 1
+        self._replenish()
+
+    @staticmethod
+    def _quit(driver: Any) -> None:
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.debug("Error while quitting a driver: %s", e)
+
+    def acquire(self, timeout: float | None = None) -> Any:
+        """Takes a warmed-up driver from the pool, waiting if none is idle.
+
+        Drivers the pool gave up launching are launched again first.
+
+        :param timeout: The maximum time in seconds to wait. Defaults to None (forever).
+        :type timeout: float | None
+        :return: The driver.
+        :rtype: Any
+        :raises queue.Empty: If no driver became available within the timeout.
+        """
+        self.start()
+        with self._lock:
+            missing, self._missing = self._missing, 0
+        for _ in range(missing):
+            self._replenish()
+        start = perf_counter()
+        pooled = self._idle.get(timeout=timeout)
+        latency = perf_counter() - start
+        with self._lock:
+            self._leased[id(pooled.driver)] = pooled
+            self.stats.record_acquire(latency)
+        logger.debug("Acquired a pooled driver after %.2fs.", latency)
+        return pooled.driver
+
+    def release(self, driver: Any, failed: bool = False) -> None:
+        """Returns a driver to the pool.
+
+        The driver is recycled if the job failed or it reached its job limit.
+        Otherwise, it is warmed up again in the background.
+
+        :param driver: The driver returned by :meth:`acquire`.
+        :type driver: Any
+        :param failed: Whether the job using the driver failed. Defaults to False.
+        :type failed: bool
+        """
+        with self._lock:
+            pooled = self._leased.pop(id(driver))
+        pooled.jobs += 1
+        if failed or pooled.jobs >= self.max_jobs:
+            logger.debug(
+                "Recycling pooled driver after %d jobs (failed: %s).",
+                pooled.jobs,
+                failed,
+            )
+            Thread(target=self._recycle, args=(pooled,), daemon=True).start()
+        else:
+            Thread(target=self._rewarm, args=(pooled,), daemon=True).start()
+
+    def close(self) -> None:
+        """Quits all idle drivers of the pool and stops replenishing it."""
+        self._closed = True
+        while not self._idle.empty():
+            self._quit(self._idle.get_nowait().driver)
+        logger.info("Driver pool closed: %s", self.stats)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module provides the HTTP client shared by all downloads of the package.
+
+Features:
+- One session with a keep-alive connection pool, so connections are reused
+  across downloads and threads.
+- A bound on the number of concurrent requests of the process.
+- Retries with exponential backoff on connection errors and on transient
+  status codes (429 and 5xx).
+- Counters of the requests, failures, bytes and latency per host, which are
+  logged when the generation stops.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from threading import BoundedSemaphore, Lock
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HostStats:
+    """The counters of the requests to a host.
+
+    :ivar requests: The number of requests.
+    :vartype requests: int
+    :ivar failures: The number of requests that failed after all retries.
+    :vartype failures: int
+    :ivar bytes: The number of bytes received.
+    :vartype bytes: int
+    :ivar latency: The total time in seconds until the response headers arrived.
+    :vartype latency: float
+    """
+
+    requests: int = 0
+    failures: int = 0
+    bytes: int = 0
+    latency: float = 0
+
+    def __str__(self) -> str:
+        mean = self.latency / self.requests if self.requests else 0
+        return (
+            f"{self.requests} requests ({self.failures} failed),"
+            f" {self.bytes / 1e6:.1f} MB, {mean * 1000:.0f} ms latency"
+        )
+
+
+class HttpClient:
+    """Pooled HTTP sessions with bounded concurrency, retries and counters.
+
+    :param max_concurrency: The number of concurrent requests. Defaults to 8.
+    :type max_concurrency: int
+    :param retries: The number of retries of a failed request. Defaults to 3.
+    :type retries: int
+    :param backoff: The backoff factor in seconds; the n-th retry waits
+        ``backoff * 2 ** (n - 1)`` seconds. Defaults to 0.5.
+    :type backoff: float
+    """
+
+    def __init__(self, max_concurrency: int = 8, retries: int = 3, backoff: float = 0.5) -> None:
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self._slots = BoundedSemaphore(max_concurrency)
+        self._lock = Lock()
+        self._session: requests.Session | None = None
+        self._stats: dict[str, HostStats] = {}
+
+    def session(self) -> requests.Session:
+        """Returns the pooled session, creating it on first use.
+
+        :return: The session.
+        :rtype: requests.Session
+        """
+        with self._lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self.max_concurrency,
+                    pool_maxsize=self.max_concurrency,
+                    max_retries=Retry(
+                        total=self.retries,
+                        backoff_factor=self.backoff,
+                        status_forcelist=(429, 500, 502, 503, 504),
+                        allowed_methods=("GET", "HEAD"),
+                        raise_on_status=False,
+                    ),
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._session = session
+            return self._session
+
+    def _count(self, url: str, response: requests.Response | None, received: int) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(urlsplit(url).hostname or "", HostStats())
+            stats.requests += 1
+            if response is None:
+                stats.failures += 1
+                return
+            stats.bytes += received
+            stats.latency += response.elapsed.total_seconds()
+
+    def get(self, url: str, **kwargs: Any) -> requests.Response:
+        """Sends a GET request and reads the response body.
+
+        :param url: The URL.
+        :type url: str
+        :param kwargs: Keyword arguments of :meth:`requests.Session.get`, e.g. ``timeout``.
+        :type kwargs: Any
+        :return: The response.
+        :rtype: requests.Response
+        """
+        with self._slots:
+            try:
+                response = self.session().get(url, **kwargs)
+            except requests.RequestException:
+                self._count(url, None, 0)
+                raise
+        self._count(url, response, len(response.content))
+        return response
+
+    @contextmanager
+    def stream(
+        self,
+        url: str,
+        **kwargs: Any,
+    ) -> Iterator[requests.Response]:
+        """Sends a GET request whose body is streamed within the context.
+
+        :param url: The URL.
+        :type url: str
+        :param kwargs: Keyword arguments of :meth:`requests.Session.get`, e.g. ``headers``.
+        :type kwargs: Any
+        :return: The response, which is closed when the context exits.
+        :rtype: Iterator[requests.Response]
+        """
+        with self._slots:
+            try:
+                response = self.session().get(url, stream=True, **kwargs)
+            except requests.RequestException:
+                self._count(url, None, 0)
+                raise
+            try:
+                yield response
+            finally:
+                # The bytes read from the connection, before any decoding
+                self._count(url, response, response.raw.tell())
+                response.close()
+
+    def stats(self) -> dict[str, HostStats]:
+        """Returns a copy of the counters per host."""
+        with self._lock:
+            return {host: HostStats(**vars(stats)) for host, stats in self._stats.items()}
+
+    def log_stats(self) -> None:
+        """Logs the counters of every host."""
+        for host, stats in sorted(self.stats().items()):
+            logger.info("HTTP %s: %s", host, stats)
+
+
+_client: HttpClient | None = None
+_client_lock = Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Returns the HTTP client of this process, creating it on first use.
+
+    :return: The process-wide HTTP client.
+    :rtype: HttpClient
+    """
+    global _client  # pylint: disable=W0603
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module provides a checkpoint journal for designs in progress.
+
+Features:
+- Records the result of every stage of a design (source image, generated
+  image URL, metadata, downloaded and upscaled image) in a SQLite database,
+  committed immediately, so nothing is lost if the process is killed.
+- The files of a design are kept in its own journal directory until the
+  design is complete, independently of the scratch workspace.
+- Designs that did not complete, e.g. because the process crashed or was
+  terminated, are resumed at the first incomplete stage instead of being
+  generated again. Designs failing too often are given up.
+- Each design is owned by one process, so several workers can share the
+  journal.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import signal
+import sqlite3
+from dataclasses import dataclass, fields
+from pathlib import Path
+from shutil import copy2, rmtree
+from threading import Lock
+from types import FrameType
+from uuid import uuid4
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILE = "journal.sqlite3"
+
+# The stages of a design in the order they complete
+STAGES = ("scraped", "generated", "downloaded", "upscaled")
+# Designs in these stages are not resumed
+FINAL_STAGES = ("done", "discarded", "failed")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS designs (
+    id TEXT PRIMARY KEY,
+    stage TEXT NOT NULL,
+    source_path TEXT,
+    image_url TEXT,
+    title TEXT,
+    description TEXT,
+    tags TEXT,
+    image_path TEXT,
+    upscaled_path TEXT,
+    image_hash TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    owner INTEGER,
+    updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+)
+"""
+
+
+@dataclass
+class Checkpoint:
+    """The recorded state of a design.
+
+    :ivar id: The ID of the design.
+    :vartype id: str
+    :ivar stage: The last completed stage, see :data:`STAGES`.
+    :vartype stage: str
+    :ivar source_path: The path of the source image in the journal.
+    :vartype source_path: str | None
+    :ivar image_url: The URL of the image generated by ChatGPT.
+    :vartype image_url: str | None
+    :ivar title: The title of the design.
+    :vartype title: str | None
+    :ivar description: The description of the design.
+    :vartype description: str | None
+    :ivar tags: The comma-separated tags of the design.
+    :vartype tags: str | None
+    :ivar image_path: The path of the downloaded generated image in the journal.
+    :vartype image_path: str | None
+    :ivar upscaled_path: The path of the upscaled image in the journal.
+    :vartype upscaled_path: str | None
+    :ivar image_hash: The hexadecimal perceptual hash of the generated image.
+    :vartype image_hash: str | None
+    :ivar attempts: The number of times the design was resumed.
+    :vartype attempts: int
+    """
+
+    id: str
+    stage: str
+    source_path: str | None = None
+    image_url: str | None = None
+    title: str | None = None
+    description: str | None = None
+    tags: str | None = None
+    image_path: str | None = None
+    upscaled_path: str | None = None
+    image_hash: str | None = None
+    attempts: int = 0
+
+
+_COLUMNS = ", ".join(field.name for field in fields(Checkpoint))
+
+
+def is_alive(pid: int) -> bool:
+    """Checks whether a process with the PID exists."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class DesignJournal:
+    """A SQLite journal of the designs in progress.
+
+    :param directory: The directory of the journal and the files of the designs.
+    :type directory: str | Path
+    :param max_attempts: The number of times a design is resumed before it is
+        given up. Defaults to 3.
+    :type max_attempts: int
+    """
+
+    def __init__(self, directory: str | Path, max_attempts: int = 3) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_attempts = max_attempts
+        self._lock = Lock()
+        self._pid = os.getpid()
+        self._connection = sqlite3.connect(
+            self.directory / JOURNAL_FILE,
+            timeout=30,
+            isolation_level=None,  # Every statement is committed immediately
+            check_same_thread=False,
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(_SCHEMA)
+        self._release_orphans()
+
+    def _execute(self, sql: str, parameters: tuple[object, ...] = ()) -> sqlite3.Cursor:
+        with self._lock:
+            return self._connection.execute(sql, parameters)
+
+    def _release_orphans(self) -> None:
+        """Releases the designs owned by processes that no longer exist."""
+        owners = self._execute(
+            "SELECT DISTINCT owner FROM designs WHERE owner IS NOT NULL",
+        ).fetchall()
+        for (owner,) in owners:
+            if owner != self._pid and not is_alive(owner):
+                self._execute("UPDATE designs SET owner = NULL WHERE owner = ?", (owner,))
+
+    def design_directory(self, design_id: str) -> Path:
+        """Returns the directory of the files of a design."""
+        return self.directory / design_id
+
+    def create(self, source_path: str | Path) -> Checkpoint:
+        """Records a new design with its source image.
+
+        :param source_path: The source image, which is copied into the journal.
+        :type source_path: str | Path
+        :return: The checkpoint of the design.
+        :rtype: Checkpoint
+        """
+        design_id = uuid4().hex
+        directory = self.design_directory(design_id)
+        directory.mkdir(parents=True)
+        source = directory / f"source{Path(source_path).suffix}"
+        copy2(source_path, source)
+        self._execute(
+            "INSERT INTO designs (id, stage, source_path, owner) VALUES (?, ?, ?, ?)",
+            (design_id, "scraped", str(source), self._pid),
+        )
+        return Checkpoint(design_id, "scraped", source_path=str(source))
+
+    def record(self, design_id: str, stage: str, **values: str | None) -> None:
+        """Records the completion of a stage.
+
+        :param design_id: The ID of the design.
+        :type design_id: str
+        :param stage: The completed stage, see :data:`STAGES`.
+        :type stage: str
+        :param values: The results of the stage, e.g. ``title``.
+        :type values: str | None
+        """
+        assignments = "".join(f", {column} = ?" for column in values)
+        self._execute(
+            f"UPDATE designs SET stage = ?{assignments}, updated = CURRENT_TIMESTAMP"  # noqa: S608
+            " WHERE id = ?",
+            (stage, *values.values(), design_id),
+        )
+
+    def claim(self) -> Checkpoint | None:
+        """Claims the oldest incomplete design that is not owned by a process.
+
+        Designs resumed :attr:`max_attempts` times are given up instead.
+
+        :return: The checkpoint of the design or None if there is none.
+        :rtype: Checkpoint | None
+        """
+        placeholders = ", ".join("?" * len(FINAL_STAGES))
+        while True:
+            row = self._execute(
+                f"SELECT {_COLUMNS} FROM designs WHERE owner IS NULL"  # noqa: S608
+                f" AND stage NOT IN ({placeholders}) ORDER BY updated LIMIT 1",
+                FINAL_STAGES,
+            ).fetchone()
+            if row is None:
+                return None
+            checkpoint = Checkpoint(*row)
+            if checkpoint.attempts >= self.max_attempts:
+                logger.error(
+                    "Giving up design %s after %d attempts.",
+                    checkpoint.id,
+                    checkpoint.attempts,
+                )
+                self.finish(checkpoint.id, "failed")
+                continue
+            claimed = self._execute(
+                "UPDATE designs SET owner = ?, attempts = attempts + 1"
+                " WHERE id = ? AND owner IS NULL",
+                (self._pid, checkpoint.id),
+            ).rowcount
+            if claimed:
+                checkpoint.attempts += 1
+                return checkpoint
+
+    def release(self, design_id: str) -> None:
+        """Releases a design that failed, so it can be resumed."""
+        self._execute(
+            "UPDATE designs SET owner = NULL WHERE id = ? AND owner = ?",
+            (design_id, self._pid),
+        )
+
+    def finish(self, design_id: str, stage: str = "done") -> None:
+        """Marks a design as complete and removes its files.
+
+        :param design_id: The ID of the design.
+        :type design_id: str
+        :param stage: The final stage, see :data:`FINAL_STAGES`. Defaults to "done".
+        :type stage: str
+        """
+        self._execute(
+            "UPDATE designs SET stage = ?, owner = NULL, updated = CURRENT_TIMESTAMP"
+            " WHERE id = ?",
+            (stage, design_id),
+        )
+        rmtree(self.design_directory(design_id), ignore_errors=True)
+
+    def close(self) -> None:
+        """Releases all designs of this process and closes the journal."""
+        released = self._execute(
+            "UPDATE designs SET owner = NULL WHERE owner = ?",
+            (self._pid,),
+        ).rowcount
+        if released:
+            logger.info("Released %d unfinished designs in the journal.", released)
+        with self._lock:
+            self._connection.close()
+
+
+def exit_on_sigterm() -> None:
+    """Raises SystemExit on SIGTERM, so the journal is closed like on Ctrl+C."""
+
+    def handler(signum: int, _frame: FrameType | None) -> None:
+        raise SystemExit(128 + signum)
+
+    signal.signal(signal.SIGTERM, handler)
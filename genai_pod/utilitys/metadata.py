@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module requests, parses and validates the metadata of a design.
+
+Features:
+- A single prompt asks ChatGPT for the title, description and tags of a
+  design as one JSON object, instead of one conversation turn each.
+- The answer is parsed leniently, e.g. from a Markdown code block, and
+  validated against the limits of the shops.
+- Metadata exceeding the limits is repaired locally: the title and
+  description are shortened at a word boundary and the tags are cleaned,
+  deduplicated and capped, so no further round trip is needed.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ShopLimits:
+    """The metadata limits of a shop.
+
+    :ivar title: The maximum length of the title or None if unlimited.
+    :vartype title: int | None
+    :ivar description: The maximum length of the description or None if unlimited.
+    :vartype description: int | None
+    :ivar tags: The maximum number of tags or None if unlimited.
+    :vartype tags: int | None
+    """
+
+    title: int | None = None
+    description: int | None = None
+    tags: int | None = None
+
+
+SHOP_LIMITS = {
+    "spreadshirt": ShopLimits(title=50, description=200, tags=25),
+    # The Redbubble uploader uses the first 15 tags
+    "redbubble": ShopLimits(tags=15),
+}
+
+METADATA_PROMPT = (
+    "Provide the metadata of the generated design for Spreadshirt and Redbubble as a"
+    ' single JSON object with the keys "title" (a concise title, max 50 characters),'
+    ' "description" (max 200 characters, based on the image) and "tags" (a list of'
+    " 15 to 25 concise tags, the most relevant first). Reply with the JSON object only."
+)
+
+
+@dataclass
+class DesignMetadata:
+    """The metadata of a design.
+
+    :ivar title: The title.
+    :vartype title: str
+    :ivar description: The description.
+    :vartype description: str
+    :ivar tags: The tags, the most relevant first.
+    :vartype tags: list[str]
+    """
+
+    title: str
+    description: str
+    tags: list[str] = field(default_factory=list)
+
+    @property
+    def tags_string(self) -> str:
+        """The comma-separated tags, as written to ``tags.txt``."""
+        return ", ".join(self.tags)
+
+
+def parse_metadata(text: str) -> DesignMetadata:
+    """Parses the metadata from a ChatGPT answer.
+
+    :param text: The answer, containing a JSON object, e.g. in a code block.
+    :type text: str
+    :return: The metadata.
+    :rtype: DesignMetadata
+    :raises ValueError: If the answer contains no valid metadata object.
+    """
+    start, end = text.find("{"), text.rfind("}")
+    if start == -1 or end < start:
+        raise ValueError("No JSON object found in the answer.")
+    try:
+        data = json.loads(text[start : end + 1])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Invalid JSON in the answer: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("The metadata is not a JSON object.")
+
+    missing = [key for key in ("title", "description", "tags") if not data.get(key)]
+    if missing:
+        raise ValueError(f"The metadata lacks {', '.join(missing)}.")
+    tags = data["tags"]
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    return DesignMetadata(
+        title=str(data["title"]),
+        description=str(data["description"]),
+        tags=[str(tag).strip() for tag in tags],
+    )
+
+
+def _strictest(attribute: str, limits: dict[str, ShopLimits]) -> int | None:
+    values = [v for shop in limits.values() if (v := getattr(shop, attribute)) is not None]
+    return min(values, default=None)
+
+
+def validate_metadata(
+    metadata: DesignMetadata,
+    limits: dict[str, ShopLimits] | None = None,
+) -> list[str]:
+    """Checks the metadata against the limits of the shops.
+
+    The tags are checked against the largest limit only, as the uploaders of
+    shops with fewer tags use the first, most relevant ones.
+
+    :param metadata: The metadata.
+    :type metadata: DesignMetadata
+    :param limits: The limits per shop. Defaults to :data:`SHOP_LIMITS`.
+    :type limits: dict[str, ShopLimits] | None
+    :return: The violated limits, empty if the metadata is valid.
+    :rtype: list[str]
+    """
+    limits = limits or SHOP_LIMITS
+    problems = []
+    for shop, shop_limits in limits.items():
+        if shop_limits.title is not None and len(metadata.title) > shop_limits.title:
+            problems.append(f"title longer than {shop_limits.title} characters ({shop})")
+        if (
+            shop_limits.description is not None
+            and len(metadata.description) > shop_limits.description
+        ):
+            problems.append(
+                f"description longer than {shop_limits.description} characters ({shop})",
+            )
+    max_tags = max((s.tags for s in limits.values() if s.tags is not None), default=None)
+    if max_tags is not None and len(metadata.tags) > max_tags:
+        problems.append(f"more than {max_tags} tags")
+    cleaned = {tag.strip().lower() for tag in metadata.tags}
+    if "" in cleaned or len(cleaned) != len(metadata.tags):
+        problems.append("empty or duplicate tags")
+    return problems
+
+
+def _shorten(text: str, length: int | None) -> str:
+    """Shortens a text at a word boundary, preferring the end of a sentence.
+
+    :param text: The text.
+    :type text: str
+    :param length: The maximum length or None.
+    :type length: int | None
+    :return: The shortened text.
+    :rtype: str
+    """
+    text = " ".join(text.split())
+    if length is None or len(text) <= length:
+        return text
+    cut = text[:length]
+    sentence = max(cut.rfind(". "), cut.rfind("! "), cut.rfind("? "))
+    if sentence >= length // 2:
+        return cut[: sentence + 1]
+    word = cut.rfind(" ")
+    return (cut[:word] if word > 0 else cut).rstrip(" ,;:-")
+
+
+def repair_metadata(
+    metadata: DesignMetadata,
+    limits: dict[str, ShopLimits] | None = None,
+) -> DesignMetadata:
+    """Repairs metadata exceeding the limits of the shops.
+
+    :param metadata: The metadata.
+    :type metadata: DesignMetadata
+    :param limits: The limits per shop. Defaults to :data:`SHOP_LIMITS`.
+    :type limits: dict[str, ShopLimits] | None
+    :return: The valid metadata.
+    :rtype: DesignMetadata
+    """
+    limits = limits or SHOP_LIMITS
+    problems = validate_metadata(metadata, limits)
+    if not problems:
+        return metadata
+    logger.info("Repairing metadata: %s", ", ".join(problems))
+
+    tags: list[str] = []
+    seen = set()
+    for tag in metadata.tags:
+        tag = " ".join(tag.strip().strip("#").split())
+        if tag and tag.lower() not in seen:
+            seen.add(tag.lower())
+            tags.append(tag)
+    max_tags = max((s.tags for s in limits.values() if s.tags is not None), default=None)
+    return DesignMetadata(
+        title=_shorten(metadata.title, _strictest("title", limits)),
+        description=_shorten(metadata.description, _strictest("description", limits)),
+        tags=tags[:max_tags],
+    )
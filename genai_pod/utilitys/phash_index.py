@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module provides a persistent index of perceptual image hashes.
+
+Features:
+- Computes a 64 bit perceptual hash (pHash) of an image from the low
+  frequencies of its discrete cosine transform, so resized, recompressed or
+  slightly altered copies of an image get (nearly) the same hash.
+- Stores the hashes in a multi-index hash table, which finds all hashes
+  within a Hamming distance without comparing against every entry, so
+  lookups stay fast with hundreds of thousands of entries. A BK-tree visits
+  most of its nodes for the distances used to detect near-duplicates.
+- Persists the hashes in an append-only file. Entries appended by other
+  processes, e.g. other generation workers, are picked up before each lookup.
+"""
+
+from __future__ import annotations
+
+import logging
+from functools import cache
+from pathlib import Path
+from threading import Lock
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+    import numpy.typing as npt
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+HASH_SIZE = 8
+_DCT_SIZE = 32
+# The number of chunks the 64 bit hashes are indexed by
+CHUNKS = 4
+CHUNK_BITS = HASH_SIZE * HASH_SIZE // CHUNKS
+_CHUNK_MASK = (1 << CHUNK_BITS) - 1
+
+# The maximum Hamming distance of two hashes of near-duplicate images
+DEFAULT_MAX_DISTANCE = 8
+
+
+@cache
+def _dct_matrix(size: int) -> npt.NDArray[np.float32]:
+    """Returns the orthonormal DCT-II matrix of a size."""
+    import numpy as np
+
+    k = np.arange(size)
+    matrix = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * size))
+    matrix[0] *= 1 / np.sqrt(2)
+    return np.asarray(matrix * np.sqrt(2 / size), dtype=np.float32)
+
+
+def perceptual_hash(image: Image.Image) -> int:
+    """Computes the 64 bit perceptual hash of an image.
+
+    Transparent areas are composited on white, so the hash of a design does
+    not depend on the color hidden below its transparent background.
+
+    :param image: The image.
+    :type image: PIL.Image.Image
+    :return: The hash.
+    :rtype: int
+    """
+    import numpy as np
+    from PIL import Image
+
+    if image.mode in {"RGBA", "LA", "PA"} or "transparency" in image.info:
+        rgba = image.convert("RGBA")
+        background = Image.new("RGBA", rgba.size, (255, 255, 255, 255))
+        image = Image.alpha_composite(background, rgba)
+    gray = image.convert("L").resize((_DCT_SIZE, _DCT_SIZE), Image.Resampling.LANCZOS)
+
+    matrix = _dct_matrix(_DCT_SIZE)
+    dct = matrix @ np.asarray(gray, dtype=np.float32) @ matrix.T
+    low = dct[:HASH_SIZE, :HASH_SIZE].ravel()
+    bits = low > np.median(low[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Returns the number of differing bits of two hashes."""
+    return (a ^ b).bit_count()
+
+
+@cache
+def _flip_masks(bits: int, radius: int) -> tuple[int, ...]:
+    """Returns all masks of up to ``radius`` set bits within ``bits`` bits."""
+    from itertools import combinations
+
+    return tuple(
+        sum(1 << bit for bit in flipped)
+        for count in range(radius + 1)
+        for flipped in combinations(range(bits), count)
+    )
+
+
+class MultiIndexHashTable:
+    """A table of 64 bit hashes supporting fast Hamming distance searches.
+
+    Each hash is split into :data:`CHUNKS` chunks, and each chunk is indexed
+    in its own hash table. If two hashes differ in at most ``d`` bits, at
+    least one of their chunks differs in at most ``d // CHUNKS`` bits. So a
+    search only has to check the entries of the buckets near the chunks of
+    the query instead of all entries.
+    """
+
+    def __init__(self) -> None:
+        self._values: list[int] = []
+        self._keys: list[str] = []
+        self._buckets: list[dict[int, list[int]]] = [{} for _ in range(CHUNKS)]
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    @staticmethod
+    def _chunks(value: int) -> list[int]:
+        return [(value >> (CHUNK_BITS * i)) & _CHUNK_MASK for i in range(CHUNKS)]
+
+    def add(self, value: int, key: str) -> None:
+        """Adds a hash to the table.
+
+        :param value: The hash.
+        :type value: int
+        :param key: The key stored with the hash, e.g. the name of the image.
+        :type key: str
+        """
+        entry = len(self._values)
+        self._values.append(value)
+        self._keys.append(key)
+        for buckets, chunk in zip(self._buckets, self._chunks(value), strict=True):
+            buckets.setdefault(chunk, []).append(entry)
+
+    def search(self, value: int, max_distance: int) -> list[tuple[int, str]]:
+        """Finds all hashes within a Hamming distance.
+
+        :param value: The hash to search for.
+        :type value: int
+        :param max_distance: The maximum Hamming distance.
+        :type max_distance: int
+        :return: The distances and keys of the matches, closest first.
+        :rtype: list[tuple[int, str]]
+        """
+        masks = _flip_masks(CHUNK_BITS, max_distance // CHUNKS)
+        candidates: set[int] = set()
+        for buckets, chunk in zip(self._buckets, self._chunks(value), strict=True):
+            for mask in masks:
+                candidates.update(buckets.get(chunk ^ mask, ()))
+        matches = []
+        for entry in candidates:
+            distance = hamming_distance(value, self._values[entry])
+            if distance <= max_distance:
+                matches.append((distance, self._keys[entry]))
+        return sorted(matches)
+
+
+class HashIndex:
+    """A persistent index of perceptual hashes to detect near-duplicate images.
+
+    :param path: The append-only file the hashes are stored in.
+    :type path: str | Path
+    :param max_distance: The maximum Hamming distance of near-duplicates.
+        Defaults to :data:`DEFAULT_MAX_DISTANCE`.
+    :type max_distance: int
+    """
+
+    def __init__(self, path: str | Path, max_distance: int = DEFAULT_MAX_DISTANCE) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+        self.max_distance = max_distance
+        self._table = MultiIndexHashTable()
+        self._offset = 0
+        self._lock = Lock()
+        self._refresh()
+        logger.info("Loaded %d hashes from %s.", len(self._table), self.path)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+    def _refresh(self) -> None:
+        """Adds the entries appended to the file since it was read last."""
+        with self.path.open("rb") as file:
+            file.seek(self._offset)
+            data = file.read()
+        # Ignore a line that is still being written
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].decode("utf-8").splitlines():
+            value, _, key = line.partition(" ")
+            if value:
+                self._table.add(int(value, 16), key)
+        self._offset += end
+
+    def find(self, value: int) -> tuple[int, str] | None:
+        """Finds the closest near-duplicate of a hash.
+
+        :param value: The hash.
+        :type value: int
+        :return: The distance and key of the closest near-duplicate or None.
+        :rtype: tuple[int, str] | None
+        """
+        with self._lock:
+            self._refresh()
+            matches = self._table.search(value, self.max_distance)
+        return matches[0] if matches else None
+
+    def add(self, value: int, key: str) -> None:
+        """Adds a hash to the index and the file.
+
+        :param value: The hash.
+        :type value: int
+        :param key: The key stored with the hash, e.g. the name of the image.
+        :type key: str
+        """
+        with self._lock:
+            self._refresh()
+            with self.path.open("a", encoding="utf-8") as file:
+                file.write(f"{value:016x} {' '.join(key.split())}\n")
+            self._refresh()
+
+    def is_duplicate(self, value: int, key: str) -> bool:
+        """Checks whether an image is a near-duplicate and logs it.
+
+        :param value: The hash of the image.
+        :type value: int
+        :param key: The name of the image, used for logging.
+        :type key: str
+        :return: True if a near-duplicate is in the index.
+        :rtype: bool
+        """
+        match = self.find(value)
+        if match is None:
+            return False
+        logger.warning(
+            "Skipping %s, it is a near-duplicate of %s (distance %d).",
+            key,
+            match[1],
+            match[0],
+        )
+        return True
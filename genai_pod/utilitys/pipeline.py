@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module provides a pipeline of stages connected by bounded queues.
+
+Features:
+- Every stage runs in its own worker threads, so the stages of different
+  items overlap, e.g. the next design is generated while the previous one is
+  upscaled.
+- Bounded queues between the stages provide backpressure: a fast stage waits
+  instead of piling up items in memory.
+- The depth of every queue and the counters of every stage are exposed and
+  logged periodically, showing which stage is the bottleneck.
+- Items that fail, are dropped or are still in flight when the pipeline
+  stops are passed to a cleanup callback.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass, field
+from queue import Empty, Full, Queue
+from threading import Event, Lock, Thread
+from time import perf_counter
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_POLL_INTERVAL = 0.5
+
+
+@dataclass
+class Stage:
+    """A stage of a pipeline.
+
+    The function of the first stage is called with None and produces items.
+    The function of every other stage transforms the item of the previous
+    stage. Returning None drops the item.
+
+    :ivar name: The name of the stage.
+    :vartype name: str
+    :ivar function: The function processing an item.
+    :vartype function: Callable[[Any], Any]
+    :ivar workers: The number of threads running the stage.
+    :vartype workers: int
+    """
+
+    name: str
+    function: Callable[[Any], Any]
+    workers: int = 1
+
+
+@dataclass
+class StageStats:
+    """The counters of a pipeline stage.
+
+    :ivar processed: The number of items processed successfully.
+    :vartype processed: int
+    :ivar dropped: The number of items dropped by the stage.
+    :vartype dropped: int
+    :ivar failed: The number of items that raised an exception.
+    :vartype failed: int
+    :ivar busy: The time in seconds the stage spent processing items.
+    :vartype busy: float
+    """
+
+    processed: int = 0
+    dropped: int = 0
+    failed: int = 0
+    busy: float = 0.0
+
+
+@dataclass
+class PipelineStats:
+    """The state of a pipeline.
+
+    :ivar stages: The counters of each stage.
+    :vartype stages: dict[str, StageStats]
+    :ivar queues: The number of items waiting in front of each stage.
+    :vartype queues: dict[str, int]
+    :ivar queue_size: The capacity of each queue.
+    :vartype queue_size: int
+    """
+
+    stages: dict[str, StageStats] = field(default_factory=dict)
+    queues: dict[str, int] = field(default_factory=dict)
+    queue_size: int = 0
+
+    def __str__(self) -> str:
+        parts = []
+        for name, stats in self.stages.items():
+            if name in self.queues:
+                parts.append(f"[{self.queues[name]}/{self.queue_size}]")
+            parts.append(
+                f"{name}: {stats.processed} ok, {stats.dropped} dropped, "
+                f"{stats.failed} failed, {stats.busy:.0f}s busy",
+            )
+        return " -> ".join(parts)
+
+
+class Pipeline:
+    """Runs items through stages connected by bounded queues.
+
+    :param stages: The stages, the first one produces the items.
+    :type stages: Sequence[Stage]
+    :param queue_size: The capacity of the queue in front of each stage. Defaults to 2.
+    :type queue_size: int
+    :param cleanup: Called with every item that does not pass all stages.
+        Defaults to None.
+    :type cleanup: Callable[[Any], None] | None
+    :param max_consecutive_failures: The number of consecutive failures of a
+        stage after which the pipeline stops. Defaults to 5.
+    :type max_consecutive_failures: int
+
+    :ivar stopped: Set when the pipeline stops. Stages waiting for a long time
+        should wait on it, so the pipeline can stop without delay.
+    :vartype stopped: threading.Event
+    """
+
+    def __init__(
+        self,
+        stages: Sequence[Stage],
+        queue_size: int = 2,
+        cleanup: Callable[[Any], None] | None = None,
+        max_consecutive_failures: int = 5,
+    ) -> None:
+        if not stages:
+            raise ValueError("A pipeline needs at least one stage.")
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.cleanup = cleanup
+        self.max_consecutive_failures = max_consecutive_failures
+        self._queues: dict[str, Queue[Any]] = {
+            stage.name: Queue(maxsize=queue_size) for stage in self.stages[1:]
+        }
+        self._stats = {stage.name: StageStats() for stage in self.stages}
+        self._consecutive_failures = dict.fromkeys(self._stats, 0)
+        self._lock = Lock()
+        self.stopped = Event()
+        self._completed = 0
+        self._target: int | None = None
+
+    @property
+    def stats(self) -> PipelineStats:
+        """The current counters of the stages and the depths of the queues."""
+        with self._lock:
+            return PipelineStats(
+                stages={name: StageStats(**vars(s)) for name, s in self._stats.items()},
+                queues={name: queue.qsize() for name, queue in self._queues.items()},
+                queue_size=self.queue_size,
+            )
+
+    def _discard(self, item: Any) -> None:
+        if self.cleanup is not None and item is not None:
+            try:
+                self.cleanup(item)
+            except Exception as e:
+                logger.warning("Failed to clean up a pipeline item: %s", e)
+
+    def _put(self, queue: Queue[Any], item: Any) -> bool:
+        """Puts an item into a queue, waiting while it is full.
+
+        :return: False if the pipeline stopped before the item could be queued.
+        :rtype: bool
+        """
+        while not self.stopped.is_set():
+            try:
+                queue.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _record(self, stage: Stage, start: float, outcome: str) -> None:
+        with self._lock:
+            stats = self._stats[stage.name]
+            stats.busy += perf_counter() - start
+            setattr(stats, outcome, getattr(stats, outcome) + 1)
+            if outcome == "failed":
+                self._consecutive_failures[stage.name] += 1
+                failures = self._consecutive_failures[stage.name]
+            else:
+                self._consecutive_failures[stage.name] = 0
+                failures = 0
+            if outcome == "processed" and stage is self.stages[-1]:
+                self._completed += 1
+                if self._target is not None and self._completed >= self._target:
+                    self.stopped.set()
+        if failures >= self.max_consecutive_failures:
+            logger.error(
+                "Stage %s failed %d times in a row, stopping the pipeline.",
+                stage.name,
+                failures,
+            )
+            self.stopped.set()
+
+    def _work(self, index: int) -> None:
+        """Runs a stage until the pipeline stops.
+
+        :param index: The index of the stage.
+        :type index: int
+        """
+        stage = self.stages[index]
+        inbox = self._queues.get(stage.name)
+        outbox = (
+            self._queues[self.stages[index + 1].name]
+            if index + 1 < len(self.stages)
+            else None
+        )
+        while not self.stopped.is_set():
+            item = None
+            if inbox is not None:
+                try:
+                    item = inbox.get(timeout=_POLL_INTERVAL)
+                except Empty:
+                    continue
+
+            start = perf_counter()
+            try:
+                result = stage.function(item)
+            except Exception as e:
+                logger.error("Stage %s failed: %s", stage.name, e)
+                self._record(stage, start, "failed")
+                self._discard(item)
+                continue
+            if result is None:
+                self._record(stage, start, "dropped")
+                self._discard(item)
+                continue
+            self._record(stage, start, "processed")
+            if outbox is not None and not self._put(outbox, result):
+                self._discard(result)
+
+    def run(self, items: int | None = None, report_interval: float = 60) -> PipelineStats:
+        """Runs the pipeline until enough items passed all stages or it is stopped.
+
+        :param items: The number of items after which the pipeline stops.
+            Defaults to None (until :meth:`stop` is called or a stage fails
+            too often).
+        :type items: int | None
+        :param report_interval: The interval in seconds in which the stats are logged.
+        :type report_interval: float
+        :return: The final stats.
+        :rtype: PipelineStats
+        """
+        self._target = items
+        threads = [
+            Thread(target=self._work, args=(index,), name=f"{stage.name}-{worker}", daemon=True)
+            for index, stage in enumerate(self.stages)
+            for worker in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        interrupted = False
+        try:
+            while not self.stopped.wait(report_interval):
+                logger.info("Pipeline: %s", self.stats)
+        except (KeyboardInterrupt, SystemExit):
+            # Exit promptly, the items being processed are abandoned
+            interrupted = True
+            raise
+        finally:
+            self.stop()
+            if not interrupted:
+                for thread in threads:
+                    thread.join()
+            for queue in self._queues.values():
+                while not queue.empty():
+                    self._discard(queue.get_nowait())
+        stats = self.stats
+        logger.info("Pipeline stopped: %s", stats)
+        return stats
+
+    def stop(self) -> None:
+        """Stops the pipeline after the items currently being processed."""
+        self.stopped.set()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module provides batch post-processing of already generated designs.
+
+Features:
+- Walks an output directory (e.g. the tree used by ``genai upload``) and
+  collects every design image that has not been finished yet.
+- Finishes the collected images (see :func:`genai_pod.utils.pilling_image`)
+  and renders their upload derivatives in parallel using a process pool.
+- Reports the throughput of the run.
+"""
+
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter
+
+from genai_pod.utilitys.derivatives import DERIVATIVES_DIRECTORY
+
+logger = logging.getLogger(__name__)
+
+FINISHED_SUFFIX = "_pil"
+
+
+@dataclass
+class FinishingSummary:
+    """Summary of a batch post-processing run.
+
+    :ivar found: The number of design images found.
+    :vartype found: int
+    :ivar finished: The number of design images finished successfully.
+    :vartype finished: int
+    :ivar skipped: The number of design images skipped because they were already finished.
+    :vartype skipped: int
+    :ivar failed: The paths of the design images that could not be finished.
+    :vartype failed: list[Path]
+    :ivar pixels: The total number of pixels finished.
+    :vartype pixels: int
+    :ivar elapsed: The wall time of the run in seconds.
+    :vartype elapsed: float
+    """
+
+    found: int = 0
+    finished: int = 0
+    skipped: int = 0
+    failed: list[Path] = field(default_factory=list)
+    pixels: int = 0
+    elapsed: float = 0.0
+
+    def __str__(self) -> str:
+        rate = self.finished / self.elapsed if self.elapsed else 0.0
+        mpx_rate = self.pixels / 1e6 / self.elapsed if self.elapsed else 0.0
+        return (
+            f"Finished {self.finished}/{self.found} designs "
+            f"({self.skipped} skipped, {len(self.failed)} failed) in {self.elapsed:.1f}s "
+            f"- {rate:.2f} designs/s, {mpx_rate:.1f} MPix/s"
+        )
+
+
+def find_unfinished_designs(base_path: Path, force: bool = False) -> tuple[list[Path], int]:
+    """Collects all design images below ``base_path`` that still need finishing.
+
+    Every PNG that is not itself a finished image or a derivative is considered
+    a design. A design counts as done if its ``*_pil.png`` counterpart exists.
+
+    :param base_path: The directory to search recursively.
+    :type base_path: Path
+    :param force: Whether to include designs that are already finished.
+    :type force: bool
+    :return: The designs to finish and the number of skipped designs.
+    :rtype: tuple[list[Path], int]
+    """
+    designs: list[Path] = []
+    skipped = 0
+    for image_path in sorted(base_path.rglob("*.png")):
+        if (
+            image_path.stem.endswith(FINISHED_SUFFIX)
+            or DERIVATIVES_DIRECTORY in image_path.relative_to(base_path).parts
+        ):
+            continue
+        finished_path = image_path.with_name(f"{image_path.stem}{FINISHED_SUFFIX}.png")
+        if finished_path.exists() and not force:
+            skipped += 1
+            continue
+        designs.append(image_path)
+    return designs, skipped
+
+
+def _finish_design(
+    image_path: Path,
+    trim_cm: float,
+    tile_rows: int | None = None,
+    blend: str = "float",
+) -> int:
+    """Finishes a single design and renders its derivatives, executed inside a
+    worker process.
+
+    :param image_path: The path to the design image.
+    :type image_path: Path
+    :param trim_cm: The amount of trimming in centimeters.
+    :type trim_cm: float
+    :param tile_rows: If set, the design is finished in strips of this many rows.
+    :type tile_rows: int | None
+    :param blend: The blending implementation, "float" or "fixed".
+    :type blend: str
+    :return: The number of pixels of the design.
+    :rtype: int
+    """
+    from PIL import Image
+
+    from genai_pod.utilitys.derivatives import render_derivatives
+    from genai_pod.utils import finish_image, save_finished_image
+
+    with Image.open(image_path) as image:
+        pixels = image.width * image.height
+        finished = finish_image(image, trim_cm=trim_cm, tile_rows=tile_rows, blend=blend)
+    save_finished_image(
+        finished,
+        image_path.with_name(f"{image_path.stem}{FINISHED_SUFFIX}.png"),
+    )
+    render_derivatives(finished, image_path.parent, workers=1)
+    return pixels
+
+
+def finish_designs(
+    output_directory: str | Path,
+    workers: int | None = None,
+    trim_cm: float = 0.1,
+    force: bool = False,
+    tile_rows: int | None = None,
+    blend: str = "float",
+) -> FinishingSummary:
+    """Finishes all unfinished designs below ``output_directory`` in parallel.
+
+    :param output_directory: The directory containing the design subdirectories.
+    :type output_directory: str | Path
+    :param workers: The number of worker processes. Defaults to the number of CPUs.
+    :type workers: int | None
+    :param trim_cm: The amount of trimming in centimeters.
+    :type trim_cm: float
+    :param force: Whether to finish designs again that are already finished.
+    :type force: bool
+    :param tile_rows: If set, every design is finished in horizontal strips of
+        this many rows, which bounds the memory of each worker process.
+        Defaults to None (untiled).
+    :type tile_rows: int | None
+    :param blend: The blending implementation, "float" or "fixed" (integer
+        arithmetic). Defaults to "float".
+    :type blend: str
+    :return: The summary of the run.
+    :rtype: FinishingSummary
+    """
+    base_path = Path(output_directory)
+    designs, skipped = find_unfinished_designs(base_path, force=force)
+    summary = FinishingSummary(found=len(designs) + skipped, skipped=skipped)
+    logger.info(
+        "Found %d designs to finish in %s (%d already done).",
+        len(designs),
+        base_path,
+        skipped,
+    )
+    if not designs:
+        return summary
+
+    start = perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_finish_design, design, trim_cm, tile_rows, blend): design
+            for design in designs
+        }
+        for future in as_completed(futures):
+            design = futures[future]
+            try:
+                summary.pixels += future.result()
+                summary.finished += 1
+                logger.debug("Finished %s", design)
+            except Exception as e:
+                logger.error("Failed to finish %s: %s", design, e)
+                summary.failed.append(design)
+    summary.elapsed = perf_counter() - start
+    return summary
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module checks images against the limits of the upscaler backends.
+
+Features:
+- Describes the input limits of a backend (dimensions, file size, color
+  modes and transparency) in a :class:`UpscalerLimits` table, loaded from
+  ``resources/upscaler_limits.json`` or a user-provided JSON file.
+- Checks an image locally by reading its header only, so images that a
+  remote service would reject are detected before a browser is started.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMITS_FILE = (
+    Path(__file__).parent.absolute().parent / "resources" / "upscaler_limits.json"
+)
+
+
+@dataclass
+class UpscalerLimits:
+    """The input limits of an upscaler backend. None means unlimited.
+
+    :ivar max_width: The maximum image width in pixels.
+    :vartype max_width: int | None
+    :ivar max_height: The maximum image height in pixels.
+    :vartype max_height: int | None
+    :ivar max_file_size: The maximum file size in bytes.
+    :vartype max_file_size: int | None
+    :ivar modes: The supported PIL color modes.
+    :vartype modes: list[str] | None
+    :ivar allow_alpha: Whether images with transparency are supported.
+    :vartype allow_alpha: bool
+    """
+
+    max_width: int | None = None
+    max_height: int | None = None
+    max_file_size: int | None = None
+    modes: list[str] | None = None
+    allow_alpha: bool = True
+
+    def check(self, image_path: str | Path) -> list[str]:
+        """Checks an image file against the limits.
+
+        :param image_path: The path to the image.
+        :type image_path: str | Path
+        :return: The reasons why the image exceeds the limits, empty if it does not.
+        :rtype: list[str]
+        """
+        from PIL import Image
+
+        reasons = []
+        file_size = Path(image_path).stat().st_size
+        if self.max_file_size is not None and file_size > self.max_file_size:
+            reasons.append(f"file size {file_size} > {self.max_file_size} bytes")
+
+        with Image.open(image_path) as image:  # Reads the header only
+            width, height = image.size
+            if self.max_width is not None and width > self.max_width:
+                reasons.append(f"width {width} > {self.max_width} px")
+            if self.max_height is not None and height > self.max_height:
+                reasons.append(f"height {height} > {self.max_height} px")
+            if self.modes is not None and image.mode not in self.modes:
+                reasons.append(f"unsupported color mode {image.mode}")
+            if not self.allow_alpha and image.has_transparency_data:
+                reasons.append("transparency is not supported")
+        return reasons
+
+
+def load_limits(path: str | Path = DEFAULT_LIMITS_FILE) -> dict[str, UpscalerLimits]:
+    """Loads the limits table of the upscaler backends from a JSON file.
+
+    :param path: The path to the JSON file mapping backend names to limits.
+    :type path: str | Path
+    :return: The limits of each backend listed in the file.
+    :rtype: dict[str, UpscalerLimits]
+    """
+    with Path(path).open(encoding="utf-8") as file:
+        table = json.load(file)
+    return {name: UpscalerLimits(**limits) for name, limits in table.items()}
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module provides a quality gate for generated designs.
+
+Features:
+- Measures the alpha coverage, the share of the frame edge touched by the
+  subject, whether the background is opaque and a sharpness score of an
+  image with NumPy, using a single conversion of the image to an array.
+- Rejects designs that are almost empty, cropped at the frame edge, whose
+  background was not removed or that are blurry, before any time is spent
+  on upscaling and finishing them.
+- Saves rejected designs together with their metrics to a reject folder
+  outside of the upload tree.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+OPAQUE = 128
+
+
+@dataclass
+class QualityThresholds:
+    """The thresholds of the quality gate.
+
+    :ivar min_coverage: The minimum share of opaque pixels.
+    :vartype min_coverage: float
+    :ivar max_coverage: The maximum share of opaque pixels.
+    :vartype max_coverage: float
+    :ivar max_edge_touch: The maximum share of opaque pixels on the frame edge.
+    :vartype max_edge_touch: float
+    :ivar max_corner_opacity: The maximum mean opacity of the four corners.
+        Above, the background is considered not removed.
+    :vartype max_corner_opacity: float
+    :ivar min_sharpness: The minimum variance of the Laplacian of the design
+        composited on white, within the bounding box of the subject.
+    :vartype min_sharpness: float
+    """
+
+    min_coverage: float = 0.05
+    max_coverage: float = 0.9
+    max_edge_touch: float = 0.02
+    max_corner_opacity: float = 0.5
+    min_sharpness: float = 5.0
+
+
+@dataclass
+class QualityMetrics:
+    """The quality metrics of a design.
+
+    :ivar coverage: The share of opaque pixels.
+    :vartype coverage: float
+    :ivar edge_touch: The share of opaque pixels on the frame edge.
+    :vartype edge_touch: float
+    :ivar corner_opacity: The mean opacity of the four corners, from 0 to 1.
+    :vartype corner_opacity: float
+    :ivar sharpness: The variance of the Laplacian within the subject's bounding box.
+    :vartype sharpness: float
+    """
+
+    coverage: float
+    edge_touch: float
+    corner_opacity: float
+    sharpness: float
+
+    def failures(self, thresholds: QualityThresholds) -> list[str]:
+        """Compares the metrics with the thresholds.
+
+        :param thresholds: The thresholds of the quality gate.
+        :type thresholds: QualityThresholds
+        :return: The reasons for rejecting the design, empty if it passes.
+        :rtype: list[str]
+        """
+        reasons = []
+        if self.coverage < thresholds.min_coverage:
+            reasons.append("almost empty")
+        if self.corner_opacity > thresholds.max_corner_opacity:
+            reasons.append("background not removed")
+        elif self.coverage > thresholds.max_coverage:
+            reasons.append("subject fills the whole frame")
+        elif self.edge_touch > thresholds.max_edge_touch:
+            reasons.append("subject cropped at the frame edge")
+        if self.coverage and self.sharpness < thresholds.min_sharpness:
+            reasons.append("blurry")
+        return reasons
+
+
+def measure_quality(image: Image.Image) -> QualityMetrics:
+    """Computes the quality metrics of a design.
+
+    :param image: The design. Images without alpha channel are fully opaque.
+    :type image: PIL.Image.Image
+    :return: The quality metrics.
+    :rtype: QualityMetrics
+    """
+    import numpy as np
+
+    arr = np.asarray(image.convert("RGBA"), dtype=np.float32)
+    alpha = arr[..., 3]
+    opaque = alpha >= OPAQUE
+    height, width = opaque.shape
+
+    edge = np.concatenate(
+        (opaque[0], opaque[-1], opaque[1:-1, 0], opaque[1:-1, -1]),
+    )
+    corner = max(1, min(height, width) // 20)
+    corners = np.concatenate(
+        [
+            alpha[rows, cols].ravel()
+            for rows in (slice(0, corner), slice(-corner, None))
+            for cols in (slice(0, corner), slice(-corner, None))
+        ],
+    )
+
+    # Luminance composited on white, as the design appears on a light product
+    gray = arr[..., :3] @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+    gray = (255 - alpha / 255 * (255 - gray)).astype(np.float32)
+    laplacian = (
+        4 * gray[1:-1, 1:-1]
+        - gray[:-2, 1:-1]
+        - gray[2:, 1:-1]
+        - gray[1:-1, :-2]
+        - gray[1:-1, 2:]
+    )
+    rows = np.flatnonzero(opaque[1:-1, 1:-1].any(axis=1))
+    cols = np.flatnonzero(opaque[1:-1, 1:-1].any(axis=0))
+    sharpness = (
+        float(laplacian[rows[0] : rows[-1] + 1, cols[0] : cols[-1] + 1].var())
+        if rows.size and cols.size
+        else 0.0
+    )
+
+    return QualityMetrics(
+        coverage=float(opaque.mean()),
+        edge_touch=float(edge.mean()),
+        corner_opacity=float(corners.mean() / 255),
+        sharpness=sharpness,
+    )
+
+
+def load_thresholds(path: str | Path) -> QualityThresholds:
+    """Loads the thresholds of the quality gate from a JSON file.
+
+    :param path: The path to the JSON file. Missing thresholds keep their defaults.
+    :type path: str | Path
+    :return: The thresholds.
+    :rtype: QualityThresholds
+    """
+    with Path(path).open(encoding="utf-8") as file:
+        return QualityThresholds(**json.load(file))
+
+
+@dataclass
+class QualityGate:
+    """Rejects bad designs before they are upscaled.
+
+    :ivar reject_directory: The directory rejected designs are saved to.
+    :vartype reject_directory: Path
+    :ivar thresholds: The thresholds of the quality gate.
+    :vartype thresholds: QualityThresholds
+    :ivar rejected: The number of rejected designs.
+    :vartype rejected: int
+    """
+
+    reject_directory: Path
+    thresholds: QualityThresholds = field(default_factory=QualityThresholds)
+    rejected: int = 0
+
+    def inspect(self, image: Image.Image, name: str) -> bool:
+        """Checks a design and saves it to the reject directory if it fails.
+
+        :param image: The design to check.
+        :type image: PIL.Image.Image
+        :param name: The name of the design, used for its reject folder.
+        :type name: str
+        :return: True if the design passed the quality gate, False otherwise.
+        :rtype: bool
+        """
+        metrics = measure_quality(image)
+        reasons = metrics.failures(self.thresholds)
+        if not reasons:
+            logger.debug("Design %s passed the quality gate: %s", name, metrics)
+            return True
+
+        directory = Path(self.reject_directory) / name
+        directory.mkdir(parents=True, exist_ok=True)
+        image.save(directory / f"{name}.png")
+        with (directory / "metrics.json").open("w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "reasons": reasons,
+                    "metrics": asdict(metrics),
+                    "thresholds": asdict(self.thresholds),
+                },
+                file,
+                indent=2,
+            )
+        self.rejected += 1
+        logger.warning(
+            "Rejected design %s before upscaling (%s), saved to %s. Rejected: %d",
+            name,
+            ", ".join(reasons),
+            directory,
+            self.rejected,
+        )
+        return False
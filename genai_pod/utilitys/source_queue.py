@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module provides an on-disk queue of prefetched source images.
+
+Features:
+- Source images are harvested in bulk, e.g. all thumbnails of a Vexels
+  niche page from a single page load, and downloaded concurrently.
+- Every image is stored as a PNG next to a JSON file with its metadata, so
+  the queue survives restarts and can be shared by several workers.
+- Images are claimed with an atomic rename, so no image is used twice, even
+  by workers in different processes.
+- A background thread refills the queue when it runs low, so taking an
+  image does not wait for a browser.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from hashlib import sha256
+from io import BytesIO
+from pathlib import Path
+from shutil import move
+from threading import Condition, Event, Thread, get_ident
+from time import monotonic
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from genai_pod.utilitys.workspace import Workspace
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SourceImage:
+    """A source image found while harvesting.
+
+    :ivar title: The title of the image.
+    :vartype title: str
+    :ivar url: The URL of the image.
+    :vartype url: str
+    """
+
+    title: str
+    url: str
+
+    @property
+    def key(self) -> str:
+        """The file name of the image in the queue, derived from its URL."""
+        return sha256(self.url.encode()).hexdigest()[:16]
+
+
+class SourceQueue:
+    """A directory of prefetched source images that is refilled in the background.
+
+    :param directory: The directory of the queue.
+    :type directory: str | Path
+    :param harvest: Called to find new source images, e.g. by loading a page.
+    :type harvest: Callable[[], list[SourceImage]]
+    :param low_water: The number of queued images below which the queue is
+        refilled. Defaults to 5.
+    :type low_water: int
+    :param download_workers: The number of concurrent downloads. Defaults to 8.
+    :type download_workers: int
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        harvest: Callable[[], list[SourceImage]],
+        low_water: int = 5,
+        download_workers: int = 8,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.harvest = harvest
+        self.low_water = low_water
+        self.download_workers = download_workers
+        self._refill = Event()
+        self._stopped = Event()
+        self._available = Condition()
+        self._thread: Thread | None = None
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self.directory.glob("*.png"))
+
+    def _download(self, source: SourceImage) -> bool:
+        """Downloads a source image into the queue.
+
+        :param source: The source image.
+        :type source: SourceImage
+        :return: True if the image was added, False if it was queued already or failed.
+        :rtype: bool
+        """
+        from PIL import Image
+
+        from genai_pod.utilitys.http_client import get_http_client
+
+        path = self.directory / f"{source.key}.png"
+        if path.exists():
+            return False
+        try:
+            response = get_http_client().get(source.url, timeout=10)
+            response.raise_for_status()
+            partial = path.with_suffix(".part")
+            with Image.open(BytesIO(response.content)) as image:
+                image.save(partial, format="PNG")
+        except Exception as e:
+            logger.warning("Failed to download source image %s: %s", source.url, e)
+            return False
+        with path.with_suffix(".json").open("w", encoding="utf-8") as file:
+            json.dump(asdict(source), file)
+        # The image becomes visible to take() only once it is complete
+        os.replace(partial, path)
+        return True
+
+    def fill(self) -> int:
+        """Harvests source images and downloads them concurrently.
+
+        :return: The number of images added to the queue.
+        :rtype: int
+        """
+        sources = self.harvest()
+        with ThreadPoolExecutor(max_workers=self.download_workers) as executor:
+            added = sum(executor.map(self._download, sources))
+        logger.info(
+            "Prefetched %d of %d harvested source images, %d queued.",
+            added,
+            len(sources),
+            len(self),
+        )
+        with self._available:
+            self._available.notify_all()
+        return added
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            if not self._refill.wait(timeout=1):
+                continue
+            self._refill.clear()
+            if len(self) >= self.low_water:
+                continue
+            try:
+                self.fill()
+            except Exception as e:
+                logger.error("Failed to refill the source queue: %s", e)
+                with self._available:
+                    self._available.notify_all()
+
+    def start(self) -> None:
+        """Starts the background refill."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = Thread(target=self._run, name="source-prefetch", daemon=True)
+            self._thread.start()
+        self._refill.set()
+
+    def stop(self) -> None:
+        """Stops the background refill after the current harvest."""
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _claim(self, workspace: Workspace) -> tuple[Path, SourceImage] | None:
+        """Moves the oldest queued image into a workspace.
+
+        :return: The path of the image in the workspace and its metadata, or
+            None if the queue is empty.
+        :rtype: tuple[Path, SourceImage] | None
+        """
+        queued = []
+        for path in self.directory.glob("*.png"):
+            try:
+                queued.append((path.stat().st_mtime, path))
+            except FileNotFoundError:
+                continue  # Claimed by another worker since the glob
+        for _, path in sorted(queued):
+            claimed = path.with_suffix(f".{os.getpid()}-{get_ident()}.claimed")
+            try:
+                path.rename(claimed)
+            except FileNotFoundError:
+                continue  # Taken by another worker
+
+            metadata = path.with_suffix(".json")
+            with metadata.open(encoding="utf-8") as file:
+                source = SourceImage(**json.load(file))
+            metadata.unlink()
+            target = workspace.file(prefix="vexels_", suffix=".png")
+            move(claimed, target)
+            return target, source
+        return None
+
+    def take(self, workspace: Workspace, timeout: float = 300) -> tuple[Path, SourceImage] | None:
+        """Takes a source image from the queue, waiting for a refill if it is empty.
+
+        :param workspace: The workspace the image is moved to.
+        :type workspace: Workspace
+        :param timeout: The maximum time in seconds to wait for a refill. Defaults to 300.
+        :type timeout: float
+        :return: The path of the image in the workspace and its metadata, or
+            None if no image was available within the timeout.
+        :rtype: tuple[Path, SourceImage] | None
+        """
+        if self._thread is None:
+            self.start()
+        deadline = monotonic() + timeout
+        while True:
+            claimed = self._claim(workspace)
+            if len(self) < self.low_water:
+                self._refill.set()
+            if claimed is not None:
+                logger.info("Took source image %r from the queue.", claimed[1].title)
+                return claimed
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                logger.error("No source image available within %.0fs.", timeout)
+                return None
+            with self._available:
+                self._available.wait(timeout=min(remaining, 5))
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module manages a single long-lived Tor process.
+
+Features:
+- Starts Tor once per process with a persistent data directory, so later runs
+  reuse the cached consensus and guards and skip most of the bootstrap.
+- Waits for the bootstrap to complete by querying the control port instead of
+  sleeping for a fixed amount of time.
+- Requests new circuits (``SIGNAL NEWNYM``) through the control port instead
+  of restarting the Tor binary.
+- Uses a Tor process that is already bootstrapped on the control port, e.g.
+  one started by another generation worker, instead of starting a second one.
+- Processes sharing the data directory start Tor under a lock file and
+  register as its users, so Tor is stopped only by the last process using it.
+"""
+
+from __future__ import annotations
+
+import atexit
+import fcntl
+import logging
+import os
+import socket
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from threading import Lock
+from time import sleep, time
+from typing import TYPE_CHECKING, TextIO
+
+from genai_pod.utilitys.journal import is_alive
+
+if TYPE_CHECKING:
+    import subprocess
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DATA_DIRECTORY = Path.home() / ".cache" / "genai_pod" / "tor"
+# Held while a process starts or stops Tor
+LOCK_FILE = "manager.lock"
+# One file per process using Tor, named after its PID
+USERS_DIRECTORY = "users"
+
+
+class TorControlError(Exception):
+    """Raised if the Tor control port rejects a command or is unreachable."""
+
+
+class TorManager:
+    """Owns a Tor process and talks to it through its control port.
+
+    :param tor_binary_path: The path to the Tor binary, or None to use the one in PATH.
+    :type tor_binary_path: str | None
+    :param data_directory: The persistent Tor data directory.
+    :type data_directory: Path
+    :param socks_port: The SOCKS port Tor listens on.
+    :type socks_port: int
+    :param control_port: The control port Tor listens on.
+    :type control_port: int
+    :param bootstrap_timeout: The maximum time in seconds to wait for the bootstrap.
+    :type bootstrap_timeout: float
+    """
+
+    def __init__(
+        self,
+        tor_binary_path: str | None = None,
+        data_directory: Path = DEFAULT_DATA_DIRECTORY,
+        socks_port: int = 9050,
+        control_port: int = 9051,
+        bootstrap_timeout: float = 120,
+    ) -> None:
+        self.tor_binary_path = tor_binary_path
+        self.data_directory = Path(data_directory)
+        self.socks_port = socks_port
+        self.control_port = control_port
+        self.bootstrap_timeout = bootstrap_timeout
+        self._process: subprocess.Popen[bytes] | None = None
+        self._lock = Lock()
+        self._user = self.data_directory / USERS_DIRECTORY / f"{os.getpid()}-{id(self):x}"
+
+    @property
+    def is_running(self) -> bool:
+        """Whether the Tor process is running."""
+        return self._process is not None and self._process.poll() is None
+
+    def start(self) -> None:
+        """Starts Tor if it is not running yet and waits until it is bootstrapped.
+
+        :raises TimeoutError: If Tor does not bootstrap within the timeout.
+        :raises TorControlError: If the Tor process exits during the bootstrap.
+        """
+        from genai_pod.utilitys.bigjpg_upscaler import start_tor
+
+        with self._lock:
+            if self.is_running or (self._user.exists() and self._is_bootstrapped()):
+                return
+            with self._exclusive():
+                # Another process may have started Tor while this one waited for the lock
+                if self._is_bootstrapped():
+                    logger.info("Using the Tor process on control port %d.", self.control_port)
+                    self._user.touch()
+                    return
+                logger.info("Starting Tor with data directory %s", self.data_directory)
+                start = time()
+                self._process = start_tor(
+                    self.tor_binary_path,
+                    [
+                        "--SocksPort",
+                        str(self.socks_port),
+                        "--ControlPort",
+                        str(self.control_port),
+                        "--CookieAuthentication",
+                        "1",
+                        "--DataDirectory",
+                        str(self.data_directory),
+                    ],
+                )
+                try:
+                    self._wait_for_bootstrap()
+                except Exception:
+                    self._terminate()
+                    raise
+                self._user.touch()
+                logger.info("Tor is bootstrapped after %.1fs.", time() - start)
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Holds the lock file of the data directory for starting or stopping Tor."""
+        (self.data_directory / USERS_DIRECTORY).mkdir(mode=0o700, parents=True, exist_ok=True)
+        with (self.data_directory / LOCK_FILE).open("a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)  # Released when the file is closed
+            yield
+
+    def _other_users(self) -> int:
+        """Counts the other processes using Tor and forgets the ones that exited.
+
+        :return: The number of other processes using Tor.
+        :rtype: int
+        """
+        users = 0
+        for user in (self.data_directory / USERS_DIRECTORY).iterdir():
+            if user == self._user:
+                continue
+            if is_alive(int(user.name.split("-")[0])):
+                users += 1
+            else:
+                user.unlink(missing_ok=True)
+        return users
+
+    def _wait_for_bootstrap(self) -> None:
+        """Polls the bootstrap progress until Tor reports 100 %.
+
+        :raises TimeoutError: If Tor does not bootstrap within the timeout.
+        :raises TorControlError: If the Tor process exits during the bootstrap.
+        """
+        deadline = time() + self.bootstrap_timeout
+        while time() < deadline:
+            if self._process is not None and self._process.poll() is not None:
+                raise TorControlError("The Tor process exited during bootstrap.")
+            try:
+                phase = self._command("GETINFO status/bootstrap-phase")[0]
+                if "PROGRESS=100" in phase:
+                    return
+                logger.debug("Tor bootstrap: %s", phase)
+            except (OSError, TorControlError) as e:
+                logger.debug("Tor control port not ready yet: %s", e)
+            sleep(0.5)
+        raise TimeoutError("Tor not connected (Timeout).")
+
+    def _is_bootstrapped(self) -> bool:
+        """Checks whether a bootstrapped Tor process answers on the control port.
+
+        :return: True if Tor is reachable and bootstrapped.
+        :rtype: bool
+        """
+        try:
+            return "PROGRESS=100" in self._command("GETINFO status/bootstrap-phase")[0]
+        except (OSError, TorControlError):
+            return False
+
+    def new_circuit(self) -> None:
+        """Requests new circuits for all future connections.
+
+        Falls back to restarting Tor if the control port cannot be used.
+        """
+        try:
+            self._command("SIGNAL NEWNYM")
+            logger.info("Requested a new Tor circuit.")
+        except (OSError, TorControlError) as e:
+            logger.warning("Could not request a new circuit (%s), restarting Tor.", e)
+            self.stop()
+            self.start()
+
+    def stop(self) -> None:
+        """Stops using Tor and stops it unless other processes still use it."""
+        with self._lock:
+            if not self._user.exists():
+                return
+            with self._exclusive():
+                self._user.unlink()
+                users = self._other_users()
+                if not users:
+                    self._terminate()
+                    return
+                if self._process is not None:
+                    # The other processes keep using this Tor process after this one exits
+                    logger.info("Leaving Tor running for %d other processes.", users)
+                    self._process = None
+
+    def _terminate(self) -> None:
+        from genai_pod.utilitys.bigjpg_upscaler import stop_tor
+
+        if self._process is not None:
+            if self.is_running:
+                stop_tor(self._process)
+            self._process = None
+            return
+        # Tor was started by a process that exited while others still used it
+        logger.info("Stopping the Tor process on control port %d.", self.control_port)
+        try:
+            self._command("SIGNAL HALT")
+        except (OSError, TorControlError) as e:
+            logger.debug("Tor did not confirm the halt: %s", e)
+
+    def _authentication(self) -> str:
+        """Returns the AUTHENTICATE command using the control cookie if present.
+
+        :return: The AUTHENTICATE command.
+        :rtype: str
+        """
+        cookie = self.data_directory / "control_auth_cookie"
+        if cookie.exists():
+            return f"AUTHENTICATE {cookie.read_bytes().hex()}"
+        return "AUTHENTICATE"
+
+    def _command(self, command: str) -> list[str]:
+        """Sends an authenticated command to the control port.
+
+        :param command: The control command, e.g. ``SIGNAL NEWNYM``.
+        :type command: str
+        :return: The reply lines of the command without status codes.
+        :rtype: list[str]
+        :raises TorControlError: If Tor rejects the authentication or the command.
+        """
+        with socket.create_connection(("127.0.0.1", self.control_port), timeout=10) as sock:
+            reader = sock.makefile("r", encoding="ascii", newline="\r\n")
+            replies = []
+            for line in (self._authentication(), command, "QUIT"):
+                sock.sendall(f"{line}\r\n".encode("ascii"))
+                replies.append(self._read_reply(reader))
+        return replies[1]
+
+    @staticmethod
+    def _read_reply(reader: TextIO) -> list[str]:
+        """Reads a complete reply of the control protocol.
+
+        :param reader: The file object of the control connection.
+        :type reader: TextIO
+        :return: The reply lines without status codes.
+        :rtype: list[str]
+        :raises TorControlError: If the reply status is not 250.
+        """
+        lines = []
+        while True:
+            line = reader.readline().rstrip("\r\n")
+            if len(line) < 4:
+                raise TorControlError(f"Malformed reply from control port: {line!r}")
+            status, separator, text = line[:3], line[3], line[4:]
+            if status != "250":
+                raise TorControlError(line)
+            lines.append(text)
+            if separator == " ":
+                return lines
+
+
+_manager: TorManager | None = None
+_manager_lock = Lock()
+
+
+def get_tor_manager(tor_binary_path: str | None = None) -> TorManager:
+    """Returns the Tor manager of this process, creating it on first use.
+
+    :param tor_binary_path: The path to the Tor binary, or None to use the one in PATH.
+    :type tor_binary_path: str | None
+    :return: The process-wide Tor manager.
+    :rtype: TorManager
+    """
+    global _manager  # pylint: disable=W0603
+    with _manager_lock:
+        if _manager is None:
+            _manager = TorManager(tor_binary_path)
+            atexit.register(_manager.stop)
+        return _manager
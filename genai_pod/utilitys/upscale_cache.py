@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module provides an on-disk cache for upscaled images.
+
+Features:
+- Entries are addressed by the SHA-256 of the input image bytes and the
+  upscaler settings, so re-running the same raw image is a cache hit no
+  matter where the file is located.
+- Entries are written atomically and the cache is kept below a size limit by
+  evicting the least recently used entries.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from hashlib import sha256
+from pathlib import Path
+from shutil import copyfile
+from threading import get_ident
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIRECTORY = Path.home() / ".cache" / "genai_pod" / "upscale"
+DEFAULT_CACHE_SIZE = 2 * 1024**3
+
+
+class UpscaleCache:
+    """Content-addressed LRU cache of upscaled images.
+
+    :param directory: The directory holding the cache entries.
+    :type directory: Path
+    :param max_bytes: The maximum total size of all entries in bytes.
+    :type max_bytes: int
+    """
+
+    def __init__(
+        self,
+        directory: Path = DEFAULT_CACHE_DIRECTORY,
+        max_bytes: int = DEFAULT_CACHE_SIZE,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+
+    @staticmethod
+    def key(image_path: str | Path, settings: dict[str, Any]) -> str:
+        """Computes the cache key of an image and the upscaler settings.
+
+        :param image_path: The path to the input image.
+        :type image_path: str | Path
+        :param settings: The settings that influence the upscaled result.
+        :type settings: dict[str, Any]
+        :return: The hexadecimal cache key.
+        :rtype: str
+        """
+        digest = sha256()
+        with Path(image_path).open("rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        digest.update(json.dumps(settings, sort_keys=True).encode())
+        return digest.hexdigest()
+
+    def _entry(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.png"
+
+    def get(self, key: str, destination: Path) -> Path | None:
+        """Copies a cached image to ``destination`` if it exists.
+
+        :param key: The cache key.
+        :type key: str
+        :param destination: The path to copy the cached image to.
+        :type destination: Path
+        :return: The destination path on a cache hit, None otherwise.
+        :rtype: Path | None
+        """
+        entry = self._entry(key)
+        if not entry.is_file():
+            return None
+        os.utime(entry)  # Mark the entry as recently used
+        copyfile(entry, destination)
+        logger.info("Upscale cache hit for %s", key[:12])
+        return destination
+
+    def put(self, key: str, source: Path) -> None:
+        """Stores an upscaled image in the cache and evicts old entries.
+
+        :param key: The cache key.
+        :type key: str
+        :param source: The path to the upscaled image.
+        :type source: Path
+        """
+        entry = self._entry(key)
+        entry.parent.mkdir(parents=True, exist_ok=True)
+        # Unique per writer, so workers storing the same image do not clobber each other
+        temporary = entry.with_suffix(f".{os.getpid()}-{get_ident()}.tmp")
+        try:
+            copyfile(source, temporary)
+            os.replace(temporary, entry)
+        except OSError as e:
+            logger.warning("Failed to store %s in the upscale cache: %s", source, e)
+            temporary.unlink(missing_ok=True)
+            return
+        self.evict()
+
+    def evict(self) -> None:
+        """Removes the least recently used entries until the size limit is met."""
+        entries = [
+            (stat.st_mtime, stat.st_size, path)
+            for path in self.directory.glob("*/*.png")
+            if (stat := path.stat())
+        ]
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            logger.debug("Evicted %s from the upscale cache", path.name)
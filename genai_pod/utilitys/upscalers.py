@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module provides the interchangeable upscaler backends used during generation.
+
+Features:
+- A common :class:`Upscaler` interface, so the generation process does not
+  depend on a specific upscaling service. Images are handed over in memory;
+  backends that need files write them to a scratch workspace.
+- :class:`BigjpgUpscaler`, which upscales images on bigjpg.com via Tor and
+  Selenium (see :mod:`genai_pod.utilitys.bigjpg_upscaler`). Images exceeding
+  the limits of bigjpg.com are detected locally and upscaled by a fallback
+  backend instead of being sent on a round trip that cannot succeed.
+- :class:`LocalUpscaler`, which upscales images on the local CPU using
+  multi-step Lanczos resampling and edge-aware sharpening. The image bands
+  are resampled concurrently in a thread pool.
+"""
+
+from __future__ import annotations
+
+import logging
+from abc import ABC, abstractmethod
+from math import ceil, log
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from PIL import Image
+
+    from genai_pod.utilitys.preflight import UpscalerLimits
+    from genai_pod.utilitys.upscale_cache import UpscaleCache
+    from genai_pod.utilitys.workspace import Workspace
+
+logger = logging.getLogger(__name__)
+
+
+class Upscaler(ABC):
+    """Interface of all upscaler backends.
+
+    :cvar name: The name used to select the backend on the command line.
+    :vartype name: str
+    """
+
+    name: str
+
+    @abstractmethod
+    def upscale(self, image_path: str, output_directory: Path) -> str | None:
+        """Upscales an image and saves the result to ``output_directory``.
+
+        :param image_path: The path to the image to upscale.
+        :type image_path: str
+        :param output_directory: The directory where the upscaled image will be saved.
+        :type output_directory: Path
+        :return: The path to the upscaled image or the original image_path if aborted.
+        :rtype: str | None
+        """
+
+    def upscale_image(
+        self,
+        image: Image.Image,
+        workspace: Workspace | None = None,
+    ) -> Image.Image:
+        """Upscales an image in memory.
+
+        The image is written to a scratch file of the workspace and upscaled
+        with :meth:`upscale`. Backends working in memory override this method.
+
+        :param image: The image to upscale.
+        :type image: PIL.Image.Image
+        :param workspace: The workspace for intermediate files. Defaults to None
+            (a temporary workspace).
+        :type workspace: Workspace | None
+        :return: The upscaled image or the original image if upscaling was aborted.
+        :rtype: PIL.Image.Image
+        """
+        from PIL import Image
+
+        from genai_pod.utilitys.workspace import Workspace
+
+        scratch = workspace or Workspace()
+        try:
+            source = scratch.file(suffix=".png")
+            image.save(source)
+            result = self.upscale(str(source), scratch.directory) or source
+            with Image.open(result) as upscaled:
+                return upscaled.copy()
+        finally:
+            if workspace is None:
+                scratch.close()
+
+    def close(self) -> None:
+        """Releases the resources of the backend, e.g. its browsers.
+
+        Backends without such resources do not override this method.
+        """
+        return
+
+
+class BigjpgUpscaler(Upscaler):
+    """Upscales images on bigjpg.com using a Tor-proxied headless Chrome.
+
+    Results are kept in an :class:`~genai_pod.utilitys.upscale_cache.UpscaleCache`,
+    so re-running the same raw image does not upscale it again. Before any
+    network work, the image is checked against the limits of bigjpg.com.
+    Images that would be rejected are upscaled by the fallback backend.
+
+    :param tor_binary_path: The path to the Tor binary, or None to use the one in PATH.
+    :type tor_binary_path: str | None
+    :param cache: The cache of upscaled images. Defaults to the cache in the
+        user's cache directory.
+    :type cache: UpscaleCache | None
+    :param driver_pool_size: The number of warm headless Chrome instances. Defaults to 2.
+    :type driver_pool_size: int
+    :param driver_max_jobs: The number of images after which a Chrome instance
+        is recycled. Defaults to 10.
+    :type driver_max_jobs: int
+    :param limits: The input limits of bigjpg.com. Defaults to the limits in
+        ``resources/upscaler_limits.json``.
+    :type limits: UpscalerLimits | None
+    :param fallback: The backend used for images exceeding the limits.
+        Defaults to a :class:`LocalUpscaler`.
+    :type fallback: Upscaler | None
+    """
+
+    name = "bigjpg"
+
+    def __init__(
+        self,
+        tor_binary_path: str | None = None,
+        cache: UpscaleCache | None = None,
+        driver_pool_size: int = 2,
+        driver_max_jobs: int = 10,
+        limits: UpscalerLimits | None = None,
+        fallback: Upscaler | None = None,
+    ) -> None:
+        from genai_pod.utilitys.bigjpg_upscaler import create_driver_pool
+        from genai_pod.utilitys.preflight import UpscalerLimits, load_limits
+        from genai_pod.utilitys.upscale_cache import UpscaleCache
+
+        self.tor_binary_path = tor_binary_path
+        self.cache = cache or UpscaleCache()
+        self.pool = create_driver_pool(driver_pool_size, driver_max_jobs)
+        self.limits = limits or load_limits().get(self.name, UpscalerLimits())
+        self.fallback = fallback or LocalUpscaler()
+        self.skipped_round_trips = 0
+
+    def upscale(self, image_path: str, output_directory: Path) -> str | None:
+        from genai_pod.utilitys.bigjpg_upscaler import upscale
+
+        if reasons := self.limits.check(image_path):
+            self.skipped_round_trips += 1
+            logger.warning(
+                "Image exceeds the limits of bigjpg.com (%s), upscaling it with the "
+                "%s upscaler instead. Skipped bigjpg round trips: %d",
+                ", ".join(reasons),
+                self.fallback.name,
+                self.skipped_round_trips,
+            )
+            return self.fallback.upscale(image_path, output_directory)
+
+        return upscale(
+            image_path,
+            output_directory,
+            self.tor_binary_path,
+            self.cache,
+            self.pool,
+        )
+
+    def close(self) -> None:
+        """Quits the warm Chrome instances of the driver pool."""
+        self.pool.close()
+        self.fallback.close()
+
+
+class LocalUpscaler(Upscaler):
+    """Upscales images on the local CPU.
+
+    The image is enlarged in steps of at most ``max_step`` using Lanczos
+    resampling. Afterwards, an unsharp mask is applied to the color bands,
+    weighted by an edge mask so that flat areas are not sharpened and no
+    noise is amplified. The alpha band is resampled only.
+
+    :param scale: The upscaling factor. Defaults to 2.
+    :type scale: float
+    :param workers: The number of threads resampling bands concurrently.
+        Defaults to one per band.
+    :type workers: int | None
+    :param max_step: The maximum scaling factor of a single resampling step.
+    :type max_step: float
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        scale: float = 2,
+        workers: int | None = None,
+        max_step: float = 1.5,
+    ) -> None:
+        if scale < 1:
+            raise ValueError("The upscaling factor must be at least 1.")
+        self.scale = scale
+        self.workers = workers
+        self.max_step = max_step
+
+    def _resample_band(self, band: Image.Image, size: tuple[int, int]) -> Image.Image:
+        """Enlarges a single band to ``size`` in multiple Lanczos steps.
+
+        :param band: The band to resample.
+        :type band: PIL.Image.Image
+        :param size: The target size.
+        :type size: tuple[int, int]
+        :return: The resampled band.
+        :rtype: PIL.Image.Image
+        """
+        from PIL import Image
+
+        steps = max(1, ceil(log(self.scale) / log(self.max_step))) if self.scale > 1 else 1
+        width, height = band.size
+        for step in range(1, steps + 1):
+            factor = self.scale ** (step / steps)
+            step_size = (
+                size if step == steps else (round(width * factor), round(height * factor))
+            )
+            band = band.resize(step_size, Image.Resampling.LANCZOS)
+        return band
+
+    @staticmethod
+    def _sharpen_edges(rgb: Image.Image) -> Image.Image:
+        """Sharpens an RGB image only along its edges.
+
+        :param rgb: The RGB image to sharpen.
+        :type rgb: PIL.Image.Image
+        :return: The sharpened RGB image.
+        :rtype: PIL.Image.Image
+        """
+        from PIL import Image, ImageFilter
+
+        edges = (
+            rgb.convert("L")
+            .filter(ImageFilter.FIND_EDGES)
+            .filter(ImageFilter.MaxFilter(3))
+            .filter(ImageFilter.GaussianBlur(1))
+            .point(lambda value: min(255, value * 4))
+        )
+        sharpened = rgb.filter(ImageFilter.UnsharpMask(radius=1.5, percent=80, threshold=2))
+        return Image.composite(sharpened, rgb, edges)
+
+    def upscale_image(
+        self,
+        image: Image.Image,
+        workspace: Workspace | None = None,
+    ) -> Image.Image:
+        """Upscales an image in memory.
+
+        :param image: The image to upscale.
+        :type image: PIL.Image.Image
+        :param workspace: Unused, the image is upscaled without intermediate files.
+        :type workspace: Workspace | None
+        :return: The upscaled image in RGB or RGBA mode.
+        :rtype: PIL.Image.Image
+        """
+        from concurrent.futures import ThreadPoolExecutor
+
+        from PIL import Image
+
+        if image.mode not in {"RGB", "RGBA"}:
+            image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+        size = (round(image.width * self.scale), round(image.height * self.scale))
+
+        bands = image.split()
+        with ThreadPoolExecutor(max_workers=self.workers or len(bands)) as executor:
+            resampled = list(executor.map(lambda band: self._resample_band(band, size), bands))
+
+        rgb = self._sharpen_edges(Image.merge("RGB", resampled[:3]))
+        if image.mode == "RGBA":
+            rgb.putalpha(resampled[3])
+        return rgb
+
+    def upscale(self, image_path: str, output_directory: Path) -> str | None:
+        from PIL import Image
+
+        with Image.open(image_path) as image:
+            upscaled = self.upscale_image(image)
+        upscaled_path = Path(output_directory) / f"{Path(image_path).stem}_upscaled.png"
+        upscaled.save(upscaled_path)
+        logger.info("Image upscaled locally to %dx%d.", *upscaled.size)
+        return str(upscaled_path)
+
+
+UPSCALERS: dict[str, type[Upscaler]] = {
+    BigjpgUpscaler.name: BigjpgUpscaler,
+    LocalUpscaler.name: LocalUpscaler,
+}
+
+
+def create_upscaler(name: str, **options: Any) -> Upscaler:
+    """Creates the upscaler backend with the given name.
+
+    :param name: The name of the backend, one of :data:`UPSCALERS`.
+    :type name: str
+    :param options: Keyword arguments passed to the backend, e.g. ``tor_binary_path``
+        for the bigjpg backend.
+    :type options: Any
+    :return: The upscaler backend.
+    :rtype: Upscaler
+    :raises ValueError: If the backend is unknown.
+    """
+    if name not in UPSCALERS:
+        raise ValueError(f"Unknown upscaler: {name}")
+    return UPSCALERS[name](**options)
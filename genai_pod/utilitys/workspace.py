@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""This module provides a scratch workspace for intermediate files.
+
+Features:
+- Creates a private scratch directory, optionally below a given root such as
+  a tmpfs mount (e.g. ``/dev/shm``), for files that only exist because a
+  stage needs a path on disk (e.g. a browser upload).
+- Removes the scratch directory with all files when the workspace is closed,
+  also if the run failed, so no temporary files are leaked.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from pathlib import Path
+from shutil import rmtree
+from tempfile import mkdtemp, mkstemp
+from types import TracebackType
+
+logger = logging.getLogger(__name__)
+
+
+class Workspace:
+    """A scratch directory that is removed when the workspace is closed.
+
+    Use it as a context manager::
+
+        with Workspace("/dev/shm") as workspace:
+            path = workspace.file(suffix=".png")
+
+    :param root: The directory in which the scratch directory is created.
+        Defaults to None (the system's temporary directory).
+    :type root: str | Path | None
+    """
+
+    def __init__(self, root: str | Path | None = None) -> None:
+        if root is not None:
+            Path(root).mkdir(parents=True, exist_ok=True)
+        self.directory = Path(mkdtemp(prefix="genai_pod_", dir=root))
+        logger.debug("Created workspace %s", self.directory)
+
+    def file(self, suffix: str = "", prefix: str = "") -> Path:
+        """Creates a new, empty file with a unique name in the workspace.
+
+        :param suffix: The suffix of the file name, e.g. ``.png``.
+        :type suffix: str
+        :param prefix: The prefix of the file name.
+        :type prefix: str
+        :return: The path to the file.
+        :rtype: Path
+        """
+        handle, name = mkstemp(suffix=suffix, prefix=prefix, dir=self.directory)
+        os.close(handle)
+        return Path(name)
+
+    def close(self) -> None:
+        """Removes the workspace and all files in it."""
+        rmtree(self.directory, ignore_errors=True)
+        logger.debug("Removed workspace %s", self.directory)
+
+    def __enter__(self) -> Workspace:
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        self.close()
@@ -24,12 +24,18 @@ import logging
 from collections.abc import Callable
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import undetected_chromedriver as uc
 
+if TYPE_CHECKING:
+    from PIL import Image, ImageFilter
+
 logger = logging.getLogger(__name__)
 
+PILLING_BLUR_RADIUS = 1
+PILLING_DPI = 300
+
 
 @dataclass
 class UploadConfig:
@@ -45,6 +51,9 @@ class UploadConfig:
     :vartype error_folder_name: str
     :ivar exclude_folders: A list of folder names to exclude from processing. Defaults to None.
     :vartype exclude_folders: list[str] | None
+    :ivar shop: The shop whose derivative is uploaded instead of the design image,
+        if one was rendered. Defaults to None.
+    :vartype shop: str | None
     """
 
     upload_path: str
@@ -52,9 +61,15 @@ class UploadConfig:
     used_folder_name: str
     error_folder_name: str
     exclude_folders: list[str] | None
+    shop: str | None = None
 
 
-def start_chrome(chrome_profile: str, output_directory: Path | None) -> uc.Chrome:
+def start_chrome(
+    chrome_profile: str,
+    output_directory: Path | None,
+    user_data_dir: Path | None = None,
+    debugging_port: int | None = None,
+) -> uc.Chrome:
     """Launches a Chrome browser instance using the specified parameters.
 
     The `chrome_profile` parameter is always required. If `output_directory` is provided,
@@ -65,6 +80,12 @@ def start_chrome(chrome_profile: str, output_directory: Path | None) -> uc.Chrom
     :param output_directory: The directory where downloads will be saved,
     or None if no such directory is specified.
     :type output_directory: Path | None
+    :param user_data_dir: The Chrome user data directory containing the profile.
+        Defaults to None (the ``chromedata`` directory).
+    :type user_data_dir: Path | None
+    :param debugging_port: The remote debugging port. Defaults to None (9222 if
+        `output_directory` is provided, otherwise a free port).
+    :type debugging_port: int | None
     :return: An instance of the undetected_chromedriver Chrome WebDriver.
     :rtype: uc.Chrome
     """
@@ -72,7 +93,7 @@ def start_chrome(chrome_profile: str, output_directory: Path | None) -> uc.Chrom
         AbortScriptError,
     )
 
-    user_data_dir = Path("chromedata").resolve()
+    user_data_dir = user_data_dir or Path("chromedata").resolve()
 
     try:
         used_profile_dir, used_profile_name = _prepare_profile_directory(
@@ -84,6 +105,7 @@ def start_chrome(chrome_profile: str, output_directory: Path | None) -> uc.Chrom
             used_profile_dir,
             used_profile_name,
             output_directory,
+            debugging_port,
         )
         driver = _launch_chrome(chrome_options)
 
@@ -161,6 +183,7 @@ def _build_chrome_options(
     user_data_dir: Path,
     profile_name: str,
     output_directory: Path | None,
+    debugging_port: int | None = None,
 ) -> uc.ChromeOptions:
     """Constructs and configures ChromeOptions for undetected_chromedriver.
 
@@ -173,6 +196,10 @@ def _build_chrome_options(
     :type profile_name: str
     :param output_directory: The directory for downloads, or None if not required.
     :type output_directory: Path | None
+    :param debugging_port: The remote debugging port, e.g. to run several browsers
+        side by side. Defaults to None (9222 if `output_directory` is provided,
+        otherwise a free port chosen by undetected_chromedriver).
+    :type debugging_port: int | None
     :return: Configured ChromeOptions instance.
     :rtype: uc.ChromeOptions
     """
@@ -182,8 +209,13 @@ def _build_chrome_options(
     chrome_options.add_argument(f"--profile-directory={profile_name}")
     chrome_options.add_argument("-lang=de-DE")
 
+    if output_directory and debugging_port is None:
+        debugging_port = 9222
+    if debugging_port is not None:
+        # undetected_chromedriver launches Chrome on the port of the debugger address
+        chrome_options.debugger_address = f"127.0.0.1:{debugging_port}"
+
     if output_directory:
-        chrome_options.add_argument("--remote-debugging-port=9222")
         chrome_options.add_argument("--disable-notifications")
         chrome_options.add_argument("--disable-popup-blocking")
         chrome_options.add_experimental_option(
@@ -388,9 +420,14 @@ def process_subdir(
     """
     from shutil import move
 
+    from genai_pod.utilitys.derivatives import read_derivative
+
     logger.info("Starting to process subdir: %s", subdir)
     try:
-        image_file = find_image_file(subdir)
+        derivative = read_derivative(subdir, config.shop) if config.shop else None
+        image_file = (
+            subdir / derivative.file if derivative is not None else find_image_file(subdir)
+        )
 
         # Validate and read required files
         description_text = read_file_contents(subdir / "description.txt")
@@ -530,7 +567,342 @@ def load_cookies(driver: uc.Chrome, path: Path) -> None:
             logger.exception("Unexpected error adding cookie: %s", e)
 
 
-def pilling_image(image_path: str, trim_cm: float = 0.1) -> None:
+def _min_filter_1d(arr: Any, radius: int, axis: int) -> Any:
+    """Applies a 1-D minimum filter of width ``2 * radius + 1`` along ``axis``.
+
+    Uses the van Herk/Gil-Werman scheme, so the cost per pixel is constant
+    regardless of the radius. Borders are extended by replicating the edge
+    pixels, which matches the behavior of :class:`PIL.ImageFilter.MinFilter`.
+
+    :param arr: The array to filter.
+    :type arr: numpy.ndarray
+    :param radius: The radius of the window in pixels.
+    :type radius: int
+    :param axis: The axis along which to filter.
+    :type axis: int
+    :return: The filtered array with the same shape and dtype as ``arr``.
+    :rtype: numpy.ndarray
+    """
+    import numpy as np
+
+    window = 2 * radius + 1
+    moved = np.moveaxis(arr, axis, -1)
+    length = moved.shape[-1]
+
+    # Pad to cover the window on both sides and round up to full blocks
+    padded_length = -(-(length + 2 * radius) // window) * window
+    pad = [(0, 0)] * (moved.ndim - 1) + [(radius, padded_length - length - radius)]
+    padded = np.pad(moved, pad, mode="edge")
+
+    blocks = padded.reshape(*padded.shape[:-1], -1, window)
+    prefix = np.minimum.accumulate(blocks, axis=-1).reshape(padded.shape)
+    suffix = np.minimum.accumulate(blocks[..., ::-1], axis=-1)[..., ::-1].reshape(
+        padded.shape
+    )
+
+    result = np.minimum(suffix[..., :length], prefix[..., window - 1 : window - 1 + length])
+    return np.moveaxis(result, -1, axis)
+
+
+def erode_alpha(
+    alpha: Image.Image,
+    erosion_pixels: int,
+    engine: str = "separable",
+) -> Image.Image:
+    """Erodes an alpha channel by ``erosion_pixels`` in every direction.
+
+    The ``separable`` engine computes the square minimum filter of size
+    ``2 * erosion_pixels + 1`` in a single vectorized pass per axis. The
+    ``iterative`` engine applies a 3x3 :class:`PIL.ImageFilter.MinFilter`
+    ``erosion_pixels`` times and is kept for comparison.
+
+    :param alpha: The alpha channel as single band image.
+    :type alpha: PIL.Image.Image
+    :param erosion_pixels: The number of pixels to trim from the edges.
+    :type erosion_pixels: int
+    :param engine: The erosion engine, either "separable" or "iterative".
+    :type engine: str
+    :return: The eroded alpha channel.
+    :rtype: PIL.Image.Image
+    :raises ValueError: If the engine is unknown.
+    """
+    import numpy as np
+    from PIL import Image, ImageFilter
+
+    if engine == "iterative":
+        for _ in range(erosion_pixels):
+            alpha = alpha.filter(ImageFilter.MinFilter(3))
+        return alpha
+    if engine != "separable":
+        raise ValueError(f"Unknown erosion engine: {engine}")
+    if erosion_pixels <= 0:
+        return alpha
+
+    arr = np.asarray(alpha)
+    arr = _min_filter_1d(arr, erosion_pixels, axis=0)
+    arr = _min_filter_1d(arr, erosion_pixels, axis=1)
+    return Image.fromarray(np.ascontiguousarray(arr), alpha.mode)
+
+
+def _smooth_sharpen_kernel() -> ImageFilter.Kernel:
+    """Returns a single 5x5 kernel equivalent to ``SMOOTH`` followed by ``SHARPEN``.
+
+    The kernel is the convolution of both 3x3 kernels. Applying it once
+    differs from the two separate passes only by the rounding of the
+    intermediate result.
+
+    :return: The fused kernel filter.
+    :rtype: PIL.ImageFilter.Kernel
+    """
+    import numpy as np
+    from PIL import ImageFilter
+
+    _, smooth_scale, _, smooth = ImageFilter.SMOOTH.filterargs
+    _, sharpen_scale, _, sharpen = ImageFilter.SHARPEN.filterargs
+    smooth_kernel = np.array(smooth).reshape(3, 3)
+    sharpen_kernel = np.array(sharpen).reshape(3, 3)
+
+    fused = np.zeros((5, 5), dtype=np.int64)
+    for y in range(3):
+        for x in range(3):
+            fused[y : y + 3, x : x + 3] += smooth_kernel[y, x] * sharpen_kernel
+    return ImageFilter.Kernel(
+        (5, 5),
+        fused.ravel().tolist(),
+        scale=smooth_scale * sharpen_scale,
+    )
+
+
+def _blend_float(img: Image.Image) -> Image.Image:
+    """Blends the semi-transparent pixels of an RGBA image with white using float32.
+
+    :param img: The RGBA image with the final alpha channel.
+    :type img: PIL.Image.Image
+    :return: The blended RGBA image with a binary alpha channel.
+    :rtype: PIL.Image.Image
+    """
+    import numpy as np
+    from PIL import Image, ImageFilter
+
+    arr = np.array(img).astype(np.float32)
+    rgb, a = arr[..., :3], arr[..., 3]
+
+    mask = np.clip((a - 64) / 128, 0, 1)[..., None]
+    blended = rgb * mask + 255 * (1 - mask)
+
+    final = np.dstack((blended, np.where(a > 64, 255, 0).astype(np.uint8))).astype(np.uint8)
+
+    return (
+        Image.fromarray(final, "RGBA").filter(ImageFilter.SMOOTH).filter(ImageFilter.SHARPEN)
+    )
+
+
+def _blend_fixed(img: Image.Image) -> Image.Image:
+    """Blends the semi-transparent pixels of an RGBA image with white in fixed-point.
+
+    The blend weight ``(alpha - 64) / 128`` is represented as an integer in
+    ``[0, 128]``, so every channel is computed in a single uint16 buffer and
+    written back into the uint8 pixel array in place. The trailing ``SMOOTH``
+    and ``SHARPEN`` passes are fused into one 5x5 kernel.
+
+    :param img: The RGBA image with the final alpha channel.
+    :type img: PIL.Image.Image
+    :return: The blended RGBA image with a binary alpha channel.
+    :rtype: PIL.Image.Image
+    """
+    import numpy as np
+    from PIL import Image
+
+    arr = np.array(img)
+    a = arr[..., 3]
+
+    weight = np.clip(a, 64, 192).astype(np.uint16)
+    weight -= 64
+    background = np.subtract(128, weight, dtype=np.uint16)
+    background *= 255
+
+    channel = np.empty(a.shape, dtype=np.uint16)
+    for c in range(3):
+        np.multiply(arr[..., c], weight, out=channel)
+        channel += background
+        channel >>= 7
+        arr[..., c] = channel
+    del weight, background, channel
+
+    np.multiply(a > 64, 255, out=a, casting="unsafe")
+    return Image.fromarray(arr, "RGBA").filter(_smooth_sharpen_kernel())
+
+
+def _finish_rgba(
+    img: Image.Image,
+    erosion_pixels: int,
+    erosion_engine: str,
+    blend: str = "float",
+) -> Image.Image:
+    """Trims, blends and sharpens an RGBA image or an RGBA tile of an image.
+
+    :param img: The RGBA image to finish.
+    :type img: PIL.Image.Image
+    :param erosion_pixels: The number of pixels to trim from the edges.
+    :type erosion_pixels: int
+    :param erosion_engine: The engine used to erode the alpha channel.
+    :type erosion_engine: str
+    :param blend: The blending implementation, either "float" or "fixed".
+    :type blend: str
+    :return: The finished RGBA image.
+    :rtype: PIL.Image.Image
+    :raises ValueError: If the blending implementation is unknown.
+    """
+    from PIL import ImageFilter
+
+    if blend not in {"float", "fixed"}:
+        raise ValueError(f"Unknown blending implementation: {blend}")
+
+    alpha = erode_alpha(img.getchannel("A"), erosion_pixels, erosion_engine)
+    alpha = alpha.filter(ImageFilter.GaussianBlur(PILLING_BLUR_RADIUS))
+    img.putalpha(alpha)
+
+    if blend == "fixed":
+        return _blend_fixed(img)
+    return _blend_float(img)
+
+
+def _pilling_halo(erosion_pixels: int) -> int:
+    """Returns the number of context rows a tile needs to be finished exactly.
+
+    The erosion reaches ``erosion_pixels`` rows, the Gaussian blur three times
+    its radius and the trailing ``SMOOTH`` and ``SHARPEN`` filters one row each.
+
+    :param erosion_pixels: The number of pixels to trim from the edges.
+    :type erosion_pixels: int
+    :return: The halo size in rows.
+    :rtype: int
+    """
+    from math import ceil
+
+    return erosion_pixels + ceil(3 * PILLING_BLUR_RADIUS) + 2
+
+
+def _finish_rgba_tiled(
+    img: Image.Image,
+    erosion_pixels: int,
+    erosion_engine: str,
+    tile_rows: int,
+    tile_workers: int,
+    blend: str = "float",
+) -> Image.Image:
+    """Finishes an RGBA image in horizontal strips of ``tile_rows`` rows.
+
+    Each strip is cropped with a halo of context rows above and below, so the
+    result is identical to finishing the whole image at once, while the float
+    temporaries only ever cover a single strip.
+
+    :param img: The RGBA image to finish.
+    :type img: PIL.Image.Image
+    :param erosion_pixels: The number of pixels to trim from the edges.
+    :type erosion_pixels: int
+    :param erosion_engine: The engine used to erode the alpha channel.
+    :type erosion_engine: str
+    :param tile_rows: The number of output rows per strip.
+    :type tile_rows: int
+    :param tile_workers: The number of threads finishing strips concurrently.
+    :type tile_workers: int
+    :param blend: The blending implementation, either "float" or "fixed".
+    :type blend: str
+    :return: The finished RGBA image.
+    :rtype: PIL.Image.Image
+    """
+    from concurrent.futures import ThreadPoolExecutor
+
+    from PIL import Image
+
+    width, height = img.size
+    halo = _pilling_halo(erosion_pixels)
+
+    def finish_strip(top: int) -> tuple[int, Image.Image]:
+        bottom = min(top + tile_rows, height)
+        crop_top, crop_bottom = max(top - halo, 0), min(bottom + halo, height)
+        strip = _finish_rgba(
+            img.crop((0, crop_top, width, crop_bottom)),
+            erosion_pixels,
+            erosion_engine,
+            blend,
+        )
+        return top, strip.crop((0, top - crop_top, width, bottom - crop_top))
+
+    result = Image.new("RGBA", img.size)
+    with ThreadPoolExecutor(max_workers=tile_workers) as executor:
+        for top, strip in executor.map(finish_strip, range(0, height, tile_rows)):
+            result.paste(strip, (0, top))
+    return result
+
+
+def finish_image(
+    image: Image.Image,
+    trim_cm: float = 0.1,
+    erosion_engine: str = "separable",
+    tile_rows: int | None = None,
+    tile_workers: int = 1,
+    blend: str = "float",
+) -> Image.Image:
+    """Finishes an image in memory, see :func:`pilling_image`.
+
+    :param image: The image to finish.
+    :type image: PIL.Image.Image
+    :param trim_cm: The amount of trimming in centimeters. Default is 0.1 cm.
+    :type trim_cm: float
+    :param erosion_engine: The engine used to erode the alpha channel.
+    :type erosion_engine: str
+    :param tile_rows: If set, the image is processed in horizontal strips of
+        this many rows. Defaults to None (untiled).
+    :type tile_rows: int | None
+    :param tile_workers: The number of threads processing strips concurrently
+        in tiled mode. Defaults to 1.
+    :type tile_workers: int
+    :param blend: The blending implementation, "float" or "fixed".
+    :type blend: str
+    :return: The finished RGBA image.
+    :rtype: PIL.Image.Image
+    :raises ValueError: If ``tile_rows`` or ``tile_workers`` is not positive.
+    """
+    if tile_rows is not None and tile_rows <= 0:
+        raise ValueError("tile_rows must be a positive number of rows.")
+    if tile_workers <= 0:
+        raise ValueError("tile_workers must be a positive number of threads.")
+
+    erosion_pixels = int(trim_cm * PILLING_DPI / 2.54)
+    with image.convert("RGBA") as img:
+        if tile_rows is None:
+            return _finish_rgba(img, erosion_pixels, erosion_engine, blend)
+        return _finish_rgba_tiled(
+            img,
+            erosion_pixels,
+            erosion_engine,
+            tile_rows,
+            tile_workers,
+            blend,
+        )
+
+
+def save_finished_image(image: Image.Image, path: str | Path) -> None:
+    """Saves a finished image with the print resolution.
+
+    :param image: The finished image.
+    :type image: PIL.Image.Image
+    :param path: The path of the PNG file.
+    :type path: str | Path
+    """
+    image.save(path, dpi=(PILLING_DPI, PILLING_DPI))
+
+
+def pilling_image(
+    image_path: str,
+    trim_cm: float = 0.1,
+    erosion_engine: str = "separable",
+    tile_rows: int | None = None,
+    tile_workers: int = 1,
+    blend: str = "float",
+) -> None:
     """Processes an image by adjusting transparency and blending
     it with a white background more efficiently.
 
@@ -538,44 +910,47 @@ def pilling_image(image_path: str, trim_cm: float = 0.1) -> None:
     :type image_path: str
     :param trim_cm: The amount of trimming in centimeters. Default is 0.2 cm.
     :type trim_cm: float
+    :param erosion_engine: The engine used to erode the alpha channel, either
+        "separable" (single pass) or "iterative" (repeated 3x3 min filter).
+    :type erosion_engine: str
+    :param tile_rows: If set, the image is processed in horizontal strips of
+        this many rows to bound the peak memory. The result is identical to
+        the untiled processing. Defaults to None (untiled).
+    :type tile_rows: int | None
+    :param tile_workers: The number of threads processing strips concurrently
+        in tiled mode. Defaults to 1.
+    :type tile_workers: int
+    :param blend: The blending implementation. "float" blends in float32,
+        "fixed" blends in place in uint16 fixed-point and fuses the trailing
+        smooth and sharpen filters. Both results differ by at most a few
+        levels per channel. Defaults to "float".
+    :type blend: str
+    :raises ValueError: If ``tile_rows`` or ``tile_workers`` is not positive.
 
     This function performs the following steps:
     1. Opens the image and converts it to RGBA mode for transparency handling.
-    2. Converts the image into a NumPy array for efficient processing.
-    3. Creates masks based on the alpha (transparency) values of the pixels.
+    2. Erodes the alpha channel to trim the edges of the design.
+    3. Converts the image into a NumPy array for efficient processing.
+    4. Creates masks based on the alpha (transparency) values of the pixels.
        - Pixels with alpha greater than 153 (more than 60% opacity) are
          adjusted.
        - Pixels with alpha 153 or less (60% or less opacity) are made fully
          transparent.
-    4. Adjusts the RGB values of the pixels with high opacity, blending them
+    5. Adjusts the RGB values of the pixels with high opacity, blending them
        with white background.
-    5. Sets the alpha channel of adjusted pixels to full opacity (255).
-    6. Saves the modified image as a new PNG file with "_customized" added to
+    6. Sets the alpha channel of adjusted pixels to full opacity (255).
+    7. Saves the modified image as a new PNG file with "_customized" added to
        the original filename.
     """
-    import numpy as np
-    from PIL import Image, ImageFilter
-
-    dpi = 300
-    erosion_pixels = int(trim_cm * dpi / 2.54)
-
-    with Image.open(image_path).convert("RGBA") as img:
-        alpha = img.split()[3]
-        for _ in range(erosion_pixels):
-            alpha = alpha.filter(ImageFilter.MinFilter(3))
-        alpha = alpha.filter(ImageFilter.GaussianBlur(1))
-        img.putalpha(alpha)
-
-        arr = np.array(img).astype(np.float32)
-        rgb, a = arr[..., :3], arr[..., 3]
-
-        mask = np.clip((a - 64) / 128, 0, 1)[..., None]
-        blended = rgb * mask + 255 * (1 - mask)
-
-        final = np.dstack((blended, np.where(a > 64, 255, 0).astype(np.uint8))).astype(
-            np.uint8
+    from PIL import Image
+
+    with Image.open(image_path) as image:
+        final = finish_image(
+            image,
+            trim_cm,
+            erosion_engine,
+            tile_rows,
+            tile_workers,
+            blend,
         )
-
-        Image.fromarray(final, "RGBA").filter(ImageFilter.SMOOTH).filter(
-            ImageFilter.SHARPEN
-        ).save(image_path.replace(".png", "_pil.png"), dpi=(dpi, dpi))
+    save_finished_image(final, image_path.replace(".png", "_pil.png"))
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+"""Benchmarks the blending implementations of ``pilling_image``.
+
+Every measurement runs in a fresh subprocess, so the reported peak memory is
+the increase of the peak resident set size caused by finishing one synthetic
+design, excluding PNG decoding and encoding.
+
+Usage::
+
+    PYTHONPATH=. python scripts/benchmark_pilling.py [--sizes 1000 2000 4000 8000]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+from time import perf_counter
+
+
+def _peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def measure(size: int, blend: str) -> dict[str, float]:
+    from PIL import Image, ImageDraw
+
+    from genai_pod.utils import _finish_rgba
+
+    gradient = Image.linear_gradient("L").resize((size, size))
+    alpha = Image.new("L", (size, size), 0)
+    ImageDraw.Draw(alpha).ellipse((size // 6, size // 6, size * 5 // 6, size * 5 // 6), fill=255)
+    img = Image.merge(
+        "RGBA",
+        (gradient, gradient.transpose(Image.Transpose.ROTATE_90), gradient.effect_spread(8), alpha),
+    )
+
+    baseline = _peak_rss_mb()
+    start = perf_counter()
+    _finish_rgba(img, erosion_pixels=11, erosion_engine="separable", blend=blend)
+    return {"seconds": perf_counter() - start, "peak_mb": _peak_rss_mb() - baseline}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 4000, 8000])
+    parser.add_argument("--measure", nargs=2, metavar=("SIZE", "BLEND"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(int(args.measure[0]), args.measure[1])))
+        return
+
+    print(f"{'size':>6} {'blend':>6} {'time [s]':>9} {'peak [MB]':>10}")
+    for size in args.sizes:
+        for blend in ("float", "fixed"):
+            output = subprocess.run(  # noqa: S603
+                [sys.executable, __file__, "--measure", str(size), blend],
+                check=True,
+                capture_output=True,
+                text=True,
+            ).stdout
+            result = json.loads(output)
+            print(f"{size:>6} {blend:>6} {result['seconds']:>9.2f} {result['peak_mb']:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+from datetime import UTC, datetime, timedelta
+
+import pytest
+
+from genai_pod.utilitys.account_pool import AccountPool
+
+NOW = datetime(2024, 11, 1, 12, 0, tzinfo=UTC)
+
+
+def test_account_pool_rotates_to_next_account(tmp_path):
+    pool = AccountPool(["ChatGPT", "ChatGPT-2"], tmp_path / "cooldowns.json")
+    assert pool.acquire(NOW) == "ChatGPT"
+
+    pool.cool_down("ChatGPT", NOW + timedelta(hours=2))
+
+    assert pool.acquire(NOW) == "ChatGPT-2"
+    assert pool.acquire(NOW + timedelta(hours=2, seconds=1)) == "ChatGPT"
+
+
+def test_account_pool_persists_cooldowns(tmp_path):
+    state_file = tmp_path / "cooldowns.json"
+    AccountPool(["ChatGPT", "ChatGPT-2"], state_file).cool_down("ChatGPT", NOW + timedelta(hours=1))
+    AccountPool(["ChatGPT", "ChatGPT-2"], state_file).cool_down(
+        "ChatGPT-2",
+        NOW + timedelta(minutes=30),
+    )
+
+    pool = AccountPool(["ChatGPT", "ChatGPT-2"], state_file)
+
+    assert pool.acquire(NOW) is None
+    assert pool.next_available(NOW) == NOW + timedelta(minutes=30)
+
+
+def test_account_pool_ignores_corrupt_state(tmp_path):
+    state_file = tmp_path / "cooldowns.json"
+    state_file.write_text("{", encoding="utf-8")
+
+    assert AccountPool(["ChatGPT"], state_file).acquire(NOW) == "ChatGPT"
+
+
+def test_account_pool_requires_profiles():
+    with pytest.raises(ValueError, match="at least one profile"):
+        AccountPool([])
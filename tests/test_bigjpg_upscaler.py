@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from genai_pod.utilitys.bigjpg_upscaler import monitor_progress
+
+
+def _driver(*batches):
+    driver = MagicMock()
+    driver.execute_async_script.side_effect = list(batches)
+    return driver
+
+
+def test_monitor_progress_returns_on_completion_event():
+    driver = _driver(
+        [{"type": "progress", "percent": 0}],
+        [{"type": "progress", "percent": 40}, {"type": "progress", "percent": 100}],
+    )
+    assert monitor_progress(driver) == "success"
+    assert driver.execute_async_script.call_count == 2
+
+
+@pytest.mark.parametrize("event", ["warning", "image_too_big"])
+def test_monitor_progress_returns_on_warnings(event):
+    driver = _driver([{"type": "progress", "percent": 20}], [{"type": event}])
+    assert monitor_progress(driver) == event
+
+
+def test_monitor_progress_reinstalls_lost_observer():
+    driver = _driver(None, [{"type": "progress", "percent": 100}])
+    assert monitor_progress(driver) == "success"
+    assert driver.execute_script.call_count == 2
+
+
+def test_monitor_progress_detects_stall_at_zero():
+    driver = _driver(*([[{"type": "progress", "percent": 0}]] + [[]] * 5))
+    with (
+        patch("genai_pod.utilitys.bigjpg_upscaler.time", side_effect=[0, 30, 61]),
+        pytest.raises(Exception, match="Stuck for over 1min at 0%"),
+    ):
+        monitor_progress(driver)
+
+
+def _image_bytes(image_format):
+    from io import BytesIO
+
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new("RGB", (8, 8), (10, 200, 30)).save(buffer, format=image_format)
+    return buffer.getvalue()
+
+
+def test_download_data_url_keeps_png_bytes(tmp_path):
+    from base64 import b64encode
+
+    from genai_pod.utilitys.bigjpg_upscaler import _download_and_process_image
+
+    png = _image_bytes("PNG")
+    url = f"data:image/png;base64,{b64encode(png).decode()}"
+
+    result = _download_and_process_image(url, "design", tmp_path)
+
+    assert result == tmp_path / "design.png"
+    assert result.read_bytes() == png
+    assert list(tmp_path.iterdir()) == [result]
+
+
+def test_download_transcodes_jpeg_to_png(tmp_path):
+    from base64 import b64encode
+
+    from PIL import Image
+
+    from genai_pod.utilitys.bigjpg_upscaler import _download_and_process_image
+
+    url = f"data:image/jpeg;base64,{b64encode(_image_bytes('JPEG')).decode()}"
+    result = _download_and_process_image(url, "design", tmp_path)
+
+    with Image.open(result) as image:
+        assert image.format == "PNG"
+        assert image.size == (8, 8)
+
+
+def _response(status_code, chunks, error=None):
+    response = MagicMock()
+    response.status_code = status_code
+    response.raw.tell.return_value = sum(map(len, chunks))
+    response.elapsed = timedelta(milliseconds=50)
+
+    def iter_content(_chunk_size):
+        yield from chunks
+        if error is not None:
+            raise error
+
+    response.iter_content.side_effect = iter_content
+    return response
+
+
+def _client(responses):
+    from genai_pod.utilitys.http_client import HttpClient
+
+    client = HttpClient()
+    session = MagicMock()
+    session.get.side_effect = responses
+    client.session = MagicMock(return_value=session)
+    return client
+
+
+def test_download_resumes_interrupted_transfer(tmp_path):
+    from requests.exceptions import ChunkedEncodingError
+
+    from genai_pod.utilitys.bigjpg_upscaler import _download_and_process_image
+
+    png = _image_bytes("PNG")
+    responses = [
+        _response(200, [png[:20]], ChunkedEncodingError("connection lost")),
+        _response(206, [png[20:]]),
+    ]
+    client = _client(responses)
+    with patch("genai_pod.utilitys.bigjpg_upscaler.get_http_client", return_value=client):
+        result = _download_and_process_image("https://bigjpg.com/x", "design", tmp_path)
+
+    assert result.read_bytes() == png
+    mock_get = client.session().get
+    assert mock_get.call_args_list[1].kwargs["headers"] == {"Range": "bytes=20-"}
+    assert client.stats()["bigjpg.com"].bytes == len(png)
+
+
+def test_download_rejects_non_images(tmp_path):
+    from genai_pod.utilitys.bigjpg_upscaler import _download_and_process_image
+
+    with (
+        patch(
+            "genai_pod.utilitys.bigjpg_upscaler.get_http_client",
+            return_value=_client([_response(200, [b"<html>Not found</html>"])]),
+        ),
+        pytest.raises(ValueError, match="not a supported image"),
+    ):
+        _download_and_process_image("https://bigjpg.com/x", "design", tmp_path)
+    assert not list(tmp_path.iterdir())
+
+
+@pytest.mark.parametrize("status", [None, "success"])
+def test_upscale_recycles_driver_unless_download_succeeded(tmp_path, status):
+    from genai_pod.utilitys import bigjpg_upscaler
+
+    pool = MagicMock()
+    with (
+        patch.object(bigjpg_upscaler, "sleep"),
+        patch.object(bigjpg_upscaler, "handle_initial_status", return_value=False),
+        patch.object(bigjpg_upscaler, "upload_image"),
+        patch.object(bigjpg_upscaler, "handle_post_upload_status", return_value=False),
+        patch.object(bigjpg_upscaler, "initiate_upscaling"),
+        patch.object(bigjpg_upscaler, "monitor_progress", return_value=status),
+        patch.object(bigjpg_upscaler, "get_download_url", return_value="https://x/y.png"),
+        patch.object(
+            bigjpg_upscaler,
+            "_download_and_process_image",
+            side_effect=OSError("disk full"),
+        ),
+    ):
+        assert bigjpg_upscaler.upscale_bigjpg("design.png", tmp_path, pool=pool) == "design.png"
+
+    assert pool.release.call_count == 3
+    assert all(call.kwargs["failed"] for call in pool.release.call_args_list)
+
+
+def test_upscale_gives_up_without_pooled_driver(tmp_path):
+    from queue import Empty
+
+    from genai_pod.utilitys import bigjpg_upscaler
+
+    pool = MagicMock()
+    pool.acquire.side_effect = Empty
+    with patch.object(bigjpg_upscaler, "sleep"):
+        assert bigjpg_upscaler.upscale_bigjpg("design.png", tmp_path, pool=pool) == "design.png"
+
+    assert pool.acquire.call_count == 3
+    pool.release.assert_not_called()
+
+
+def test_download_data_url_ignores_whitespace(tmp_path):
+    from base64 import encodebytes
+
+    from genai_pod.utilitys import bigjpg_upscaler
+
+    png = _image_bytes("PNG")
+    # Line breaks every 76 characters, decoded in chunks that do not align with them
+    url = f"data:image/png;base64,{encodebytes(png).decode()}"
+    with patch.object(bigjpg_upscaler, "DOWNLOAD_CHUNK_SIZE", 30):
+        result = bigjpg_upscaler._download_and_process_image(url, "design", tmp_path)
+
+    assert result.read_bytes() == png
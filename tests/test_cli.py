@@ -30,10 +30,89 @@ def test_cli_generate_generategpt_success(
     )
     assert result.exit_code == 0
     mock_generate.assert_called_once_with(
-        output_directory="/path/to/output", tor_binary_path="/path/to/tor-binary"
+        output_directory="/path/to/output",
+        tor_binary_path="/path/to/tor-binary",
+        upscaler="bigjpg",
+        driver_pool_size=2,
+        driver_max_jobs=10,
+        upscaler_limits=None,
+        upload_timeout=30,
+        response_timeout=120,
+        image_timeout=300,
+        quality_thresholds=None,
+        reject_directory=None,
+        scratch_directory=None,
+        queue_size=2,
+        session_designs=1,
+        source_directory=None,
+        hash_index=None,
+        metadata_prompt="separate",
+        chatgpt_profiles=("ChatGPT",),
+        checkpoint_journal=None,
     )
 
 
+@patch("genai_pod.generators.generate_gpt.generate_image_selenium_gpt")
+def test_cli_generate_generategpt_local_upscaler(mock_generate, runner):
+    mock_generate.side_effect = SystemExit(0)
+    result = runner.invoke(
+        cli,
+        [
+            "generate",
+            "--output-directory",
+            "/path/to/output",
+            "generategpt",
+            "--upscaler",
+            "local",
+            "--driver-pool-size",
+            "3",
+        ],
+    )
+    assert result.exit_code == 0
+    mock_generate.assert_called_once_with(
+        output_directory="/path/to/output",
+        tor_binary_path=None,
+        upscaler="local",
+        driver_pool_size=3,
+        driver_max_jobs=10,
+        upscaler_limits=None,
+        upload_timeout=30,
+        response_timeout=120,
+        image_timeout=300,
+        quality_thresholds=None,
+        reject_directory=None,
+        scratch_directory=None,
+        queue_size=2,
+        session_designs=1,
+        source_directory=None,
+        hash_index=None,
+        metadata_prompt="separate",
+        chatgpt_profiles=("ChatGPT",),
+        checkpoint_journal=None,
+    )
+
+
+def test_cli_generategpt_workers_unwind_on_sigterm(runner):
+    import signal
+
+    handlers = []
+    previous = signal.getsignal(signal.SIGTERM)
+    try:
+        with patch(
+            "genai_pod.generators.gpt_workers.supervise_workers",
+            side_effect=lambda *_: handlers.append(signal.getsignal(signal.SIGTERM)),
+        ):
+            result = runner.invoke(
+                cli,
+                ["generate", "-o", "/path/to/output", "generategpt", "--workers", "2"],
+            )
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+    assert result.exit_code == 0
+    assert callable(handlers[0])
+
+
 @patch("genai_pod.generators.generate_gpt.generate_image_selenium_gpt")
 def test_cli_generate_generategpt_exception(mock_generate, runner):
     mock_generate.side_effect = Exception("Test Exception")
@@ -119,3 +198,49 @@ def test_cli_upload_help(runner):
     result = runner.invoke(cli, ["upload", "--help"])
     assert result.exit_code == 0
     assert "Upload images to webshops." in result.output
+
+
+@patch("genai_pod.utilitys.post_processing.finish_designs")
+def test_cli_process_success(mock_finish, runner):
+    from genai_pod.utilitys.post_processing import FinishingSummary
+
+    mock_finish.return_value = FinishingSummary(found=3, finished=2, skipped=1, elapsed=2.0)
+    result = runner.invoke(
+        cli,
+        [
+            "process",
+            "-o",
+            "/path/to/designs",
+            "--workers",
+            "4",
+            "--force",
+            "--tile-rows",
+            "512",
+            "--blend",
+            "fixed",
+        ],
+    )
+    assert result.exit_code == 0
+    mock_finish.assert_called_once_with(
+        "/path/to/designs",
+        workers=4,
+        trim_cm=0.1,
+        force=True,
+        tile_rows=512,
+        blend="fixed",
+    )
+    assert "Finished 2/3 designs (1 skipped, 0 failed)" in result.output
+
+
+def test_cli_process_skips_finished_designs(runner, tmp_path):
+    from PIL import Image
+
+    for name in ("first", "second"):
+        (tmp_path / name).mkdir()
+        Image.new("RGBA", (32, 32), (255, 0, 0, 255)).save(tmp_path / name / "design.png")
+    Image.new("RGBA", (32, 32)).save(tmp_path / "second" / "design_pil.png")
+
+    result = runner.invoke(cli, ["process", "-o", str(tmp_path), "--workers", "1"])
+    assert result.exit_code == 0
+    assert "Finished 1/2 designs (1 skipped, 0 failed)" in result.output
+    assert (tmp_path / "first" / "design_pil.png").exists()
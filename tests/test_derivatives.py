@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+from unittest.mock import MagicMock
+
+import pytest
+from PIL import Image, ImageDraw
+
+from genai_pod.utilitys.derivatives import (
+    read_derivative,
+    redbubble_tier,
+    render_derivatives,
+)
+
+
+def _design(width, height):
+    image = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+    ImageDraw.Draw(image).ellipse((10, 10, width - 10, height - 10), fill="teal")
+    return image
+
+
+@pytest.mark.parametrize(
+    ("width", "tier"),
+    [(1000, None), (1001, "1024x1024"), (2048, "2048x2048"), (8000, "8000x8000")],
+)
+def test_redbubble_tier(width, tier):
+    assert redbubble_tier(width) == tier
+
+
+def test_render_derivatives_per_shop(tmp_path):
+    derivatives = render_derivatives(_design(2100, 1050), tmp_path)
+
+    assert derivatives["spreadshirt"].file == "derivatives/2100x1050.png"
+    assert derivatives["redbubble"].file == "derivatives/2048x1024.png"
+    assert derivatives["redbubble"].tier == "2048x2048"
+    assert read_derivative(tmp_path, "redbubble") == derivatives["redbubble"]
+    with Image.open(tmp_path / derivatives["redbubble"].file) as image:
+        assert image.size == (2048, 1024)
+        assert image.info["dpi"] == pytest.approx((300, 300), abs=0.01)
+
+
+def test_render_derivatives_shares_files_and_skips_small_designs(tmp_path):
+    derivatives = render_derivatives(_design(2048, 2048), tmp_path / "large")
+    assert derivatives["spreadshirt"].file == derivatives["redbubble"].file
+    assert len(list((tmp_path / "large" / "derivatives").iterdir())) == 1
+
+    derivatives = render_derivatives(_design(800, 800), tmp_path / "small")
+    assert list(derivatives) == ["spreadshirt"]
+    assert read_derivative(tmp_path / "small", "redbubble") is None
+    assert read_derivative(tmp_path / "missing", "spreadshirt") is None
+
+
+def test_upload_uses_derivative(tmp_path):
+    from genai_pod.utilitys.post_processing import find_unfinished_designs
+    from genai_pod.utils import UploadConfig, process_subdir
+
+    design = tmp_path / "design"
+    design.mkdir()
+    _design(1200, 1200).save(design / "design.png")
+    render_derivatives(_design(1200, 1200), design)
+    for name in ("title", "tags", "description"):
+        (design / f"{name}.txt").write_text(name)
+
+    assert find_unfinished_designs(tmp_path) == ([design / "design.png"], 0)
+
+    upload = MagicMock(return_value=True)
+    config = UploadConfig(str(tmp_path), upload, "used", "error", None, shop="spreadshirt")
+    (tmp_path / "used").mkdir()
+    assert process_subdir(design, tmp_path, None, config)
+    assert upload.call_args.kwargs["image_path"] == str(design / "derivatives/1200x1200.png")
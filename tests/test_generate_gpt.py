@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+from unittest.mock import MagicMock
+
+import pytest
+from selenium.common.exceptions import TimeoutException
+
+from genai_pod.generators.generate_gpt import (
+    AbortScriptError,
+    ResponseTracker,
+    _wait_until_ready,
+)
+
+
+def test_response_tracker_waits_for_the_next_answer():
+    driver = MagicMock()
+    driver.find_elements.return_value = [MagicMock()] * 3
+    driver.execute_async_script.return_value = "Happy Cat"
+    tracker = ResponseTracker(driver, quiet_period=0.5)
+
+    tracker.mark()
+    text, saved = tracker.wait(120, 10, "Title")
+
+    assert text == "Happy Cat"
+    assert 9 < saved <= 10
+    driver.set_script_timeout.assert_called_once_with(120)
+    _script, answers, quiet = driver.execute_async_script.call_args.args
+    assert (answers, quiet) == (3, 500)
+
+
+def test_response_tracker_timeout():
+    driver = MagicMock()
+    driver.execute_async_script.side_effect = TimeoutException()
+    tracker = ResponseTracker(driver)
+
+    with pytest.raises(AbortScriptError, match="Title not received within 5s"):
+        tracker.wait(5, 10, "Title")
+    assert tracker.wait(5, 10, "Design description", required=False)[0] == ""
+
+
+def test_wait_until_ready_returns_saved_time():
+    states = iter([False, False, True])
+
+    saved = _wait_until_ready(MagicMock(), lambda _d: next(states), 5, 20, "Ready")
+
+    assert 18 < saved < 20
+
+
+def test_wait_until_ready_continues_after_timeout():
+    saved = _wait_until_ready(MagicMock(), lambda _d: False, 0.3, 10, "Never ready")
+
+    assert 9 < saved < 9.8
+
+
+def test_write_design_closes_workspace(tmp_path):
+    from PIL import Image
+
+    from genai_pod.generators.generate_gpt import DesignJob, _write_design
+    from genai_pod.utilitys.workspace import Workspace
+
+    job = DesignJob(
+        Workspace(tmp_path / "scratch"),
+        title="Happy Cat",
+        description="A happy cat.",
+        tags="cat, happy",
+        image=Image.new("RGBA", (1200, 1200), (0, 128, 128, 255)),
+    )
+
+    directory = _write_design(job, str(tmp_path / "out"))
+
+    assert directory == tmp_path / "out" / job.design_name
+    assert (directory / "Happy Cat-bg_upscaled_pil.png").is_file()
+    assert (directory / "derivatives.json").is_file()
+    assert not job.workspace.directory.exists()
+
+
+def test_chat_session_reuses_browser(monkeypatch):
+    from genai_pod.generators import generate_gpt
+
+    drivers = []
+
+    def start(_worker, _profile):
+        drivers.append(MagicMock())
+        return drivers[-1]
+
+    monkeypatch.setattr(generate_gpt, "_start_chat_gpt", start)
+    monkeypatch.setattr(generate_gpt, "WebDriverWait", MagicMock())
+    session = generate_gpt.ChatSession(max_designs=2)
+
+    for _ in range(3):
+        session.open_conversation()
+        session.finish_conversation()
+
+    assert session.launches == 2
+    drivers[0].get.assert_called_once_with(generate_gpt.CHATGPT_URL)
+    drivers[0].quit.assert_called_once()
+    assert session.driver is drivers[1]
+
+
+def test_generate_stage_recycles_session_on_error(monkeypatch):
+    from genai_pod.generators import generate_gpt
+
+    driver = MagicMock()
+    monkeypatch.setattr(generate_gpt, "_start_chat_gpt", lambda _worker, _profile: driver)
+    monkeypatch.setattr(
+        generate_gpt,
+        "_converse",
+        MagicMock(side_effect=generate_gpt.AbortScriptError("No title found!")),
+    )
+    session = generate_gpt.ChatSession(max_designs=10)
+
+    with pytest.raises(generate_gpt.AbortScriptError):
+        generate_gpt._generate_stage(MagicMock(image_url=None), session)
+
+    driver.quit.assert_called_once()
+    assert session.driver is None
+
+
+def test_generate_stage_switches_account_on_usage_limit(monkeypatch, tmp_path):
+    from datetime import UTC, datetime, timedelta
+
+    from genai_pod.generators import generate_gpt
+    from genai_pod.utilitys.account_pool import AccountPool
+
+    profiles = []
+    monkeypatch.setattr(
+        generate_gpt,
+        "_start_chat_gpt",
+        lambda _worker, profile: profiles.append(profile) or MagicMock(),
+    )
+    reset_time = datetime.now(UTC) + timedelta(hours=3)
+    monkeypatch.setattr(
+        generate_gpt,
+        "_converse",
+        MagicMock(side_effect=[generate_gpt.UsageLimitError(reset_time), None]),
+    )
+    accounts = AccountPool(["ChatGPT", "ChatGPT-2"], tmp_path / "cooldowns.json")
+    session = generate_gpt.ChatSession(max_designs=10, accounts=accounts)
+
+    generate_gpt._generate_stage(MagicMock(image_url=None), session)
+
+    assert profiles == ["ChatGPT", "ChatGPT-2"]
+    assert accounts.cooldowns() == {"ChatGPT": reset_time}
+
+
+def test_upscale_design_resumes_from_journal(monkeypatch, tmp_path):
+    from io import BytesIO
+
+    from PIL import Image
+
+    from genai_pod.generators import generate_gpt
+    from genai_pod.utilitys.journal import DesignJournal
+
+    source = tmp_path / "vexels.png"
+    Image.new("RGB", (8, 8)).save(source)
+    generated = BytesIO()
+    Image.new("RGBA", (64, 64), (255, 0, 0, 255)).save(generated, format="PNG")
+    http_client = MagicMock()
+    http_client.get.return_value.content = generated.getvalue()
+    monkeypatch.setattr(generate_gpt, "get_http_client", lambda: http_client)
+    upscaler = MagicMock()
+    upscaler.upscale_image.return_value = Image.new("RGBA", (128, 128))
+    journal = DesignJournal(tmp_path / "journal")
+    job = generate_gpt._scrape_stage(
+        None,
+        MagicMock(take=MagicMock(return_value=(source, MagicMock()))),
+        scratch_directory=str(tmp_path / "scratch"),
+        journal=journal,
+    )
+    job.image_url, job.title = "https://example.com/cat.png", "Cat"
+    job.record("generated", image_url=job.image_url, title=job.title)
+
+    generate_gpt._upscale_design(job, upscaler)
+    # The write stage failed, so the design is resumed after upscaling
+    job.close()
+    resumed = generate_gpt._scrape_stage(None, MagicMock(), journal=journal)
+    resumed = generate_gpt._generate_stage(resumed, MagicMock())
+    resumed = generate_gpt._upscale_design(resumed, upscaler)
+
+    assert resumed.checkpoint == job.checkpoint
+    assert resumed.image.size == (128, 128)
+    assert resumed.image_hash == job.image_hash
+    http_client.get.assert_called_once()
+    upscaler.upscale_image.assert_called_once()
+    resumed.close()
+
+
+def test_stages_without_their_input_abort(tmp_path):
+    from genai_pod.generators.generate_gpt import DesignJob, _upscale_design, _write_design
+    from genai_pod.utilitys.workspace import Workspace
+
+    job = DesignJob(Workspace(tmp_path / "scratch"), title="Cat")
+
+    with pytest.raises(AbortScriptError, match="No generated image"):
+        _upscale_design(job, MagicMock())
+    with pytest.raises(AbortScriptError, match="No upscaled image"):
+        _write_design(job, str(tmp_path / "out"))
+    job.close()
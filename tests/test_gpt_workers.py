@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+import sys
+from pathlib import Path
+from unittest.mock import patch
+
+from genai_pod.cli import cli
+from genai_pod.generators.gpt_workers import GenerationWorker, supervise_workers
+
+
+def test_generation_worker_copies_profiles(tmp_path):
+    chromedata = tmp_path / "chromedata"
+    (chromedata / "ChatGPT" / "Cache").mkdir(parents=True)
+    (chromedata / "ChatGPT" / "Cookies").write_text("session")
+    (chromedata / "ChatGPT" / "SingletonLock").write_text("lock")
+    (chromedata / "cookies.json").write_text("[]")
+
+    first = GenerationWorker.prepare(0, tmp_path / "out", chromedata)
+    second = GenerationWorker.prepare(1, tmp_path / "out", chromedata)
+
+    profile = first.user_data_dir / "ChatGPT"
+    assert (profile / "Cookies").read_text() == "session"
+    assert not (profile / "SingletonLock").exists()
+    assert not (profile / "Cache").exists()
+    assert (first.user_data_dir / "cookies.json").exists()
+    assert not (first.user_data_dir / "workers").exists()
+    assert first.debugging_port != second.debugging_port
+    assert first.staging_directory == tmp_path / "out_staging" / "worker-0"
+    assert second.staging_directory.is_dir()
+
+
+def _crashing_worker(index, options):
+    with (Path(options["output_directory"]) / f"started-{index}").open("a") as log:
+        log.write("x")
+    sys.exit(1)
+
+
+def test_supervisor_restarts_crashed_workers(tmp_path):
+    supervise_workers(
+        2,
+        {"output_directory": str(tmp_path)},
+        restart_delay=0,
+        max_restarts=3,
+        target=_crashing_worker,
+    )
+
+    starts = sum(len(path.read_text()) for path in tmp_path.glob("started-*"))
+    assert 3 <= starts <= 5
+    assert {path.name for path in tmp_path.glob("started-*")} == {"started-0", "started-1"}
+
+
+@patch("genai_pod.generators.gpt_workers.supervise_workers")
+def test_cli_generategpt_workers(mock_supervise, runner):
+    result = runner.invoke(
+        cli,
+        ["generate", "-o", "/path/to/output", "generategpt", "--workers", "3"],
+    )
+
+    assert result.exit_code == 0
+    workers, options = mock_supervise.call_args.args
+    assert workers == 3
+    assert options["output_directory"] == "/path/to/output"
+    assert "workers" not in options
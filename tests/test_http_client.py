@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from time import sleep
+
+import pytest
+
+from genai_pod.utilitys.http_client import HttpClient
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+
+    def do_GET(self):  # noqa: N802
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+            fail = server.failures > 0
+            server.failures -= fail
+        sleep(server.delay)
+        with server.lock:
+            server.active -= 1
+        body = b"" if fail else b"x" * 1000
+        self.send_response(503 if fail else 200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    server.lock = Lock()
+    server.connections = set()
+    server.active = server.peak = server.failures = 0
+    server.delay = 0
+    Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _url(server):
+    return f"http://127.0.0.1:{server.server_address[1]}/image.png"
+
+
+def test_client_reuses_connections_and_counts(server):
+    client = HttpClient()
+
+    for _ in range(3):
+        assert client.get(_url(server), timeout=5).status_code == 200
+
+    assert len(server.connections) == 1
+    stats = client.stats()["127.0.0.1"]
+    assert (stats.requests, stats.failures, stats.bytes) == (3, 0, 3000)
+    assert stats.latency > 0
+
+
+def test_client_retries_transient_errors(server):
+    server.failures = 2
+    client = HttpClient(backoff=0.01)
+
+    with client.stream(_url(server), timeout=5) as response:
+        assert response.status_code == 200
+        assert len(response.content) == 1000
+
+    assert client.stats()["127.0.0.1"].bytes == 1000
+
+
+def test_client_bounds_concurrency(server):
+    server.delay = 0.1
+    client = HttpClient(max_concurrency=2)
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(lambda _: client.get(_url(server), timeout=5), range(6)))
+
+    assert server.peak == 2
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+import os
+import signal
+
+import pytest
+
+from genai_pod.utilitys.journal import DesignJournal, exit_on_sigterm
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "vexels.png"
+    path.write_bytes(b"png")
+    return path
+
+
+def test_journal_resumes_released_design(tmp_path, source):
+    journal = DesignJournal(tmp_path / "journal")
+    checkpoint = journal.create(source)
+    journal.record(checkpoint.id, "generated", image_url="https://x/y.png", title="Cat")
+
+    # The design is owned until it is released
+    assert journal.claim() is None
+    journal.release(checkpoint.id)
+    resumed = journal.claim()
+
+    assert resumed.id == checkpoint.id
+    assert resumed.stage == "generated"
+    assert (resumed.image_url, resumed.title, resumed.attempts) == ("https://x/y.png", "Cat", 1)
+    with open(resumed.source_path, "rb") as file:
+        assert file.read() == b"png"
+
+
+def test_journal_skips_finished_designs(tmp_path, source):
+    journal = DesignJournal(tmp_path / "journal")
+    checkpoint = journal.create(source)
+
+    journal.finish(checkpoint.id)
+
+    assert journal.claim() is None
+    assert not journal.design_directory(checkpoint.id).exists()
+
+
+def test_journal_gives_up_after_max_attempts(tmp_path, source):
+    journal = DesignJournal(tmp_path / "journal", max_attempts=2)
+    design_id = journal.create(source).id
+    journal.release(design_id)
+
+    for _ in range(2):
+        assert journal.claim().id == design_id
+        journal.release(design_id)
+
+    assert journal.claim() is None
+    assert not journal.design_directory(design_id).exists()
+
+
+def test_journal_close_releases_designs_for_the_next_process(tmp_path, source):
+    journal = DesignJournal(tmp_path / "journal")
+    design_id = journal.create(source).id
+    journal.close()
+
+    assert DesignJournal(tmp_path / "journal").claim().id == design_id
+
+
+def test_exit_on_sigterm():
+    previous = signal.getsignal(signal.SIGTERM)
+    try:
+        exit_on_sigterm()
+        with pytest.raises(SystemExit) as excinfo:
+            os.kill(os.getpid(), signal.SIGTERM)
+        assert excinfo.value.code == 128 + signal.SIGTERM
+    finally:
+        signal.signal(signal.SIGTERM, previous)
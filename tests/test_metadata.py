@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+import json
+
+import pytest
+
+from genai_pod.utilitys.metadata import (
+    DesignMetadata,
+    parse_metadata,
+    repair_metadata,
+    validate_metadata,
+)
+
+
+def test_parse_metadata_from_code_block():
+    answer = (
+        "Here you go:\njson\n"
+        + json.dumps({"title": "Happy Cat", "description": "A cat.", "tags": ["cat", "happy"]})
+        + "\nEnjoy!"
+    )
+
+    metadata = parse_metadata(answer)
+
+    assert metadata == DesignMetadata("Happy Cat", "A cat.", ["cat", "happy"])
+    assert metadata.tags_string == "cat, happy"
+
+
+def test_parse_metadata_accepts_comma_separated_tags():
+    answer = '{"title": "Cat", "description": "A cat.", "tags": "cat, kitten"}'
+
+    assert parse_metadata(answer).tags == ["cat", "kitten"]
+
+
+@pytest.mark.parametrize(
+    ("answer", "match"),
+    [
+        ("I cannot do that.", "No JSON object"),
+        ('{"title": "Cat",}', "Invalid JSON"),
+        ('{"title": "Cat", "description": "", "tags": []}', "description, tags"),
+    ],
+)
+def test_parse_metadata_rejects_invalid_answers(answer, match):
+    with pytest.raises(ValueError, match=match):
+        parse_metadata(answer)
+
+
+def test_validate_metadata_reports_shop_limits():
+    metadata = DesignMetadata("T" * 51, "D" * 201, [f"tag{i}" for i in range(26)])
+
+    assert validate_metadata(metadata) == [
+        "title longer than 50 characters (spreadshirt)",
+        "description longer than 200 characters (spreadshirt)",
+        "more than 25 tags",
+    ]
+    assert not validate_metadata(DesignMetadata("Cat", "A cat.", ["cat"]))
+
+
+def test_repair_metadata_fits_shop_limits():
+    metadata = DesignMetadata(
+        title="The Happiest Cat In The Whole Wide World Wearing Sunglasses",
+        description="A happy cat wearing sunglasses. " * 10,
+        tags=["#cat", "Cat", " ", "sun  glasses", *[f"tag{i}" for i in range(30)]],
+    )
+
+    repaired = repair_metadata(metadata)
+
+    assert not validate_metadata(repaired)
+    assert repaired.title == "The Happiest Cat In The Whole Wide World Wearing"
+    assert repaired.description.endswith("sunglasses.")
+    assert repaired.tags[:3] == ["cat", "sun glasses", "tag0"]
+    assert len(repaired.tags) == 25
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+from genai_pod.utilitys.phash_index import (
+    HashIndex,
+    MultiIndexHashTable,
+    hamming_distance,
+    perceptual_hash,
+)
+
+
+def _design(shape, size=256, fill="teal"):
+    image = Image.new("RGBA", (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    box = (size // 8, size // 8, size * 7 // 8, size * 5 // 8)
+    getattr(draw, shape)(box, fill=fill)
+    return image
+
+
+def test_perceptual_hash_matches_resized_copies():
+    original = perceptual_hash(_design("ellipse"))
+    resized = perceptual_hash(_design("ellipse").resize((1024, 1024)))
+    different = perceptual_hash(_design("rectangle").rotate(90))
+
+    assert hamming_distance(original, resized) <= 2
+    assert hamming_distance(original, different) > 8
+
+
+def test_perceptual_hash_ignores_hidden_background_color():
+    design = _design("ellipse")
+    hidden = design.copy()
+    pixels = hidden.load()
+    for x in range(hidden.width):
+        pixels[x, 0] = (255, 0, 0, 0)
+
+    assert perceptual_hash(design) == perceptual_hash(hidden)
+
+
+def test_multi_index_search_matches_linear_scan():
+    rng = np.random.default_rng(42)
+    values = [int(v) for v in rng.integers(0, 2**63, size=5000, dtype=np.uint64)]
+    table = MultiIndexHashTable()
+    for i, value in enumerate(values):
+        table.add(value, str(i))
+    query = values[17] ^ 0b1011  # three bits flipped
+
+    expected = sorted(
+        (hamming_distance(query, value), str(i))
+        for i, value in enumerate(values)
+        if hamming_distance(query, value) <= 8
+    )
+
+    assert len(table) == 5000
+    assert table.search(query, 8) == expected
+    assert expected[0] == (3, "17")
+
+
+def test_hash_index_persists_and_reads_other_writers(tmp_path):
+    path = tmp_path / "designs.phash"
+    index = HashIndex(path)
+    other = HashIndex(path)
+
+    index.add(0xFF, "Happy Cat\nsticker")
+    assert other.find(0xFE) == (1, "Happy Cat sticker")
+    assert other.is_duplicate(0xFF, "Happy Cat 2")
+    assert not other.is_duplicate(0xFF00FF00FF, "Dog")
+
+    assert len(HashIndex(path)) == 1
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+from itertools import count
+from threading import Event
+from time import sleep
+
+import pytest
+
+from genai_pod.utilitys.pipeline import Pipeline, Stage
+
+
+def _source():
+    numbers = count()
+    return lambda _: next(numbers)
+
+
+def test_pipeline_runs_items_through_all_stages():
+    written = []
+
+    def write(item):
+        written.append(item)
+        return item
+
+    stats = Pipeline(
+        [Stage("source", _source()), Stage("double", lambda x: x * 2), Stage("write", write)],
+    ).run(items=5)
+
+    assert written[:5] == [0, 2, 4, 6, 8]
+    assert stats.stages["write"].processed >= 5
+    assert set(stats.queues) == {"double", "write"}
+
+
+def test_pipeline_overlaps_stages():
+    # The second item must be generated while the first one is still upscaled
+    upscaling = Event()
+    overlapped = Event()
+
+    def generate(item):
+        if item == 1 and upscaling.wait(timeout=5):
+            overlapped.set()
+        return item
+
+    def upscale(item):
+        upscaling.set()
+        overlapped.wait(timeout=5)
+        return item
+
+    Pipeline(
+        [Stage("source", _source()), Stage("generate", generate), Stage("upscale", upscale)],
+    ).run(items=1)
+
+    assert overlapped.is_set()
+
+
+def test_pipeline_bounds_queue_depths():
+    pipeline = Pipeline(
+        [Stage("source", _source()), Stage("slow", lambda x: sleep(0.2) or x)],
+        queue_size=2,
+    )
+    stats = pipeline.run(items=3, report_interval=0.05)
+
+    assert stats.queue_size == 2
+    assert stats.queues["slow"] == 0  # drained on stop
+    assert stats.stages["source"].processed <= 3 + 2 + 1
+
+
+def test_pipeline_cleans_up_dropped_and_failed_items():
+    cleaned = []
+
+    def check(item):
+        if item % 3 == 1:
+            raise ValueError("broken")
+        return None if item % 3 == 2 else item
+
+    stats = Pipeline(
+        [Stage("source", _source()), Stage("check", check)],
+        cleanup=cleaned.append,
+    ).run(items=3)
+
+    assert stats.stages["check"].failed >= 2
+    assert stats.stages["check"].dropped >= 2
+    assert 1 in cleaned
+    assert 2 in cleaned
+
+
+def test_pipeline_stops_after_consecutive_failures():
+    def fail(_):
+        raise RuntimeError("no image")
+
+    stats = Pipeline(
+        [Stage("source", _source()), Stage("generate", fail)],
+        max_consecutive_failures=3,
+    ).run()
+
+    assert stats.stages["generate"].failed >= 3
+    assert stats.stages["generate"].processed == 0
+
+
+def test_pipeline_requires_stages():
+    with pytest.raises(ValueError, match="at least one stage"):
+        Pipeline([])
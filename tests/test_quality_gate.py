@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+import json
+
+import pytest
+from PIL import Image, ImageDraw, ImageFilter
+
+from genai_pod.utilitys.quality_gate import (
+    QualityGate,
+    QualityThresholds,
+    load_thresholds,
+    measure_quality,
+)
+
+
+def _design(box=(100, 100, 400, 400), background=(0, 0, 0, 0)):
+    image = Image.new("RGBA", (512, 512), background)
+    draw = ImageDraw.Draw(image)
+    draw.ellipse(box, fill=(200, 30, 30, 255))
+    for offset in range(0, 300, 20):
+        draw.line((box[0] + offset, box[1], box[2] - offset, box[3]), fill="navy", width=3)
+    return image
+
+
+@pytest.mark.parametrize(
+    ("image", "reasons"),
+    [
+        (_design(), []),
+        (Image.new("RGBA", (512, 512)), ["almost empty"]),
+        (_design(background=(255, 255, 255, 255)), ["background not removed"]),
+        (_design(box=(-100, 100, 300, 400)), ["subject cropped at the frame edge"]),
+        (_design().filter(ImageFilter.GaussianBlur(6)), ["blurry"]),
+    ],
+)
+def test_quality_metrics_failures(image, reasons):
+    assert measure_quality(image).failures(QualityThresholds()) == reasons
+
+
+def test_quality_gate_rejects_with_metrics(tmp_path):
+    gate = QualityGate(tmp_path / "rejected")
+
+    assert gate.inspect(_design(), "good")
+    assert not gate.inspect(Image.new("RGBA", (64, 64)), "empty")
+
+    assert gate.rejected == 1
+    assert not (tmp_path / "rejected" / "good").exists()
+    assert (tmp_path / "rejected" / "empty" / "empty.png").is_file()
+    report = json.loads((tmp_path / "rejected" / "empty" / "metrics.json").read_text())
+    assert report["reasons"] == ["almost empty"]
+    assert report["metrics"]["coverage"] == 0
+
+
+def test_load_thresholds(tmp_path):
+    path = tmp_path / "thresholds.json"
+    path.write_text(json.dumps({"min_sharpness": 1.5}))
+
+    thresholds = load_thresholds(path)
+
+    assert thresholds.min_sharpness == 1.5
+    assert thresholds.min_coverage == QualityThresholds().min_coverage
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+from io import BytesIO
+from unittest.mock import MagicMock, patch
+
+import pytest
+from PIL import Image
+
+from genai_pod.utilitys.source_queue import SourceImage, SourceQueue
+from genai_pod.utilitys.workspace import Workspace
+
+
+def _response(*_args, **_kwargs):
+    buffer = BytesIO()
+    Image.new("RGB", (8, 8), "teal").save(buffer, format="JPEG")
+    response = MagicMock()
+    response.content = buffer.getvalue()
+    return response
+
+
+def _sources(count):
+    return [SourceImage(f"Funny cat {i}", f"https://example.com/{i}.jpg") for i in range(count)]
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    with Workspace(tmp_path / "scratch") as workspace:
+        yield workspace
+
+
+@patch("genai_pod.utilitys.http_client.HttpClient.get", side_effect=_response)
+def test_fill_downloads_all_harvested_images_once(mock_get, tmp_path):
+    queue = SourceQueue(tmp_path / "sources", lambda: _sources(3))
+
+    assert queue.fill() == 3
+    assert queue.fill() == 0
+    assert len(queue) == 3
+    assert mock_get.call_count == 3
+    assert len(list((tmp_path / "sources").glob("*.json"))) == 3
+
+
+@patch("genai_pod.utilitys.http_client.HttpClient.get", side_effect=_response)
+def test_take_moves_image_into_workspace(_mock_get, tmp_path, workspace):
+    queue = SourceQueue(tmp_path / "sources", lambda: _sources(2), low_water=0)
+    queue.fill()
+
+    path, source = queue._claim(workspace)
+
+    assert path.parent == workspace.directory
+    assert source.title.startswith("Funny cat")
+    with Image.open(path) as image:
+        assert image.format == "PNG"
+    assert len(queue) == 1
+    assert len(list((tmp_path / "sources").glob("*.json"))) == 1
+
+
+@patch("genai_pod.utilitys.http_client.HttpClient.get", side_effect=_response)
+def test_take_refills_in_background(_mock_get, tmp_path, workspace):
+    harvest = MagicMock(return_value=_sources(4))
+    queue = SourceQueue(tmp_path / "sources", harvest, low_water=2)
+    try:
+        taken = queue.take(workspace, timeout=10)
+    finally:
+        queue.stop()
+
+    assert taken is not None
+    harvest.assert_called_once()
+    assert len(queue) == 3
+
+
+def test_take_gives_up_without_sources(tmp_path, workspace):
+    queue = SourceQueue(tmp_path / "sources", list)
+    try:
+        assert queue.take(workspace, timeout=0.1) is None
+    finally:
+        queue.stop()
+
+
+@patch("genai_pod.utilitys.http_client.HttpClient.get", side_effect=_response)
+def test_claim_skips_images_claimed_during_the_scan(_mock_get, tmp_path, workspace):
+    from pathlib import Path
+
+    queue = SourceQueue(tmp_path / "sources", lambda: _sources(2), low_water=0)
+    queue.fill()
+    first = sorted((tmp_path / "sources").glob("*.png"))[0]
+    stat = Path.stat
+
+    def vanishing_stat(path, *args, **kwargs):
+        if path == first:
+            raise FileNotFoundError(path)
+        return stat(path, *args, **kwargs)
+
+    with patch.object(Path, "stat", vanishing_stat):
+        path, _source = queue._claim(workspace)
+
+    assert path.parent == workspace.directory
+    assert first.exists()
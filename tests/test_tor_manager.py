@@ -0,0 +1,166 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+import socket
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from genai_pod.utilitys.tor_manager import TorManager
+
+FAKE_TOR = """\
+import os
+import socketserver
+import sys
+from pathlib import Path
+
+args = dict(zip(sys.argv[1::2], sys.argv[2::2]))
+data_directory = Path(args["--DataDirectory"])
+cookie = b"\\x01\\x02\\x03\\x04"
+(data_directory / "control_auth_cookie").write_bytes(cookie)
+progress = iter([10, 50, 100])
+
+
+class Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for raw in self.rfile:
+            line = raw.decode().strip()
+            if line.startswith("AUTHENTICATE"):
+                ok = line == f"AUTHENTICATE {cookie.hex()}"
+                self.wfile.write(b"250 OK\\r\\n" if ok else b"515 Bad authentication\\r\\n")
+            elif line == "GETINFO status/bootstrap-phase":
+                phase = next(progress, 100)
+                self.wfile.write(
+                    f"250-status/bootstrap-phase=NOTICE BOOTSTRAP PROGRESS={phase}\\r\\n"
+                    "250 OK\\r\\n".encode()
+                )
+            elif line == "SIGNAL NEWNYM":
+                with (data_directory / "signals.log").open("a") as log:
+                    log.write("NEWNYM\\n")
+                self.wfile.write(b"250 OK\\r\\n")
+            elif line == "SIGNAL HALT":
+                self.wfile.write(b"250 OK\\r\\n")
+                self.wfile.flush()
+                os._exit(0)
+            elif line == "QUIT":
+                self.wfile.write(b"250 closing connection\\r\\n")
+                return
+            else:
+                self.wfile.write(b"510 Unrecognized command\\r\\n")
+
+
+socketserver.TCPServer.allow_reuse_address = True
+with socketserver.TCPServer(("127.0.0.1", int(args["--ControlPort"])), Handler) as server:
+    server.serve_forever()
+"""
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def fake_tor(tmp_path):
+    binary = tmp_path / "tor"
+    binary.write_text(f"#!{sys.executable}\n{FAKE_TOR}")
+    binary.chmod(0o755)
+    manager = TorManager(
+        str(binary),
+        data_directory=tmp_path / "data",
+        socks_port=_free_port(),
+        control_port=_free_port(),
+        bootstrap_timeout=20,
+    )
+    yield manager
+    manager.stop()
+
+
+def test_tor_manager_starts_once_and_renews_circuits(fake_tor):
+    fake_tor.start()
+    process = fake_tor._process
+    assert fake_tor.is_running
+
+    fake_tor.start()
+    assert fake_tor._process is process
+
+    fake_tor.new_circuit()
+    fake_tor.new_circuit()
+    assert (fake_tor.data_directory / "signals.log").read_text() == "NEWNYM\n" * 2
+    assert fake_tor._process is process
+
+    fake_tor.stop()
+    assert not fake_tor.is_running
+
+
+def test_tor_manager_uses_running_tor(fake_tor):
+    fake_tor.start()
+    other = TorManager(
+        fake_tor.tor_binary_path,
+        data_directory=fake_tor.data_directory,
+        socks_port=fake_tor.socks_port,
+        control_port=fake_tor.control_port,
+    )
+
+    other.start()
+    other.new_circuit()
+
+    assert other._process is None
+    assert (fake_tor.data_directory / "signals.log").read_text() == "NEWNYM\n"
+    other.stop()
+    assert fake_tor.is_running
+
+
+def _same_tor(manager):
+    return TorManager(
+        manager.tor_binary_path,
+        data_directory=manager.data_directory,
+        socks_port=manager.socks_port,
+        control_port=manager.control_port,
+        bootstrap_timeout=manager.bootstrap_timeout,
+    )
+
+
+def test_tor_manager_leaves_tor_running_for_other_users(fake_tor):
+    fake_tor.start()
+    process = fake_tor._process
+    other = _same_tor(fake_tor)
+    other.start()
+
+    # The process that started Tor exits first
+    fake_tor.stop()
+    assert process.poll() is None
+    other.new_circuit()
+
+    # The last user stops Tor
+    other.stop()
+    assert process.wait(timeout=10) == 0
+    assert not other._is_bootstrapped()
+
+
+def test_tor_manager_ignores_users_that_exited(fake_tor):
+    (fake_tor.data_directory / "users").mkdir(parents=True)
+    (fake_tor.data_directory / "users" / "999999999-0").touch()
+    fake_tor.start()
+    process = fake_tor._process
+
+    fake_tor.stop()
+
+    assert process.poll() is not None
+    assert not list((fake_tor.data_directory / "users").iterdir())
+
+
+def test_tor_manager_starts_tor_once_for_concurrent_workers(fake_tor):
+    managers = [fake_tor, *(_same_tor(fake_tor) for _ in range(3))]
+
+    with ThreadPoolExecutor(max_workers=len(managers)) as executor:
+        list(executor.map(TorManager.start, managers))
+
+    assert sum(manager._process is not None for manager in managers) == 1
+    for manager in managers[1:]:
+        manager.stop()
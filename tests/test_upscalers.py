@@ -0,0 +1,248 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+from pathlib import Path
+
+import pytest
+from PIL import Image, ImageDraw
+
+from genai_pod.utilitys.upscalers import (
+    BigjpgUpscaler,
+    LocalUpscaler,
+    Upscaler,
+    create_upscaler,
+)
+from genai_pod.utilitys.workspace import Workspace
+
+
+def test_local_upscaler_keeps_mode_and_scales(tmp_path):
+    image = Image.new("RGBA", (50, 40), (0, 0, 0, 0))
+    ImageDraw.Draw(image).ellipse((10, 5, 40, 35), fill=(200, 30, 30, 255))
+    image_path = tmp_path / "design.png"
+    image.save(image_path)
+
+    result = LocalUpscaler(scale=2).upscale(str(image_path), tmp_path)
+
+    assert result == str(tmp_path / "design_upscaled.png")
+    with Image.open(result) as upscaled:
+        assert upscaled.size == (100, 80)
+        assert upscaled.mode == "RGBA"
+        assert upscaled.getpixel((0, 0))[3] == 0
+        assert upscaled.getpixel((50, 40)) == (200, 30, 30, 255)
+
+
+class _FileUpscaler(Upscaler):
+    name = "file"
+
+    def __init__(self):
+        self.inputs = []
+
+    def upscale(self, image_path, output_directory):
+        self.inputs.append(image_path)
+        with Image.open(image_path) as image:
+            upscaled = image.resize((image.width * 2, image.height * 2))
+        upscaled_path = output_directory / "upscaled.png"
+        upscaled.save(upscaled_path)
+        return str(upscaled_path)
+
+
+def test_upscale_image_hands_over_files_in_the_workspace(tmp_path):
+    upscaler = _FileUpscaler()
+    with Workspace(tmp_path) as workspace:
+        upscaled = upscaler.upscale_image(Image.new("RGB", (8, 6)), workspace)
+        assert upscaler.inputs[0].startswith(str(workspace.directory))
+    assert upscaled.size == (16, 12)
+    assert not workspace.directory.exists()
+
+    upscaler.upscale_image(Image.new("RGB", (8, 6)))
+    assert not Path(upscaler.inputs[1]).parent.exists()
+
+
+def test_workspace_is_removed_on_errors(tmp_path):
+    with pytest.raises(RuntimeError), Workspace(tmp_path / "scratch") as workspace:
+        workspace.file(suffix=".png").write_bytes(b"leaked")
+        raise RuntimeError
+    assert not list((tmp_path / "scratch").iterdir())
+
+
+def test_create_upscaler():
+    bigjpg = create_upscaler("bigjpg", tor_binary_path="/path/to/tor")
+    assert isinstance(bigjpg, BigjpgUpscaler)
+    assert bigjpg.tor_binary_path == "/path/to/tor"
+    assert isinstance(create_upscaler("local"), LocalUpscaler)
+    with pytest.raises(ValueError, match="Unknown upscaler"):
+        create_upscaler("waifu")
+
+
+def test_upscale_cache_hit_and_lru_eviction(tmp_path):
+    from genai_pod.utilitys.upscale_cache import UpscaleCache
+
+    cache = UpscaleCache(tmp_path / "cache", max_bytes=2500)
+    sources = []
+    for index in range(3):
+        source = tmp_path / f"source{index}.png"
+        source.write_bytes(bytes([index]) * 1000)
+        sources.append(source)
+
+    keys = [cache.key(source, {"scale": 2}) for source in sources]
+    assert keys[0] != cache.key(sources[0], {"scale": 4})
+    assert cache.get(keys[0], tmp_path / "out.png") is None
+
+    cache.put(keys[0], sources[0])
+    cache.put(keys[1], sources[1])
+    assert cache.get(keys[0], tmp_path / "out.png") == tmp_path / "out.png"
+    assert (tmp_path / "out.png").read_bytes() == sources[0].read_bytes()
+
+    # Make entry 1 the least recently used one
+    import os
+
+    entry = next((tmp_path / "cache").glob(f"*/{keys[1]}.png"))
+    os.utime(entry, (0, 0))
+    cache.put(keys[2], sources[2])
+
+    assert cache.get(keys[1], tmp_path / "out.png") is None
+    assert cache.get(keys[0], tmp_path / "out.png") is not None
+    assert cache.get(keys[2], tmp_path / "out.png") is not None
+
+
+def test_upscale_cache_concurrent_puts_of_the_same_key(tmp_path):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from genai_pod.utilitys.upscale_cache import UpscaleCache
+
+    cache = UpscaleCache(tmp_path / "cache")
+    source = tmp_path / "source.png"
+    source.write_bytes(b"upscaled" * 100_000)
+    key = cache.key(source, {"scale": 2})
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: cache.put(key, source), range(16)))
+
+    assert cache.get(key, tmp_path / "out.png") is not None
+    assert (tmp_path / "out.png").read_bytes() == source.read_bytes()
+    assert not list((tmp_path / "cache").glob("*/*.tmp"))
+
+
+def test_bigjpg_upscale_uses_cache_before_starting_tor(tmp_path):
+    from unittest.mock import patch
+
+    from genai_pod.utilitys.bigjpg_upscaler import BIGJPG_SETTINGS, upscale
+    from genai_pod.utilitys.upscale_cache import UpscaleCache
+
+    image_path = tmp_path / "design.png"
+    image_path.write_bytes(b"raw image")
+    upscaled = tmp_path / "upscaled.png"
+    upscaled.write_bytes(b"upscaled image")
+    cache = UpscaleCache(tmp_path / "cache")
+    cache.put(cache.key(image_path, BIGJPG_SETTINGS), upscaled)
+
+    with patch("genai_pod.utilitys.bigjpg_upscaler.start_tor") as mock_start_tor:
+        result = upscale(str(image_path), tmp_path, None, cache)
+
+    mock_start_tor.assert_not_called()
+    assert result == str(tmp_path / "design_upscaled.png")
+    assert (tmp_path / "design_upscaled.png").read_bytes() == b"upscaled image"
+
+
+def test_preflight_limits(tmp_path):
+    from genai_pod.utilitys.preflight import UpscalerLimits, load_limits
+
+    def _write(image, name):
+        image.save(tmp_path / name)
+        return tmp_path / name
+
+    assert load_limits()["bigjpg"].max_width == 3000
+    limits = UpscalerLimits(max_width=40, max_file_size=10**6, modes=["RGB"])
+    assert not limits.check(_write(Image.new("RGB", (40, 10)), "ok.png"))
+    reasons = limits.check(_write(Image.new("RGBA", (41, 10)), "big.png"))
+    assert reasons == ["width 41 > 40 px", "unsupported color mode RGBA"]
+    assert UpscalerLimits(allow_alpha=False).check(
+        _write(Image.new("RGBA", (4, 4)), "alpha.png")
+    ) == ["transparency is not supported"]
+
+
+def test_bigjpg_preflight_routes_oversized_images_to_fallback(tmp_path):
+    from unittest.mock import patch
+
+    from genai_pod.utilitys.preflight import UpscalerLimits
+
+    image_path = tmp_path / "design.png"
+    Image.new("RGB", (64, 32)).save(image_path)
+    bigjpg = BigjpgUpscaler(limits=UpscalerLimits(max_width=32))
+
+    with patch("genai_pod.utilitys.bigjpg_upscaler.upscale") as mock_upscale:
+        result = bigjpg.upscale(str(image_path), tmp_path)
+
+    mock_upscale.assert_not_called()
+    assert bigjpg.skipped_round_trips == 1
+    with Image.open(result) as upscaled:
+        assert upscaled.size == (128, 64)
+
+
+def test_bigjpg_close_closes_driver_pool():
+    from unittest.mock import MagicMock
+
+    bigjpg = BigjpgUpscaler()
+    bigjpg.pool = MagicMock()
+
+    bigjpg.close()
+
+    bigjpg.pool.close.assert_called_once()
+
+
+def test_driver_pool_reuses_and_recycles_drivers():
+    import time
+    from unittest.mock import MagicMock
+
+    from genai_pod.utilitys.driver_pool import DriverPool
+
+    warmed = []
+    pool = DriverPool(MagicMock, warmed.append, size=1, max_jobs=2)
+
+    first = pool.acquire(timeout=5)
+    pool.release(first)
+    assert pool.acquire(timeout=5) is first
+    pool.release(first)  # Second job reaches the job limit
+
+    second = pool.acquire(timeout=5)
+    assert second is not first
+    first.quit.assert_called_once()
+    pool.release(second, failed=True)
+
+    third = pool.acquire(timeout=5)
+    assert third not in {first, second}
+    second.quit.assert_called_once()
+
+    assert pool.stats.launched == 3
+    assert pool.stats.recycled == 2
+    assert pool.stats.jobs == 4
+    assert pool.stats.max_acquire_time >= pool.stats.acquire_time / 4
+    pool.release(third)
+    time.sleep(0.1)
+    pool.close()
+    third.quit.assert_called_once()
+    assert warmed.count(first) == 2
+
+
+def test_driver_pool_shrinks_and_relaunches_after_failed_launches():
+    from queue import Empty
+    from unittest.mock import MagicMock, patch
+
+    from genai_pod.utilitys.driver_pool import DriverPool
+
+    factory = MagicMock(side_effect=[OSError("no chrome")] * 2 + [MagicMock()])
+    pool = DriverPool(factory, lambda _driver: None, size=1, launch_attempts=2)
+
+    with patch("genai_pod.utilitys.driver_pool.sleep"):
+        with pytest.raises(Empty):
+            pool.acquire(timeout=0.5)
+        # The failed launch is retried on the next acquire
+        driver = pool.acquire(timeout=5)
+
+    assert driver is not None
+    assert factory.call_count == 3
+    pool.release(driver)
+    pool.close()
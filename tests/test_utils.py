@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+# Copyright (C) 2024
+# Benjamin Thomas Schwertfeger https://github.com/btschwertfeger
+# Leonhard Thomas Schwertfeger https://github.com/LeonhardSchwertfeger
+#
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from genai_pod.utils import erode_alpha, finish_image, pilling_image
+
+
+def _design(size: int = 96) -> Image.Image:
+    rng = np.random.default_rng(42)
+    arr = rng.integers(0, 256, (size, size, 4), dtype=np.uint8)
+    arr[..., 3] = 0
+    arr[size // 6 : -size // 6, size // 5 : -size // 4, 3] = 255
+    arr[size // 3 : size // 2, :, 3] = 200
+    return Image.fromarray(arr, "RGBA")
+
+
+@pytest.mark.parametrize("radius", [0, 1, 3, 11])
+@pytest.mark.parametrize("shape", [(1, 1), (7, 3), (64, 45)])
+def test_erode_alpha_separable_matches_iterative(shape, radius):
+    rng = np.random.default_rng(0)
+    alpha = Image.fromarray(rng.integers(0, 256, shape, dtype=np.uint8), "L")
+
+    separable = np.asarray(erode_alpha(alpha, radius, "separable"))
+    iterative = np.asarray(erode_alpha(alpha, radius, "iterative"))
+
+    assert np.array_equal(separable, iterative)
+
+
+def test_erode_alpha_unknown_engine():
+    with pytest.raises(ValueError, match="Unknown erosion engine"):
+        erode_alpha(Image.new("L", (4, 4)), 1, "unknown")
+
+
+def test_pilling_image_erosion_engines_match(tmp_path):
+    paths = []
+    for engine in ("separable", "iterative"):
+        path = tmp_path / f"{engine}.png"
+        _design().save(path)
+        pilling_image(str(path), erosion_engine=engine)
+        paths.append(tmp_path / f"{engine}_pil.png")
+
+    with Image.open(paths[0]) as first, Image.open(paths[1]) as second:
+        assert np.array_equal(np.asarray(first), np.asarray(second))
+
+
+@pytest.mark.parametrize(("tile_rows", "tile_workers"), [(1, 1), (13, 3), (500, 2)])
+def test_pilling_image_tiled_matches_untiled(tmp_path, tile_rows, tile_workers):
+    path = tmp_path / "design.png"
+    _design().save(path)
+
+    pilling_image(str(path))
+    with Image.open(tmp_path / "design_pil.png") as image:
+        untiled = np.asarray(image)
+
+    pilling_image(str(path), tile_rows=tile_rows, tile_workers=tile_workers)
+    with Image.open(tmp_path / "design_pil.png") as image:
+        tiled = np.asarray(image)
+
+    assert np.array_equal(untiled, tiled)
+
+
+def test_pilling_image_invalid_tile_rows(tmp_path):
+    path = tmp_path / "design.png"
+    _design().save(path)
+    with pytest.raises(ValueError, match="tile_rows"):
+        pilling_image(str(path), tile_rows=0)
+
+
+def test_pilling_image_fixed_blend_matches_float(tmp_path):
+    path = tmp_path / "design.png"
+    _design().save(path)
+
+    results = []
+    for blend in ("float", "fixed"):
+        pilling_image(str(path), blend=blend)
+        with Image.open(tmp_path / "design_pil.png") as image:
+            results.append(np.asarray(image).astype(np.int16))
+
+    assert np.abs(results[0] - results[1]).max() <= 2
+
+
+def test_pilling_image_unknown_blend(tmp_path):
+    path = tmp_path / "design.png"
+    _design().save(path)
+    with pytest.raises(ValueError, match="Unknown blending implementation"):
+        pilling_image(str(path), blend="double")
+
+
+def test_finish_image_matches_pilling_image(tmp_path):
+    path = tmp_path / "design.png"
+    _design().save(path)
+    pilling_image(str(path))
+
+    finished = finish_image(_design())
+
+    with Image.open(tmp_path / "design_pil.png") as saved:
+        assert np.array_equal(np.asarray(saved), np.asarray(finished))